@@ -13,6 +13,7 @@
  * - Hybrid control mode (manual + wireless simultaneously)
  * - Auto-rotation (continuous rotation triggered by double-tap on mobile)
  * - 30-second safety timeout with 15-second heartbeat
+ * - On-device motion macros (GOTO to an absolute position, SWEEP, relative STEP)
  * - Compatible with existing encoder/joystick hardware
  */
 
@@ -66,6 +67,12 @@ BasicStepperDriver motorOne(MOTOR_STEPS, MOTOR_1_DIR, MOTOR_1_PUL);     // Rotat
 BasicStepperDriver motorTwo(MOTOR_STEPS, MOTOR_2_DIR, MOTOR_2_PUL);     // X-axis (zoom)
 BasicStepperDriver motorThree(MOTOR_STEPS, MOTOR_3_DIR, MOTOR_3_PUL);   // Y-axis (height)
 
+BasicStepperDriver* motors[3] = {&motorOne, &motorTwo, &motorThree};
+#define AXIS_ROT 0
+#define AXIS_X   1
+#define AXIS_Y   2
+#define STEPS_PER_REV ((long)MOTOR_STEPS * MICROSTEPS)
+
 //---
 // Encoder Objects
 //---
@@ -100,6 +107,20 @@ int motor3Direction = 0;    // 1=up, -1=down, 0=stop
 bool autoRotationActive = false;
 int autoRotationDirection = 0;  // 1=CW, -1=CCW
 
+// Position tracking (open-loop step counts since power-up or SET_HOME)
+long axisPosition[3] = {0, 0, 0};   // Rotation, X, Y
+int axisSign[3] = {0, 0, 0};        // Direction of the move currently tracked
+
+// Motion macros (GOTO / SWEEP run to completion on the Arduino)
+#define MACRO_NONE  0
+#define MACRO_GOTO  1
+#define MACRO_SWEEP 2
+#define MACRO_STEP  3
+int macroState = MACRO_NONE;
+bool macroAxis[3] = {false, false, false};  // Axes the running macro moves (Rotation, X, Y)
+int sweepStage = 0;
+long sweepSteps = 0;
+
 // Safety timeout
 unsigned long lastPCCommand = 0;
 const unsigned long PC_TIMEOUT = 30000;  // 30 seconds
@@ -136,7 +157,7 @@ void setup() {
   
   Serial.println("HARBOR Diamond Viewer - LattePanda Edition");
   Serial.println("Ready for wireless + manual control");
-  Serial.println("Commands: X_FORWARD, X_BACK, X_STOP, Y_UP, Y_DOWN, Y_STOP, ROTATE_CW, ROTATE_CCW, ROTATE_STOP, AUTO_ROTATE_CW, AUTO_ROTATE_CCW, AUTO_ROTATE_STOP, PING");
+  Serial.println("Commands: X_FORWARD, X_BACK, X_STOP, Y_UP, Y_DOWN, Y_STOP, ROTATE_CW, ROTATE_CCW, ROTATE_STOP, AUTO_ROTATE_CW, AUTO_ROTATE_CCW, AUTO_ROTATE_STOP, GOTO x,y,deg, SWEEP deg, STEP axis,n, SET_HOME, POS, PING");
 }
 
 //---
@@ -168,11 +189,16 @@ void loop() {
     Serial.println("STATUS:TIMEOUT");
   }
 
+  // Advance GOTO / SWEEP macros
+  if (macroState != MACRO_NONE) {
+    updateMacro();
+  }
+
   // Handle auto-rotation (continuous spinning)
   if (autoRotationActive) {
     if (!motorOne.getStepsRemaining()) {
       // Keep rotating
-      motorOne.startRotate(360 * autoRotationDirection);
+      trackedMove(AXIS_ROT, STEPS_PER_REV * autoRotationDirection);
     }
   } else {
     // Manual control (encoders/joystick) - always available
@@ -213,18 +239,24 @@ void processSerialCommands() {
     
     lastPCCommand = millis();  // Update timeout timer
     pcControlActive = true;
+
+    // Any manual motion command cancels a running macro
+    if (command.startsWith("X_") || command.startsWith("Y_") ||
+        command.startsWith("ROTATE_") || command.startsWith("AUTO_ROTATE_")) {
+      cancelMacro();
+    }
     
     // X-axis (zoom) commands
     if (command == "X_FORWARD") {
       motor2Moving = true;
       motor2Direction = 1;
-      motorTwo.startMove(1000000);  // Continuous movement
+      trackedMove(AXIS_X, 1000000);  // Continuous movement
       Serial.println("ACK:X_FORWARD");
     }
     else if (command == "X_BACK") {
       motor2Moving = true;
       motor2Direction = -1;
-      motorTwo.startMove(-1000000);
+      trackedMove(AXIS_X, -1000000);
       Serial.println("ACK:X_BACK");
     }
     else if (command == "X_STOP") {
@@ -238,13 +270,13 @@ void processSerialCommands() {
     else if (command == "Y_UP") {
       motor3Moving = true;
       motor3Direction = 1;
-      motorThree.startMove(1000000);
+      trackedMove(AXIS_Y, 1000000);
       Serial.println("ACK:Y_UP");
     }
     else if (command == "Y_DOWN") {
       motor3Moving = true;
       motor3Direction = -1;
-      motorThree.startMove(-1000000);
+      trackedMove(AXIS_Y, -1000000);
       Serial.println("ACK:Y_DOWN");
     }
     else if (command == "Y_STOP") {
@@ -259,14 +291,14 @@ void processSerialCommands() {
       autoRotationActive = false;  // Cancel auto-rotation
       motor1Moving = true;
       motor1Direction = 1;
-      motorOne.startRotate(360);
+      trackedMove(AXIS_ROT, STEPS_PER_REV);
       Serial.println("ACK:ROTATE_CW");
     }
     else if (command == "ROTATE_CCW") {
       autoRotationActive = false;
       motor1Moving = true;
       motor1Direction = -1;
-      motorOne.startRotate(-360);
+      trackedMove(AXIS_ROT, -STEPS_PER_REV);
       Serial.println("ACK:ROTATE_CCW");
     }
     else if (command == "ROTATE_STOP") {
@@ -282,14 +314,14 @@ void processSerialCommands() {
       autoRotationActive = true;
       autoRotationDirection = 1;
       motor1Moving = true;
-      motorOne.startRotate(360);  // Start first rotation
+      trackedMove(AXIS_ROT, STEPS_PER_REV);  // Start first rotation
       Serial.println("ACK:AUTO_ROTATE_CW");
     }
     else if (command == "AUTO_ROTATE_CCW") {
       autoRotationActive = true;
       autoRotationDirection = -1;
       motor1Moving = true;
-      motorOne.startRotate(-360);
+      trackedMove(AXIS_ROT, -STEPS_PER_REV);
       Serial.println("ACK:AUTO_ROTATE_CCW");
     }
     else if (command == "AUTO_ROTATE_STOP") {
@@ -300,6 +332,58 @@ void processSerialCommands() {
       Serial.println("ACK:AUTO_ROTATE_STOP");
     }
     
+    // Motion macros: absolute move and rotation sweep
+    else if (command.startsWith("GOTO ")) {
+      long x, y, deg;
+      if (parseTriple(command.substring(5), x, y, deg)) {
+        startGoto(x, y, deg);
+        Serial.println("ACK:GOTO");
+      } else {
+        Serial.println("ERROR:GOTO expects x,y,deg");
+      }
+    }
+    else if (command.startsWith("SWEEP")) {
+      String degrees = command.length() > 6 ? command.substring(6) : "90";
+      degrees.trim();
+      long deg = degrees.toInt();
+      // toInt() reads anything that is not a number as 0
+      if (deg == 0 && degrees != "0") {
+        Serial.println("ERROR:SWEEP expects degrees");
+      } else {
+        startSweep(deg);
+        Serial.println("ACK:SWEEP");
+      }
+    }
+    else if (command.startsWith("STEP ")) {
+      // Relative move of one axis (X, Y or R) by n steps, e.g. "STEP X,-40"
+      int comma = command.indexOf(',');
+      String axisName = command.substring(5, comma);
+      axisName.trim();
+      int axis = (axisName == "X") ? AXIS_X : (axisName == "Y") ? AXIS_Y : (axisName == "R") ? AXIS_ROT : -1;
+      if (comma < 0 || axis < 0) {
+        Serial.println("ERROR:STEP expects axis,n");
+      } else {
+        startStep(axis, command.substring(comma + 1).toInt());
+        Serial.println("ACK:STEP");
+      }
+    }
+    else if (command == "SET_HOME") {
+      stopAllMotors();
+      for (int i = 0; i < 3; i++) {
+        axisPosition[i] = 0;
+        axisSign[i] = 0;
+      }
+      Serial.println("ACK:SET_HOME");
+    }
+    else if (command == "POS") {
+      Serial.print("POS:");
+      Serial.print(currentPosition(AXIS_X));
+      Serial.print(",");
+      Serial.print(currentPosition(AXIS_Y));
+      Serial.print(",");
+      Serial.println(rotationDegrees());
+    }
+
     // Heartbeat (keeps connection alive)
     else if (command == "PING") {
       Serial.println("PONG");
@@ -329,7 +413,7 @@ void handleRotationEncoder() {
   
   if (abs(delta) > scaleOne) {
     int steps = (delta / scaleOne) * 50;
-    motorOne.move(steps);
+    trackedMoveBlocking(AXIS_ROT, steps);
     oldPosition[0] = newPosition;
   }
 }
@@ -340,7 +424,7 @@ void handleXAxisEncoder() {
   
   if (abs(delta) > scaleTwo) {
     int steps = (delta / scaleTwo) * 50;
-    motorTwo.move(steps);
+    trackedMoveBlocking(AXIS_X, steps);
     oldPosition[1] = newPosition;
   }
 }
@@ -351,7 +435,7 @@ void handleYAxisEncoder() {
   
   if (abs(delta) > scaleThree) {
     int steps = (delta / scaleThree) * 50;
-    motorThree.move(steps);
+    trackedMoveBlocking(AXIS_Y, steps);
     oldPosition[2] = newPosition;
   }
 }
@@ -388,16 +472,16 @@ void handleJoystickControl() {
   
   // X-axis control (horizontal movement)
   if (joyX < 400) {
-    motorTwo.move(-100);
+    trackedMoveBlocking(AXIS_X, -100);
   } else if (joyX > 600) {
-    motorTwo.move(100);
+    trackedMoveBlocking(AXIS_X, 100);
   }
   
   // Y-axis control (vertical movement)
   if (joyY < 400) {
-    motorThree.move(-100);
+    trackedMoveBlocking(AXIS_Y, -100);
   } else if (joyY > 600) {
-    motorThree.move(100);
+    trackedMoveBlocking(AXIS_Y, 100);
   }
 }
 
@@ -405,6 +489,8 @@ void handleJoystickControl() {
 // Utility Functions
 //---
 void stopAllMotors() {
+  macroState = MACRO_NONE;
+  setMacroAxes(false, false, false);
   motorOne.stop();
   motorTwo.stop();
   motorThree.stop();
@@ -415,3 +501,146 @@ void stopAllMotors() {
   motor2Direction = 0;
   motor3Direction = 0;
 }
+
+//---
+// Position Tracking
+//---
+// Fold the steps completed by the last tracked move into the axis position
+void foldPosition(int axis) {
+  axisPosition[axis] += axisSign[axis] * motors[axis]->getStepsCompleted();
+  axisSign[axis] = 0;
+}
+
+long currentPosition(int axis) {
+  return axisPosition[axis] + axisSign[axis] * motors[axis]->getStepsCompleted();
+}
+
+long rotationDegrees() {
+  long steps = currentPosition(AXIS_ROT) % STEPS_PER_REV;
+  if (steps < 0) steps += STEPS_PER_REV;
+  return steps * 360 / STEPS_PER_REV;
+}
+
+void trackedMove(int axis, long steps) {
+  foldPosition(axis);
+  axisSign[axis] = (steps >= 0) ? 1 : -1;
+  motors[axis]->startMove(steps);
+}
+
+void trackedMoveBlocking(int axis, long steps) {
+  foldPosition(axis);
+  axisSign[axis] = (steps >= 0) ? 1 : -1;
+  motors[axis]->move(steps);
+}
+
+//---
+// Motion Macros
+//---
+bool parseTriple(String args, long &a, long &b, long &c) {
+  int first = args.indexOf(',');
+  int second = args.indexOf(',', first + 1);
+  if (first < 0 || second < 0) {
+    return false;
+  }
+  a = args.substring(0, first).toInt();
+  b = args.substring(first + 1, second).toInt();
+  c = args.substring(second + 1).toInt();
+  return true;
+}
+
+void startGoto(long x, long y, long deg) {
+  autoRotationActive = false;
+  for (int i = 0; i < 3; i++) {
+    motors[i]->stop();
+  }
+
+  // Rotation takes the shortest way round to the requested angle
+  long target = ((deg % 360) + 360) % 360 * STEPS_PER_REV / 360;
+  long current = currentPosition(AXIS_ROT) % STEPS_PER_REV;
+  if (current < 0) current += STEPS_PER_REV;
+  long rotDelta = target - current;
+  if (rotDelta > STEPS_PER_REV / 2) rotDelta -= STEPS_PER_REV;
+  if (rotDelta < -STEPS_PER_REV / 2) rotDelta += STEPS_PER_REV;
+
+  trackedMove(AXIS_X, x - currentPosition(AXIS_X));
+  trackedMove(AXIS_Y, y - currentPosition(AXIS_Y));
+  trackedMove(AXIS_ROT, rotDelta);
+  motor1Moving = motor2Moving = motor3Moving = true;
+  setMacroAxes(true, true, true);
+  macroState = MACRO_GOTO;
+}
+
+void startSweep(long deg) {
+  autoRotationActive = false;
+  motorOne.stop();
+  sweepSteps = abs(deg) * STEPS_PER_REV / 360;
+  sweepStage = 0;
+  trackedMove(AXIS_ROT, sweepSteps / 2);
+  motor1Moving = true;
+  setMacroAxes(true, false, false);
+  macroState = MACRO_SWEEP;
+}
+
+void startStep(int axis, long steps) {
+  if (axis == AXIS_ROT) {
+    autoRotationActive = false;
+  }
+  motors[axis]->stop();
+  trackedMove(axis, steps);
+  if (axis == AXIS_ROT) motor1Moving = true;
+  if (axis == AXIS_X) motor2Moving = true;
+  if (axis == AXIS_Y) motor3Moving = true;
+  setMacroAxes(axis == AXIS_ROT, axis == AXIS_X, axis == AXIS_Y);
+  macroState = MACRO_STEP;
+}
+
+void setMacroAxes(bool rotation, bool x, bool y) {
+  macroAxis[AXIS_ROT] = rotation;
+  macroAxis[AXIS_X] = x;
+  macroAxis[AXIS_Y] = y;
+}
+
+// Release the axes the macro moved; other axes (e.g. auto-rotation during a STEP) carry on
+void releaseMacroAxes() {
+  if (macroAxis[AXIS_ROT]) motor1Moving = false;
+  if (macroAxis[AXIS_X]) motor2Moving = false;
+  if (macroAxis[AXIS_Y]) motor3Moving = false;
+  setMacroAxes(false, false, false);
+}
+
+void cancelMacro() {
+  if (macroState != MACRO_NONE) {
+    for (int i = 0; i < 3; i++) {
+      if (macroAxis[i]) motors[i]->stop();
+    }
+    releaseMacroAxes();
+    macroState = MACRO_NONE;
+    Serial.println("STATUS:MACRO_CANCELLED");
+  }
+}
+
+void updateMacro() {
+  // Only the macro's own axes count: a continuous auto-rotation never finishes
+  for (int i = 0; i < 3; i++) {
+    if (macroAxis[i] && motors[i]->getStepsRemaining()) {
+      return;
+    }
+  }
+
+  if (macroState == MACRO_SWEEP && sweepStage < 2) {
+    // Swing back across the full arc, then return to the start angle
+    sweepStage++;
+    trackedMove(AXIS_ROT, (sweepStage == 1) ? -sweepSteps : sweepSteps / 2);
+    return;
+  }
+
+  if (macroState == MACRO_GOTO) {
+    Serial.println("DONE:GOTO");
+  } else if (macroState == MACRO_SWEEP) {
+    Serial.println("DONE:SWEEP");
+  } else {
+    Serial.println("DONE:STEP");
+  }
+  macroState = MACRO_NONE;
+  releaseMacroAxes();
+}
@@ -37,6 +37,12 @@ if %errorLevel% neq 0 (
     exit /b 1
 )
 echo ✓ Dependencies installed
+
+REM Serve the Socket.IO client locally instead of from the internet
+python -m src.static_assets --fetch-vendor
+if %errorLevel% neq 0 (
+    echo WARNING: Could not download the Socket.IO client - phones will load it from the CDN
+)
 echo.
 
 echo [3/6] Creating recordings directory...
@@ -0,0 +1 @@
+# HARBOR Diamond Viewer - Benchmarks
@@ -0,0 +1,112 @@
+"""
+HARBOR Diamond Viewer - Async Mode Benchmark
+Runs the same Socket.IO workload against a server started in each
+HARBOR_ASYNC_MODE and compares event latency and server CPU time.
+
+Usage (Linux/macOS, run from the repository root):
+    python -m benchmarks.async_modes --clients 20 --duration 20
+    python -m benchmarks.async_modes --modes threading eventlet
+"""
+
+import argparse
+import importlib.util
+import os
+import threading
+import time
+
+import socketio
+
+from benchmarks.load_test import spawn_local_server
+from benchmarks.stats import LatencyRecorder, percentile
+from src.server_mode import ASYNC_MODES
+
+
+def client_loop(url, stats, rate, stop_event):
+    """Emit move/stop pairs at a fixed rate and record acknowledged round trips"""
+    sio = socketio.Client(reconnection=False)
+    try:
+        sio.connect(url, transports=['websocket'])
+        sio.call('arduino_connect', timeout=10)
+    except Exception:
+        stats.error('connect')
+        return
+
+    interval = 1.0 / rate
+    next_send = time.perf_counter()
+    axis = 'X'
+    while not stop_event.is_set():
+        for event, data in (('move_axis', {'axis': axis, 'direction': 1}), ('stop_axis', {'axis': axis})):
+            start = time.perf_counter()
+            try:
+                sio.call(event, data, timeout=5)
+                stats.record('event', time.perf_counter() - start)
+            except Exception:
+                stats.error('event')
+        axis = 'Y' if axis == 'X' else 'X'
+        next_send += interval
+        stop_event.wait(max(0.0, next_send - time.perf_counter()))
+    sio.disconnect()
+
+
+def run_mode(mode, clients, duration, rate, port):
+    sim, server, url = spawn_local_server(port, {'HARBOR_ASYNC_MODE': mode})
+    stats = LatencyRecorder()
+    stop_event = threading.Event()
+    threads = [threading.Thread(target=client_loop, args=(url, stats, rate, stop_event), daemon=True)
+               for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    stop_event.wait(duration)
+    stop_event.set()
+    for thread in threads:
+        thread.join(timeout=6)
+    elapsed = time.perf_counter() - start
+
+    # The server's CPU usage is only known once it has exited
+    server.terminate()
+    _, _, usage = os.wait4(server.pid, 0)
+    server.returncode = 0
+    sim.stop()
+
+    samples = stats.samples['event']
+    return {
+        'mode': mode,
+        'events': len(samples),
+        'errors': stats.errors['event'] + stats.errors['connect'],
+        'rate': len(samples) / elapsed,
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+        'cpu': usage.ru_utime + usage.ru_stime,
+        'cpu_per_1k': (usage.ru_utime + usage.ru_stime) / max(1, len(samples)) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', default=list(ASYNC_MODES), choices=ASYNC_MODES)
+    parser.add_argument('--clients', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per mode')
+    parser.add_argument('--rate', type=float, default=5.0, help='move/stop pairs per second per client')
+    parser.add_argument('--port', type=int, default=5056)
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes:
+        if mode != 'threading' and importlib.util.find_spec(mode) is None:
+            print(f"Skipping {mode}: not installed")
+            continue
+        print(f"Running {mode} ({args.clients} clients, {args.duration:.0f} s)...")
+        results.append(run_mode(mode, args.clients, args.duration, args.rate, args.port))
+
+    print(f"\n{'mode':<10}{'events':>8}{'errors':>8}{'per s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'cpu s':>8}{'cpu ms/1k':>11}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['events']:>8}{r['errors']:>8}{r['rate']:>9.1f}"
+              f"{r['p50'] * 1000:>9.2f}{r['p95'] * 1000:>9.2f}{r['p99'] * 1000:>9.2f}"
+              f"{r['cpu']:>8.2f}{r['cpu_per_1k'] * 1000:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+HARBOR Diamond Viewer - Socket.IO Load Test
+Opens N simulated phones against the web server and replays control.html
+touch patterns (hold-to-move, rotation taps, double-tap auto-rotation and the
+15 s heartbeat) while other workers hit /api/video/record and /api/share.
+
+By default a local server is spawned with a simulated Arduino and synthetic
+cameras (Linux/macOS). Point --url at a running kiosk to test real hardware.
+
+Usage (run from the repository root):
+    python -m benchmarks.load_test --clients 20 --duration 60
+    python -m benchmarks.load_test --url http://192.168.1.100:5000 --clients 5
+
+Needs the Socket.IO client extras: pip install "python-socketio[client]"
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.stats import LatencyRecorder
+
+
+def http_json(url, payload=None, timeout=10):
+    """GET (or POST JSON when payload is given), returns (status, body)"""
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b'{}')
+    except urllib.error.HTTPError as e:
+        return e.code, {}
+
+
+class PhoneClient:
+    """One simulated control.html session"""
+
+    def __init__(self, client_id, url, stats, heartbeat_interval, stop_event):
+        self.client_id = client_id
+        self.url = url
+        self.stats = stats
+        self.heartbeat_interval = heartbeat_interval
+        self.stop_event = stop_event
+        self.random = random.Random(client_id)
+        # Imported here so pytest can collect this module without the client extras
+        import socketio
+        self.sio = socketio.Client(reconnection=False)
+
+    def call(self, event, data=None):
+        """Emit with an acknowledgement and record the round trip"""
+        start = time.perf_counter()
+        try:
+            if data is None:
+                self.sio.call(event, timeout=5)
+            else:
+                self.sio.call(event, data, timeout=5)
+            self.stats.record(event, time.perf_counter() - start)
+        except Exception:
+            self.stats.error(event)
+
+    def hold(self, start_event, start_data, stop_event, stop_data):
+        # touchstart ... finger held ... touchend
+        self.call(start_event, start_data)
+        self.stop_event.wait(self.random.uniform(0.2, 1.5))
+        self.call(stop_event, stop_data)
+
+    def gesture(self):
+        roll = self.random.random()
+        if roll < 0.35:
+            axis = 'X'
+            self.hold('move_axis', {'axis': axis, 'direction': self.random.choice((1, -1))},
+                      'stop_axis', {'axis': axis})
+        elif roll < 0.65:
+            axis = 'Y'
+            self.hold('move_axis', {'axis': axis, 'direction': self.random.choice((1, -1))},
+                      'stop_axis', {'axis': axis})
+        elif roll < 0.9:
+            self.hold('rotate', {'direction': self.random.choice((1, -1))}, 'stop_rotation', None)
+        else:
+            # Double-tap: continuous rotation until the next single tap
+            self.call('auto_rotate', {'direction': self.random.choice((1, -1))})
+
+    def heartbeat_loop(self):
+        while not self.stop_event.wait(self.heartbeat_interval):
+            self.call('heartbeat')
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            self.sio.connect(self.url, transports=['websocket'])
+        except Exception:
+            self.stats.error('connect')
+            return
+        self.stats.record('connect', time.perf_counter() - start)
+        self.call('arduino_connect')
+
+        heartbeat = threading.Thread(target=self.heartbeat_loop, daemon=True)
+        heartbeat.start()
+        while not self.stop_event.is_set():
+            self.gesture()
+            # Think time between gestures while the customer looks at the stone
+            self.stop_event.wait(self.random.uniform(0.5, 3.0))
+
+        heartbeat.join(timeout=1)
+        self.sio.disconnect()
+
+
+def http_worker(url, stats, interval, stop_event, kind, recorded):
+    """Periodically start a recording or share one started earlier"""
+    rng = random.Random(kind)
+    while not stop_event.wait(rng.uniform(0.5, 1.5) * interval):
+        if kind == 'record':
+            session_id = f"load-{int(time.time() * 1000)}"
+            payload, endpoint = {'session_id': session_id}, '/api/video/record'
+        elif recorded:
+            # No address given, so the server logs the share instead of sending it
+            payload, endpoint = {'session_id': rng.choice(recorded), 'method': 'email'}, '/api/share'
+        else:
+            continue
+
+        start = time.perf_counter()
+        try:
+            status, _ = http_json(url + endpoint, payload)
+        except Exception:
+            stats.error(kind)
+            continue
+        stats.record(kind, time.perf_counter() - start)
+        if status >= 500:
+            stats.error(kind)
+        elif kind == 'record':
+            recorded.append(payload['session_id'])
+
+
+def spawn_local_server(port, extra_env=None):
+    """Start a simulated Arduino and a web server subprocess using it"""
+    from src.arduino_simulator import SimulatedArduino
+
+    sim = SimulatedArduino(ack_delay=0.002, jitter=0.001, seed=1)
+    sim_port = sim.start()
+    env = dict(os.environ, ARDUINO_PORT=sim_port, HARBOR_SYNTHETIC_CAMERAS='1',
+               HARBOR_WEB_PORT=str(port), **(extra_env or {}))
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen([sys.executable, 'web_server.py'], cwd=repo_root, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if http_json(f"{url}/api/status", timeout=1)[0] == 200:
+                return sim, server, url
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    sim.stop()
+    raise SystemExit("Web server did not start within 30 s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=60.0, help='seconds of load')
+    parser.add_argument('--heartbeat', type=float, default=15.0, help='heartbeat interval (s)')
+    parser.add_argument('--record-every', type=float, default=20.0, help='mean seconds between recordings (0 = off)')
+    parser.add_argument('--share-every', type=float, default=20.0, help='mean seconds between shares (0 = off)')
+    parser.add_argument('--url', help='existing server to test instead of spawning one')
+    parser.add_argument('--port', type=int, default=5055, help='port for the spawned server')
+    args = parser.parse_args()
+
+    sim = server = None
+    url = args.url
+    if not url:
+        sim, server, url = spawn_local_server(args.port)
+
+    stats = LatencyRecorder()
+    stop_event = threading.Event()
+    threads = [threading.Thread(target=PhoneClient(i, url, stats, args.heartbeat, stop_event).run, daemon=True)
+               for i in range(args.clients)]
+    recorded = []
+    for kind, interval in (('record', args.record_every), ('share', args.share_every)):
+        if interval > 0:
+            threads.append(threading.Thread(target=http_worker, daemon=True,
+                                            args=(url, stats, interval, stop_event, kind, recorded)))
+
+    print(f"Load test: {args.clients} clients for {args.duration:.0f} s against {url}")
+    start = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        stop_event.wait(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        for thread in threads:
+            thread.join(timeout=6)
+        elapsed = time.perf_counter() - start
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+        if sim:
+            sim.stop()
+
+    stats.report(elapsed)
+    if sim:
+        print(f"Serial commands received by simulator: {len(sim.commands)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+HARBOR Diamond Viewer - Serial Latency Benchmark
+Measures ArduinoController command round trips against the pty simulator.
+
+Usage (Linux/macOS, run from the repository root):
+    python -m benchmarks.serial_latency --count 500 --ack-delay 0.002 --jitter 0.002
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks.stats import percentile
+from src.arduino_controller import ArduinoController
+from src.arduino_simulator import SimulatedArduino
+
+
+COMMANDS = ["X_FORWARD", "X_STOP", "Y_UP", "Y_STOP", "ROTATE_CW", "ROTATE_STOP", "PING"]
+
+
+def wait_for_reply(connection, timeout):
+    """Read lines until an ACK/PONG/ERROR reply arrives, returns the line or None"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        line = connection.readline().decode('utf-8', errors='ignore').strip()
+        if line.startswith(("ACK:", "PONG", "ERROR:")):
+            return line
+    return None
+
+
+def run(count, baudrate, ack_delay, jitter, drop_rate, timeout):
+    sim = SimulatedArduino(baudrate=baudrate, ack_delay=ack_delay, jitter=jitter,
+                           drop_rate=drop_rate, seed=1)
+    port = sim.start()
+    controller = ArduinoController()
+    try:
+        if not controller.connect(port, baudrate=baudrate or 9600, reset_delay=0.1):
+            raise SystemExit(f"Could not connect to simulator on {port}")
+        wait_for_reply(controller.serial_connection, 0.5)  # PC_MODE reply
+        controller.serial_connection.timeout = timeout
+
+        send_times = []
+        round_trips = []
+        lost = 0
+        for i in range(count):
+            command = COMMANDS[i % len(COMMANDS)]
+            start = time.perf_counter()
+            controller.send_command(command)
+            sent = time.perf_counter()
+            reply = wait_for_reply(controller.serial_connection, timeout)
+            done = time.perf_counter()
+
+            send_times.append(sent - start)
+            if reply is None:
+                lost += 1
+            else:
+                round_trips.append(done - start)
+    finally:
+        controller.disconnect()
+        sim.stop()
+
+    print(f"Commands: {count}  replies: {len(round_trips)}  lost: {lost}  "
+          f"bytes dropped: {sim.bytes_dropped}")
+    for label, samples in (("send_command", send_times), ("round trip", round_trips)):
+        if not samples:
+            continue
+        print(f"{label:>12}: mean {statistics.mean(samples) * 1000:7.3f} ms  "
+              f"p50 {percentile(samples, 50) * 1000:7.3f} ms  "
+              f"p95 {percentile(samples, 95) * 1000:7.3f} ms  "
+              f"p99 {percentile(samples, 99) * 1000:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=200)
+    parser.add_argument('--baudrate', type=int, default=9600)
+    parser.add_argument('--ack-delay', type=float, default=0.001)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--drop-rate', type=float, default=0.0)
+    parser.add_argument('--timeout', type=float, default=0.5, help='seconds to wait for each reply')
+    args = parser.parse_args()
+    run(args.count, args.baudrate, args.ack_delay, args.jitter, args.drop_rate, args.timeout)
+
+
+if __name__ == '__main__':
+    main()
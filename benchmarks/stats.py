@@ -0,0 +1,48 @@
+"""
+HARBOR Diamond Viewer - Benchmark Statistics
+Latency sample collection and percentile reporting shared by the benchmarks
+"""
+
+import threading
+from collections import defaultdict
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class LatencyRecorder:
+    """Thread-safe per-label latency samples and error counts"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, label, seconds):
+        with self.lock:
+            self.samples[label].append(seconds)
+
+    def error(self, label):
+        with self.lock:
+            self.errors[label] += 1
+
+    def report(self, elapsed):
+        """Print one row per label: count, errors, throughput and latency percentiles"""
+        with self.lock:
+            labels = sorted(set(self.samples) | set(self.errors))
+            print(f"{'event':<16}{'count':>8}{'errors':>8}{'per s':>9}"
+                  f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+            for label in labels:
+                samples = self.samples[label]
+                print(f"{label:<16}{len(samples):>8}{self.errors[label]:>8}"
+                      f"{len(samples) / elapsed if elapsed else 0:>9.1f}"
+                      f"{percentile(samples, 50) * 1000:>10.2f}"
+                      f"{percentile(samples, 95) * 1000:>10.2f}"
+                      f"{percentile(samples, 99) * 1000:>10.2f}"
+                      f"{(max(samples) if samples else 0) * 1000:>10.2f}")
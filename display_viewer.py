@@ -5,37 +5,70 @@ Integrated with Flask web server for mobile control
 """
 
 import sys
-import cv2
 import socket
-import qrcode
+import multiprocessing
 import threading
+import time
 import os
 from io import BytesIO
+from src.startup_profile import profile
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                             QHBoxLayout, QLabel, QPushButton)
-from PyQt5.QtCore import QTimer, Qt
-from PyQt5.QtGui import QImage, QPixmap, QFont
+                             QHBoxLayout, QLabel, QPushButton, QSplashScreen)
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap, QFont, QPainter, QColor, QLinearGradient
+from src.log import configure_logging, get_logger
+from src import metrics
+from src.frame_hub import hub
+from src.camera_health import camera_health
 
-# Import web server to run in background
-try:
-    from web_server import start_web_server
-    WEB_SERVER_AVAILABLE = True
-except ImportError:
-    WEB_SERVER_AVAILABLE = False
-    print("Warning: web_server.py not found - mobile control will not be available")
+# cv2, qrcode and the web server (Flask, SocketIO, pyserial) are imported
+# lazily, after the splash is on screen, to keep the black screen at boot short
+
+configure_logging()
+logger = get_logger('display')
+
+# Must match the web server's port (web_server.py reads the same variable)
+WEB_PORT = int(os.getenv('HARBOR_WEB_PORT', '5000'))
+QR_SIZE = 300
+# A camera is released and opened again after this many failed reads in a row (~1 s at 30 fps)
+REOPEN_AFTER_FAILURES = int(os.getenv('HARBOR_CAMERA_REOPEN_FAILURES', '30'))
+REOPEN_RETRY_MS = 5000
+# Lets QImage wrap OpenCV's BGR frames directly (Qt 5.14+)
+BGR888 = getattr(QImage, 'Format_BGR888', None)
 
 
 class CameraWidget(QWidget):
     """Widget for displaying camera feed"""
     
+    # Emitted by the opening thread; Qt delivers it on the GUI thread
+    camera_opened = pyqtSignal(object, str)
+    
     def __init__(self, camera_index=0, title="Camera"):
         super().__init__()
         self.camera_index = camera_index
         self.title = title
         self.camera = None
         
+        # Achieved frame rate, published to /metrics and /api/cameras once per second
+        self.fps_frames = 0
+        self.fps_window_start = time.monotonic()
+        self.frames_metric = metrics.CAMERA_FRAMES.labels(camera=title)
+        self.failures_metric = metrics.CAMERA_READ_FAILURES.labels(camera=title)
+        self.read_metric = metrics.CAMERA_READ_SECONDS.labels(camera=title)
+        self.fps_metric = metrics.CAMERA_FPS.labels(camera=title)
+        self.duplicates_metric = metrics.CAMERA_DUPLICATES.labels(camera=title)
+        self.reopens_metric = metrics.CAMERA_REOPENS.labels(camera=title)
+        # Read latency, failures, repeated frames (also served at /api/cameras)
+        self.health = camera_health(title)
+        self.reopening = False
+        
+        self.first_frame_shown = False
+        self.enhancer = None
+        
         self.init_ui()
-        self.init_camera()
+        self.camera_opened.connect(self.on_camera_opened)
+        self.show_message("Starting camera...")
+        threading.Thread(target=self.init_camera, daemon=True).start()
         
     def init_ui(self):
         """Initialize the UI components"""
@@ -49,39 +82,188 @@ class CameraWidget(QWidget):
         self.camera_label.setScaledContents(True)
         layout.addWidget(self.camera_label)
         
+        # Frame health overlay (D key), floating over the top-left of the picture
+        self.diagnostics_label = QLabel(self)
+        self.diagnostics_label.move(10, 10)
+        self.diagnostics_label.hide()
+        self.diagnostics_timer = QTimer()
+        self.diagnostics_timer.timeout.connect(self.update_diagnostics)
+        
         # Timer for updating frames
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
         
     def init_camera(self):
-        """Initialize camera capture"""
+        """Open the camera on a worker thread (a USB camera can take seconds to open)"""
+        with profile.phase(f'camera{self.camera_index}_open'):
+            camera, error = self.open_camera()
         try:
-            self.camera = cv2.VideoCapture(self.camera_index)
-            if self.camera.isOpened():
-                self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-                self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-                self.timer.start(33)  # ~30 FPS
-            else:
-                self.show_error(f"Camera {self.camera_index} not available")
+            from src.enhance import chain_from_env
+            self.enhancer = chain_from_env()
+        except ValueError as e:
+            logger.error(f"Image enhancement disabled: {e}")
+        self.camera_opened.emit(camera, error)
+    
+    def open_camera(self, restart=False):
+        """(camera, error message) - runs on a worker thread"""
+        camera, error = None, ''
+        try:
+            import cv2  # load it off the GUI thread; update_frame then finds it cached
+            from src.camera import open_capture
+            # Opens in the camera's profiled mode (python -m src.camera_profiles)
+            camera = open_capture(self.camera_index, restart)
+            if not camera.isOpened():
+                error = f"Camera {self.camera_index} not available"
         except Exception as e:
-            self.show_error(f"Error opening camera: {str(e)}")
+            error = f"Error opening camera: {str(e)}"
+        return camera, error
+    
+    def reopen_camera(self):
+        """Release a camera that keeps failing and open it again on a worker thread"""
+        failures = self.health.consecutive_failures
+        self.timer.stop()
+        if self.camera:
+            self.camera.release()
+            self.camera = None
+        self.reopening = True
+        self.health.record_reopen()
+        self.reopens_metric.inc()
+        logger.warning(f"{self.title}: {failures} failed reads in a row - reopening camera {self.camera_index}")
+        self.show_message("Reconnecting camera...")
+        # A camera process is stopped and started again, not just read afresh
+        threading.Thread(target=lambda: self.camera_opened.emit(*self.open_camera(restart=True)), daemon=True).start()
+    
+    def on_camera_opened(self, camera, error):
+        """Start displaying once the worker thread has opened the camera"""
+        if error:
+            if camera:
+                camera.release()
+            if self.reopening:
+                self.show_error(f"{error} - retrying")
+                QTimer.singleShot(REOPEN_RETRY_MS, self.reopen_camera)
+                return
+            self.show_error(error)
+            profile.mark(f'camera{self.camera_index}_ready')
+            return
+        self.reopening = False
+        self.camera = camera
+        self.camera_label.setStyleSheet("background-color: #000000;")
+        self.timer.start(33)  # ~30 FPS
     
     def update_frame(self):
         """Update camera frame"""
-        if self.camera and self.camera.isOpened():
-            ret, frame = self.camera.read()
-            if ret:
-                # Convert BGR to RGB
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if self.camera and not self.camera.isOpened():
+            # A camera process that died: count it like a failed read so the camera is reopened
+            self.read_failed(0.0)
+        elif self.camera:
+            import cv2  # already loaded by the opening thread, this is a cache lookup
+            shared = hasattr(self.camera, 'read_new')
+            started = time.perf_counter()
+            if shared:
+                # Camera process: take the newest frame without waiting. Nothing new counts as a failed
+                # read only if the process reported one, or no frame has come for a few frame periods.
+                seq, frame = self.camera.read_new()
+                if frame is None:
+                    if self.camera.stalled():
+                        self.read_failed(0.0)
+                    return
+                # Copy out of the ring: the frame is published to the hub and may be recorded long after
+                # the camera process reuses its slot
+                frame = frame.copy()
+                if not self.camera.ring.intact(seq):
+                    return  # the camera process overwrote the slot while we copied it
+                ret = True
+            else:
+                ret, frame = self.camera.read()
+            elapsed = time.perf_counter() - started
+            self.read_metric.observe(elapsed)
+            if not ret:
+                self.read_failed(elapsed)
+            else:
+                if self.health.record_read(elapsed, frame) == 'duplicate':
+                    self.duplicates_metric.inc()
+                self.frames_metric.inc()
+                # Raw frame for vision routines (autofocus); it must not change after this
+                hub.publish(self.camera_index, frame)
+                if self.enhancer:
+                    frame = self.enhancer.process(frame, in_place=False)
+                if BGR888 is None:
+                    # Qt < 5.14 has no BGR format: convert BGR to RGB
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 
-                # Convert to QImage
+                # Convert to QImage (wraps the frame's memory, no copy)
                 h, w, ch = frame.shape
                 bytes_per_line = ch * w
-                qt_image = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
+                qt_image = QImage(frame.data, w, h, bytes_per_line,
+                                  BGR888 if BGR888 is not None else QImage.Format_RGB888)
                 
-                # Display in label
+                # Display in label (fromImage copies the pixels out of the frame)
                 pixmap = QPixmap.fromImage(qt_image)
                 self.camera_label.setPixmap(pixmap)
+                self.count_frame()
+                if not self.first_frame_shown:
+                    self.first_frame_shown = True
+                    profile.mark(f'camera{self.camera_index}_ready')
+    
+    def read_failed(self, elapsed):
+        """Count a failed read; reopen the camera after REOPEN_AFTER_FAILURES in a row"""
+        self.failures_metric.inc()
+        self.health.record_read(elapsed, None)
+        if self.health.consecutive_failures >= REOPEN_AFTER_FAILURES:
+            self.reopen_camera()
+    
+    def count_frame(self):
+        """Track achieved fps and publish it when the one-second window closes"""
+        self.fps_frames += 1
+        elapsed = time.monotonic() - self.fps_window_start
+        if elapsed >= 1.0:
+            self.fps_metric.set(round(self.fps_frames / elapsed, 1))
+            self.health.record_fps(round(self.fps_frames / elapsed, 1))
+            self.fps_frames = 0
+            self.fps_window_start = time.monotonic()
+    
+    def set_diagnostics_visible(self, visible):
+        """Show or hide the frame health overlay"""
+        if visible:
+            self.update_diagnostics()
+            self.diagnostics_label.show()
+            self.diagnostics_label.raise_()
+            self.diagnostics_timer.start(500)
+        else:
+            self.diagnostics_timer.stop()
+            self.diagnostics_label.hide()
+    
+    def update_diagnostics(self):
+        """Refresh the overlay; red while frames fail or have stopped changing"""
+        health = self.health.summary()
+        read_ms = {name: '-' if value is None else f"{value:.1f}" for name, value in health['read_ms'].items()}
+        since = health['since_last_good']
+        lines = [
+            f"{self.title} (camera {self.camera_index})   {health['fps']:.1f} fps",
+            f"read ms   p50 {read_ms['p50']}   p95 {read_ms['p95']}   p99 {read_ms['p99']}   max {read_ms['max']}",
+            f"failed reads {health['failures']} ({health['consecutive_failures']} in a row)   "
+            f"repeated frames {health['duplicates']}   reopens {health['reopens']}",
+            "no frame yet" if since is None else f"last new frame {since:.1f} s ago",
+        ]
+        healthy = since is not None and since < 1.0 and not health['consecutive_failures']
+        self.diagnostics_label.setText('\n'.join(lines))
+        self.diagnostics_label.setStyleSheet(f"""
+            background-color: rgba(0, 0, 0, 180);
+            color: {'#69f0ae' if healthy else '#ff5252'};
+            font-family: Consolas, monospace;
+            font-size: 13px;
+            padding: 8px;
+        """)
+        self.diagnostics_label.adjustSize()
+    
+    def show_message(self, message):
+        """Show a neutral placeholder while the camera starts"""
+        self.camera_label.setText(f"{self.title}\n\n{message}")
+        self.camera_label.setStyleSheet("""
+            background-color: #000000;
+            color: #9e9e9e;
+            font-size: 16px;
+        """)
     
     def show_error(self, message):
         """Show error message"""
@@ -95,6 +277,7 @@ class CameraWidget(QWidget):
     
     def cleanup(self):
         """Release camera resources"""
+        self.diagnostics_timer.stop()
         if self.timer.isActive():
             self.timer.stop()
         if self.camera:
@@ -102,10 +285,87 @@ class CameraWidget(QWidget):
             self.camera = None
 
 
+def detect_local_ip():
+    """Get the local IP address of this machine"""
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.connect(("8.8.8.8", 80))
+        ip = s.getsockname()[0]
+        s.close()
+        return ip
+    except:
+        return "127.0.0.1"
+
+
+def page_url(ip, path):
+    return f"http://{ip}:{WEB_PORT}{path}"
+
+
+def render_qr_png(url):
+    """QR code for a URL as PNG bytes (no Qt, safe on any thread)"""
+    import qrcode
+    qr = qrcode.QRCode(version=1, box_size=10, border=4)
+    qr.add_data(url)
+    qr.make(fit=True)
+    
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class NetworkWatcher(QObject):
+    """Polls the local IP on a background thread and pre-renders QR codes when it changes"""
+    
+    # (new ip, {url: png bytes}); delivered on the GUI thread
+    network_changed = pyqtSignal(str, object)
+    
+    def __init__(self, paths, interval=5.0):
+        super().__init__()
+        self.paths = list(paths)
+        self.interval = interval
+        self.ip = None
+        self.stopped = threading.Event()
+    
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+    
+    def stop(self):
+        self.stopped.set()
+    
+    def run(self):
+        while not self.stopped.is_set():
+            ip = detect_local_ip()
+            if ip != self.ip:
+                try:
+                    rendered = {page_url(ip, path): render_qr_png(page_url(ip, path))
+                                for path in self.paths}
+                except Exception as e:
+                    logger.warning(f"Could not pre-render QR codes: {e}")
+                    rendered = {}
+                self.ip = ip
+                self.network_changed.emit(ip, rendered)
+            self.stopped.wait(self.interval)
+
+
 class DisplayViewer(QMainWindow):
-    def __init__(self):
+    def __init__(self, station=None, screen=None):
         super().__init__()
-        self.setWindowTitle("HARBOR Diamond Viewer")
+        from src.stations import DEFAULT_STATION, page_path
+        
+        # One window per station (stations.json); each shows its own cameras and QR codes
+        station = station or {'id': DEFAULT_STATION}
+        self.station_id = station['id']
+        self.top_camera_index = int(station.get('top_camera', 0))
+        self.side_camera_index = int(station.get('side_camera', 1))
+        self.control_path = page_path(self.station_id, 'control')
+        self.share_path = page_path(self.station_id, 'share')
+        # Camera titles label the fps status and metrics, so they must be unique across stations
+        self.title_prefix = '' if self.station_id == DEFAULT_STATION else f"{station.get('name', self.station_id)} "
+        
+        self.setWindowTitle(f"HARBOR Diamond Viewer {self.title_prefix}".strip())
+        if screen is not None:
+            self.move(screen.geometry().topLeft())
         self.showFullScreen()
         
         self.camera_top = None
@@ -114,10 +374,20 @@ class DisplayViewer(QMainWindow):
         # QR code visibility states
         self.control_qr_visible = False
         self.share_qr_visible = False
+        self.diagnostics_visible = False
+        
+        # Rendered QR overlays keyed by (url, title, size); cleared when the IP changes
+        self.local_ip = None
+        self.qr_png = {}
+        self.qr_cache = {}
         
         self.init_ui()
         self.init_cameras()
         
+        self.network_watcher = NetworkWatcher((self.control_path, self.share_path))
+        self.network_watcher.network_changed.connect(self.on_network_changed)
+        self.network_watcher.start()
+        
     def init_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -138,11 +408,11 @@ class DisplayViewer(QMainWindow):
         camera_layout.setSpacing(2)
         
         # Top camera
-        self.top_camera_widget = CameraWidget(0, "Top View")
+        self.top_camera_widget = CameraWidget(self.top_camera_index, f"{self.title_prefix}Top View")
         camera_layout.addWidget(self.top_camera_widget)
         
         # Side camera
-        self.side_camera_widget = CameraWidget(1, "Girdle View")
+        self.side_camera_widget = CameraWidget(self.side_camera_index, f"{self.title_prefix}Girdle View")
         camera_layout.addWidget(self.side_camera_widget)
         
         main_layout.addWidget(camera_container)
@@ -257,40 +527,44 @@ class DisplayViewer(QMainWindow):
         self.side_camera_widget.update_frame()
         
     def get_local_ip(self):
-        """Get the local IP address of this machine"""
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
-            s.close()
-            return ip
-        except:
-            return "127.0.0.1"
-    
-    def generate_qr_code(self, url, title):
-        """Generate QR code image for given URL"""
-        qr = qrcode.QRCode(version=1, box_size=10, border=4)
-        qr.add_data(url)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert PIL image to QPixmap
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
-        
+        """Local IP address of this machine (kept current by the network watcher)"""
+        if self.local_ip is None:
+            self.local_ip = detect_local_ip()
+        return self.local_ip
+    
+    def on_network_changed(self, ip, rendered):
+        """The IP changed: drop cached QR codes and refresh any that are showing"""
+        logger.info(f"Local IP is now {ip} - refreshing QR codes")
+        self.local_ip = ip
+        self.qr_png = dict(rendered)
+        self.qr_cache.clear()
+        if self.control_qr_visible:
+            self.control_qr_overlay.setPixmap(self.qr_pixmap(self.control_path, "Scan to Control"))
+        if self.share_qr_visible:
+            self.share_qr_overlay.setPixmap(self.qr_pixmap(self.share_path, "Scan to Receive Video"))
+    
+    def qr_pixmap(self, path, title):
+        """Overlay pixmap for a page, rendered once per (URL, size)"""
+        url = page_url(self.get_local_ip(), path)
+        key = (url, title, QR_SIZE)
+        pixmap = self.qr_cache.get(key)
+        if pixmap is None:
+            png = self.qr_png.get(url) or render_qr_png(url)
+            pixmap = self.qr_cache[key] = self.generate_qr_code(png, title)
+        return pixmap
+    
+    def generate_qr_code(self, png, title):
+        """Compose a QR code PNG and its title into an overlay pixmap"""
         qimage = QImage()
-        qimage.loadFromData(buffer.read())
+        qimage.loadFromData(png)
         
         # Create pixmap with text
-        pixmap = QPixmap.fromImage(qimage).scaled(300, 300, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        pixmap = QPixmap.fromImage(qimage).scaled(QR_SIZE, QR_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
         
         # Add title text
         label_pixmap = QPixmap(350, 380)
         label_pixmap.fill(Qt.transparent)
         
-        from PyQt5.QtGui import QPainter
         painter = QPainter(label_pixmap)
         painter.drawPixmap(25, 0, pixmap)
         
@@ -301,22 +575,21 @@ class DisplayViewer(QMainWindow):
         
         return label_pixmap
     
+    def position_qr_overlays(self):
+        """Place the control QR bottom-left and the share QR bottom-right"""
+        overlay_width = 390
+        overlay_height = 420
+        y = self.height() - overlay_height - 20
+        self.control_qr_overlay.setGeometry(20, y, overlay_width, overlay_height)
+        self.share_qr_overlay.setGeometry(self.width() - overlay_width - 20, y, overlay_width, overlay_height)
+    
     def toggle_control_qr(self):
         """Toggle control QR code visibility"""
         self.control_qr_visible = not self.control_qr_visible
         
         if self.control_qr_visible:
-            ip = self.get_local_ip()
-            url = f"http://{ip}:5000/control"
-            pixmap = self.generate_qr_code(url, "Scan to Control")
-            self.control_qr_overlay.setPixmap(pixmap)
-            
-            # Position in bottom-left corner
-            overlay_width = 390
-            overlay_height = 420
-            x = 20
-            y = self.height() - overlay_height - 20
-            self.control_qr_overlay.setGeometry(x, y, overlay_width, overlay_height)
+            self.control_qr_overlay.setPixmap(self.qr_pixmap(self.control_path, "Scan to Control"))
+            self.position_qr_overlays()
             self.control_qr_overlay.show()
             self.control_qr_overlay.raise_()
             
@@ -356,17 +629,8 @@ class DisplayViewer(QMainWindow):
         self.share_qr_visible = not self.share_qr_visible
         
         if self.share_qr_visible:
-            ip = self.get_local_ip()
-            url = f"http://{ip}:5000/share"
-            pixmap = self.generate_qr_code(url, "Scan to Receive Video")
-            self.share_qr_overlay.setPixmap(pixmap)
-            
-            # Position in bottom-right corner
-            overlay_width = 390
-            overlay_height = 420
-            x = self.width() - overlay_width - 20
-            y = self.height() - overlay_height - 20
-            self.share_qr_overlay.setGeometry(x, y, overlay_width, overlay_height)
+            self.share_qr_overlay.setPixmap(self.qr_pixmap(self.share_path, "Scan to Receive Video"))
+            self.position_qr_overlays()
             self.share_qr_overlay.show()
             self.share_qr_overlay.raise_()
             
@@ -404,13 +668,9 @@ class DisplayViewer(QMainWindow):
     def resizeEvent(self, event):
         """Handle window resize to reposition QR codes"""
         super().resizeEvent(event)
-        # Safety check: only reposition if QR visibility flags exist
-        if hasattr(self, 'control_qr_visible') and self.control_qr_visible:
-            self.toggle_control_qr()
-            self.toggle_control_qr()
-        if hasattr(self, 'share_qr_visible') and self.share_qr_visible:
-            self.toggle_share_qr()
-            self.toggle_share_qr()
+        # showFullScreen() in __init__ resizes before the overlays exist
+        if hasattr(self, 'share_qr_overlay'):
+            self.position_qr_overlays()
     
     def keyPressEvent(self, a0):
         """Handle keyboard shortcuts"""
@@ -421,31 +681,103 @@ class DisplayViewer(QMainWindow):
                 self.showNormal()
             else:
                 self.showFullScreen()
+        elif a0.key() == Qt.Key_D:
+            self.diagnostics_visible = not self.diagnostics_visible
+            self.top_camera_widget.set_diagnostics_visible(self.diagnostics_visible)
+            self.side_camera_widget.set_diagnostics_visible(self.diagnostics_visible)
     
     def closeEvent(self, a0):
         """Cleanup on close"""
-        self.top_camera_widget.release()
-        self.side_camera_widget.release()
+        self.network_watcher.stop()
+        self.top_camera_widget.cleanup()
+        self.side_camera_widget.cleanup()
         
         # Web server will automatically stop when main thread exits
-        print("Shutting down HARBOR Diamond Viewer...")
+        logger.info("Shutting down HARBOR Diamond Viewer...")
+
+
+def branded_splash_pixmap(width=640, height=360):
+    """Harbor-branded frame shown while the viewer starts"""
+    pixmap = QPixmap(width, height)
+    painter = QPainter(pixmap)
+    gradient = QLinearGradient(0, 0, width, 0)
+    gradient.setColorAt(0, QColor("#1a1a1a"))
+    gradient.setColorAt(1, QColor("#2d2d2d"))
+    painter.fillRect(0, 0, width, height, gradient)
+    
+    painter.setPen(Qt.white)
+    painter.setFont(QFont("Arial", 40, QFont.Bold))
+    painter.drawText(0, 0, width, height - 40, Qt.AlignCenter, "HARBOR")
+    
+    # Colored squares accent, as in the header
+    for i, color in enumerate(["#E91E63", "#9C27B0", "#2196F3"]):
+        painter.fillRect(width // 2 - 34 + i * 24, height // 2 + 10, 16, 16, QColor(color))
+    
+    painter.setPen(QColor("#9e9e9e"))
+    painter.setFont(QFont("Arial", 14))
+    painter.drawText(0, height // 2 + 40, width, 40, Qt.AlignCenter, "Diamond Viewer")
+    painter.end()
+    return pixmap
+
+
+def run_web_server():
+    """Import and start the web server off the GUI thread"""
+    # eventlet's monkey-patching does not mix with the Qt event loop: serve on real threads here
+    os.environ.setdefault('HARBOR_ASYNC_MODE', 'threading')
+    try:
+        with profile.phase('web_server_import'):
+            from web_server import start_web_server
+    except ImportError as e:
+        logger.warning(f"web_server.py could not be imported ({e}) - mobile control will not be available")
+        profile.mark('web_server_ready')
+        return
+    # The display holds the cameras; the server's recorder follows the frames it publishes
+    start_web_server(own_cameras=False)
 
 
 def main():
-    # Start web server in background thread
-    if WEB_SERVER_AVAILABLE:
-        web_server_thread = threading.Thread(target=start_web_server, daemon=True)
-        web_server_thread.start()
-        print("✓ Web server started in background")
-    else:
-        print("⚠ Web server not available - mobile control disabled")
-    
-    # Start PyQt5 display application
-    app = QApplication(sys.argv)
-    viewer = DisplayViewer()
-    viewer.show()
+    profile.mark('main_entered')
+    
+    # Splash first; cameras and the web server start behind it in parallel
+    with profile.phase('qt_init'):
+        app = QApplication(sys.argv)
+    splash = QSplashScreen(branded_splash_pixmap())
+    splash.show()
+    splash.showMessage("Starting cameras and mobile control...", Qt.AlignBottom | Qt.AlignHCenter, Qt.white)
+    app.processEvents()
+    profile.mark('splash_shown')
+    
+    from src.stations import load_station_configs
+    try:
+        stations = load_station_configs()
+    except ValueError as e:
+        logger.error(f"Invalid station configuration: {e}")
+        sys.exit(1)
+    
+    profile.expect(*[f'camera{int(station.get(key, default))}_ready'
+                     for station in stations for key, default in (('top_camera', 0), ('side_camera', 1))],
+                   'web_server_ready')
+    threading.Thread(target=run_web_server, daemon=True).start()
+    logger.info("Web server starting in background")
+    
+    # One fullscreen window per station, each on its own screen while there are enough
+    screens = app.screens()
+    with profile.phase('viewer_ui'):
+        viewers = []
+        for i, station in enumerate(stations):
+            viewer = DisplayViewer(station, screens[i] if i < len(screens) else None)
+            viewer.show()
+            viewers.append(viewer)
+    splash.finish(viewers[0])
+    profile.mark('window_shown')
+    
+    # Log whatever was reached if a camera or the server never comes up
+    QTimer.singleShot(30000, profile.report)
     sys.exit(app.exec_())
 
 
 if __name__ == "__main__":
+    # Camera processes (HARBOR_CAMERA_PROCESSES) are spawned: in the PyInstaller
+    # executable each child re-runs this file and must stop here, not open a window
+    multiprocessing.freeze_support()
     main()
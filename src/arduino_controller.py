@@ -1,22 +1,38 @@
+import logging
 import serial
 import serial.tools.list_ports
+import threading
 import time
+from src.log import get_logger, log_event
+from src import metrics
+
+logger = get_logger('serial')
+# Per-command logs have their own logger so they can be silenced in production
+command_logger = get_logger('serial.commands')
 
 class ArduinoController:
-    def __init__(self):
+    def __init__(self, blocking_io=None):
         self.serial_connection = None
         self.connected = False
+        # Handlers, the watchdog and macros write from different threads
+        self.write_lock = threading.Lock()
+        self.read_lock = threading.Lock()
+        # Under eventlet/gevent, serial I/O and these (real) locks run on a thread pool (src/server_mode.py)
+        self.blocking_io = blocking_io or (lambda fn, *args: fn(*args))
         
-    def connect(self, port, baudrate=9600):
+    def connect(self, port, baudrate=9600, reset_delay=2.0):
+        return self.blocking_io(self._connect, port, baudrate, reset_delay)
+    
+    def _connect(self, port, baudrate, reset_delay):
         try:
             self.serial_connection = serial.Serial(port, baudrate, timeout=1)
-            time.sleep(2)
+            time.sleep(reset_delay)  # Leonardo resets when the port opens
             self.connected = True
             
             # Clear any startup messages
             while self.serial_connection.in_waiting > 0:
                 msg = self.serial_connection.readline().decode('utf-8').strip()
-                print(f"Arduino startup: {msg}")
+                log_event(logger, logging.INFO, "Arduino startup", line=msg)
             
             self.send_command("PC_MODE")
             time.sleep(0.2)
@@ -24,11 +40,12 @@ class ArduinoController:
             # Read response
             if self.serial_connection.in_waiting > 0:
                 response = self.serial_connection.readline().decode('utf-8').strip()
-                print(f"Arduino response: {response}")
+                log_event(logger, logging.INFO, "Arduino response", response=response)
             
             return True
         except Exception as e:
-            print(f"Failed to connect to Arduino: {e}")
+            metrics.SERIAL_ERRORS.labels(kind='connect').inc()
+            log_event(logger, logging.ERROR, "Failed to connect to Arduino", port=port, error=e)
             self.connected = False
             if self.serial_connection:
                 try:
@@ -39,6 +56,9 @@ class ArduinoController:
             return False
     
     def disconnect(self):
+        self.blocking_io(self._disconnect)
+    
+    def _disconnect(self):
         if self.serial_connection and self.serial_connection.is_open:
             self.send_command("MANUAL_MODE")
             time.sleep(0.1)
@@ -51,16 +71,26 @@ class ArduinoController:
     def send_command(self, command):
         if self.is_connected():
             try:
-                self.serial_connection.write(f"{command}\n".encode())
-                print(f"Sent command: {command}")
+                started = time.perf_counter()
+                self.blocking_io(self._write, f"{command}\n".encode())
+                metrics.SERIAL_WRITE_SECONDS.observe(time.perf_counter() - started)
+                # Label by verb only (GOTO 120,0,90 -> GOTO) to keep the series count bounded
+                metrics.SERIAL_COMMANDS.labels(command=command.split(' ', 1)[0]).inc()
+                log_event(command_logger, logging.DEBUG, "Sent command", command=command)
                 return True
             except Exception as e:
-                print(f"Error sending command: {e}")
+                metrics.SERIAL_ERRORS.labels(kind='write').inc()
+                log_event(logger, logging.ERROR, "Error sending command", command=command, error=e)
                 return False
         else:
-            print(f"Cannot send '{command}' - not connected")
+            metrics.SERIAL_ERRORS.labels(kind='not_connected').inc()
+            log_event(command_logger, logging.WARNING, "Cannot send command - not connected", command=command)
         return False
     
+    def _write(self, data):
+        with self.write_lock:
+            self.serial_connection.write(data)
+    
     def move_axis(self, axis, direction):
         if axis == 'X':
             if direction > 0:
@@ -88,6 +118,12 @@ class ArduinoController:
     def stop_rotation(self):
         self.send_command("ROTATE_STOP")
     
+    def stop_all(self):
+        """Stop every axis, including auto-rotation"""
+        self.stop_axis('X')
+        self.stop_axis('Y')
+        self.stop_rotation()
+    
     def auto_rotate(self, direction):
         """Start continuous auto-rotation (triggered by double-tap)"""
         if direction > 0:
@@ -99,6 +135,57 @@ class ArduinoController:
         """Stop auto-rotation"""
         self.send_command("AUTO_ROTATE_STOP")
     
+    def goto(self, x, y, theta):
+        """Move all axes to an absolute position on-device (X/Y in steps, rotation in degrees)"""
+        return self.send_command(f"GOTO {int(x)},{int(y)},{int(theta)}")
+    
+    def sweep(self, degrees=90):
+        """Swing the turntable back and forth across an arc centred on the current angle"""
+        return self.send_command(f"SWEEP {int(degrees)}")
+    
+    def set_home(self):
+        """Make the current position the origin for GOTO and presets"""
+        return self.send_command("SET_HOME")
+    
+    def step_axis(self, axis, steps, wait=True, timeout=2.0):
+        """Relative move of one axis ('X', 'Y' or 'R') by `steps`; optionally wait for DONE:STEP"""
+        if not self.send_command(f"STEP {axis},{int(steps)}"):
+            return False
+        if not wait:
+            return True
+        return self.read_until("DONE:STEP", timeout) is not None
+    
+    def query_position(self, timeout=1.0):
+        """Ask the firmware for its tracked position, returns {'x', 'y', 'theta'} or None"""
+        if not self.send_command("POS"):
+            return None
+        
+        line = self.read_until("POS:", timeout)
+        if line is None:
+            return None
+        try:
+            x, y, theta = (int(v) for v in line[4:].split(','))
+        except ValueError:
+            return None
+        return {'x': x, 'y': y, 'theta': theta}
+    
+    def read_until(self, prefix, timeout=1.0):
+        """Read replies until one starts with `prefix`; returns that line or None on timeout"""
+        return self.blocking_io(self._read_until, prefix, timeout)
+    
+    def _read_until(self, prefix, timeout):
+        deadline = time.time() + timeout
+        try:
+            with self.read_lock:
+                while time.time() < deadline:
+                    line = self.serial_connection.readline().decode('utf-8', errors='ignore').strip()
+                    if line.startswith(prefix):
+                        return line
+        except Exception as e:
+            metrics.SERIAL_ERRORS.labels(kind='read').inc()
+            log_event(logger, logging.ERROR, "Error reading from Arduino", expected=prefix, error=e)
+        return None
+    
     def set_lighting(self, intensity):
         """Lighting control (for future hardware integration)"""
         pass
@@ -110,20 +197,20 @@ class ArduinoController:
         return [port.device for port in ports]
     
     @staticmethod
-    def find_arduino_port():
-        """Auto-detect Arduino COM port by searching for Arduino devices"""
-        ports = serial.tools.list_ports.comports()
+    def find_arduino_port(exclude=()):
+        """Auto-detect Arduino COM port by searching for Arduino devices (skipping `exclude`)"""
+        ports = [port for port in serial.tools.list_ports.comports() if port.device not in exclude]
         
         # Look for Arduino in the port description
         for port in ports:
             # Check if port description contains "Arduino" or "Mega"
             if port.description and ('Arduino' in port.description or 'Mega' in port.description):
-                print(f"Found Arduino: {port.device} - {port.description}")
+                log_event(logger, logging.INFO, "Found Arduino", port=port.device, description=port.description)
                 return port.device
             # Also check manufacturer
             if port.manufacturer and 'Arduino' in port.manufacturer:
-                print(f"Found Arduino: {port.device} - {port.manufacturer}")
+                log_event(logger, logging.INFO, "Found Arduino", port=port.device, manufacturer=port.manufacturer)
                 return port.device
         
-        print("No Arduino auto-detected")
+        logger.info("No Arduino auto-detected")
         return None
@@ -0,0 +1,406 @@
+"""
+HARBOR Diamond Viewer - Simulated Arduino
+Speaks the LattePanda_Diamond_Viewer.ino command set over a pseudo-terminal
+so ArduinoController, the web server and benchmarks can run without hardware.
+
+Usage (Linux/macOS):
+    python -m src.arduino_simulator --ack-delay 0.002 --jitter 0.001
+    ARDUINO_PORT=/dev/pts/N python web_server.py
+"""
+
+import argparse
+import heapq
+import os
+import random
+import select
+import threading
+import time
+
+
+# Firmware constants (keep in sync with LattePanda_Diamond_Viewer.ino)
+MOTOR_STEPS = 1600
+MICROSTEPS = 1
+RPM = 120
+STEPS_PER_REV = MOTOR_STEPS * MICROSTEPS
+CONTINUOUS_STEPS = 1000000
+PC_TIMEOUT = 30.0
+ENCODER_SCALE = 200.0
+
+BANNER = [
+    "HARBOR Diamond Viewer - LattePanda Edition",
+    "Ready for wireless + manual control",
+    "Commands: X_FORWARD, X_BACK, X_STOP, Y_UP, Y_DOWN, Y_STOP, ROTATE_CW, ROTATE_CCW, "
+    "ROTATE_STOP, AUTO_ROTATE_CW, AUTO_ROTATE_CCW, AUTO_ROTATE_STOP, GOTO x,y,deg, "
+    "SWEEP deg, STEP axis,n, SET_HOME, POS, PING",
+]
+
+
+class SimulatedAxis:
+    """Stepper axis with constant-speed kinematics and an open-loop position"""
+
+    def __init__(self, name, rpm=RPM):
+        self.name = name
+        self.speed = rpm * STEPS_PER_REV / 60.0  # steps per second
+        self.position = 0.0
+        self.remaining = 0.0
+        self.direction = 0
+
+    def start_move(self, steps):
+        self.remaining = float(abs(steps))
+        self.direction = 1 if steps >= 0 else -1
+
+    def stop(self):
+        self.remaining = 0.0
+        self.direction = 0
+
+    def is_moving(self):
+        return self.remaining > 0
+
+    def advance(self, dt):
+        if self.remaining <= 0:
+            return
+        travelled = min(self.remaining, self.speed * dt)
+        self.position += travelled * self.direction
+        self.remaining -= travelled
+        if self.remaining <= 0:
+            self.remaining = 0.0
+            self.direction = 0
+
+
+class SimulatedArduino:
+    """Firmware model behind a pty; the slave side is exposed as `port`"""
+
+    def __init__(self, baudrate=9600, ack_delay=0.001, jitter=0.0, drop_rate=0.0,
+                 rpm=RPM, pc_timeout=PC_TIMEOUT, seed=None):
+        self.baudrate = baudrate
+        self.ack_delay = ack_delay
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.pc_timeout = pc_timeout
+        self.random = random.Random(seed)
+
+        self.axes = {
+            'ROT': SimulatedAxis('ROT', rpm),
+            'X': SimulatedAxis('X', rpm),
+            'Y': SimulatedAxis('Y', rpm),
+        }
+        self.pc_control_active = False
+        self.auto_rotation_active = False
+        self.auto_rotation_direction = 0
+        self.last_pc_command = 0.0
+        self.macro = None
+        self.macro_axes = ()
+        self.sweep_stage = 0
+        self.sweep_steps = 0
+
+        self.commands = []
+        self.bytes_dropped = 0
+        self.master_fd = None
+        self.slave_fd = None
+        self.port = None
+        self._outbox = []
+        self._outbox_seq = 0
+        self._wire_free_at = 0.0
+        self._input = b''
+        self._last_tick = time.monotonic()
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Open the pty and start serving, returns the port path"""
+        import tty
+
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+        self._running = True
+        self._last_tick = time.monotonic()
+        for line in BANNER:
+            self._queue_line(line, delay=0.0)
+
+        self._thread = threading.Thread(target=self._run, name='arduino-sim', daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1)
+        for fd in (self.master_fd, self.slave_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self.master_fd = self.slave_fd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Manual controls ---
+
+    def turn_encoder(self, axis, counts):
+        """Simulate turning a manual encoder knob (firmware moves 50 steps per scale unit)"""
+        with self._lock:
+            motor = self.axes[axis]
+            if self.pc_control_active and motor.is_moving():
+                return
+            steps = int(counts / ENCODER_SCALE) * 50
+            motor.position += steps
+
+    def position(self):
+        """Current (x, y, degrees) as the firmware would report it"""
+        with self._lock:
+            self._tick()
+            return self._position_unlocked()
+
+    # --- Internals ---
+
+    def _position_unlocked(self):
+        degrees = int(self.axes['ROT'].position) % STEPS_PER_REV * 360 // STEPS_PER_REV
+        return int(self.axes['X'].position), int(self.axes['Y'].position), degrees
+
+    def _byte_time(self, nbytes):
+        # 8N1 framing: 10 bit times per byte
+        return nbytes * 10.0 / self.baudrate if self.baudrate else 0.0
+
+    def _queue_line(self, text, delay=None):
+        data = f"{text}\r\n".encode()
+        if delay is None:
+            delay = self.ack_delay + self.random.uniform(0, self.jitter)
+        # The UART is FIFO: a reply cannot leave before the previous one finished
+        start = max(time.monotonic() + delay, self._wire_free_at)
+        due = start + self._byte_time(len(data))
+        self._wire_free_at = due
+        self._outbox_seq += 1
+        heapq.heappush(self._outbox, (due, self._outbox_seq, data))
+
+    def _drop(self, data):
+        if not self.drop_rate:
+            return data
+        kept = bytes(b for b in data if self.random.random() >= self.drop_rate)
+        self.bytes_dropped += len(data) - len(kept)
+        return kept
+
+    def _run(self):
+        while self._running:
+            timeout = 0.005
+            if self._outbox:
+                timeout = max(0.0, min(timeout, self._outbox[0][0] - time.monotonic()))
+            try:
+                readable, _, _ = select.select([self.master_fd], [], [], timeout)
+            except (OSError, ValueError):
+                break
+
+            if readable:
+                try:
+                    chunk = os.read(self.master_fd, 4096)
+                except OSError:
+                    break
+                # Model the time the bytes spend on the wire before the MCU sees them
+                if self.baudrate:
+                    time.sleep(self._byte_time(len(chunk)))
+                self._input += self._drop(chunk)
+
+            with self._lock:
+                self._tick()
+                while b'\n' in self._input:
+                    line, self._input = self._input.split(b'\n', 1)
+                    self._handle(line.decode('utf-8', errors='replace').strip())
+
+                now = time.monotonic()
+                while self._outbox and self._outbox[0][0] <= now:
+                    _, _, data = heapq.heappop(self._outbox)
+                    try:
+                        os.write(self.master_fd, self._drop(data))
+                    except OSError:
+                        self._running = False
+                        break
+
+    def _tick(self):
+        now = time.monotonic()
+        dt = now - self._last_tick
+        self._last_tick = now
+        for motor in self.axes.values():
+            motor.advance(dt)
+
+        if self.pc_control_active and now - self.last_pc_command > self.pc_timeout:
+            self.pc_control_active = False
+            self.auto_rotation_active = False
+            self._stop_all()
+            self._queue_line("STATUS:TIMEOUT", delay=0.0)
+
+        if self.macro:
+            self._update_macro()
+
+        rotation = self.axes['ROT']
+        if self.auto_rotation_active and not rotation.is_moving():
+            rotation.start_move(STEPS_PER_REV * self.auto_rotation_direction)
+
+    def _stop_all(self):
+        self.macro = None
+        self.macro_axes = ()
+        for motor in self.axes.values():
+            motor.stop()
+
+    def _cancel_macro(self):
+        if self.macro:
+            for name in self.macro_axes:
+                self.axes[name].stop()
+            self.macro = None
+            self.macro_axes = ()
+            self._queue_line("STATUS:MACRO_CANCELLED")
+
+    def _update_macro(self):
+        # Only the macro's own axes count: a continuous auto-rotation never finishes
+        if any(self.axes[name].is_moving() for name in self.macro_axes):
+            return
+        if self.macro == 'SWEEP' and self.sweep_stage < 2:
+            self.sweep_stage += 1
+            steps = -self.sweep_steps if self.sweep_stage == 1 else self.sweep_steps // 2
+            self.axes['ROT'].start_move(steps)
+            return
+        self._queue_line(f"DONE:{self.macro}", delay=0.0)
+        self.macro = None
+        self.macro_axes = ()
+
+    def _handle(self, command):
+        if not command:
+            return
+        self.commands.append(command)
+        self.last_pc_command = time.monotonic()
+        self.pc_control_active = True
+
+        if command.startswith(('X_', 'Y_', 'ROTATE_', 'AUTO_ROTATE_')):
+            self._cancel_macro()
+
+        axis_commands = {
+            'X_FORWARD': ('X', CONTINUOUS_STEPS), 'X_BACK': ('X', -CONTINUOUS_STEPS),
+            'Y_UP': ('Y', CONTINUOUS_STEPS), 'Y_DOWN': ('Y', -CONTINUOUS_STEPS),
+        }
+
+        if command in axis_commands:
+            axis, steps = axis_commands[command]
+            self.axes[axis].start_move(steps)
+        elif command in ('X_STOP', 'Y_STOP'):
+            self.axes[command[0]].stop()
+        elif command in ('ROTATE_CW', 'ROTATE_CCW'):
+            self.auto_rotation_active = False
+            self.axes['ROT'].start_move(STEPS_PER_REV if command == 'ROTATE_CW' else -STEPS_PER_REV)
+        elif command in ('ROTATE_STOP', 'AUTO_ROTATE_STOP'):
+            self.auto_rotation_active = False
+            self.axes['ROT'].stop()
+        elif command in ('AUTO_ROTATE_CW', 'AUTO_ROTATE_CCW'):
+            self.auto_rotation_active = True
+            self.auto_rotation_direction = 1 if command == 'AUTO_ROTATE_CW' else -1
+            self.axes['ROT'].start_move(STEPS_PER_REV * self.auto_rotation_direction)
+        elif command.startswith('GOTO '):
+            try:
+                x, y, deg = (int(v) for v in command[5:].split(','))
+            except ValueError:
+                self._queue_line("ERROR:GOTO expects x,y,deg")
+                return
+            self._start_goto(x, y, deg)
+        elif command.startswith('SWEEP'):
+            try:
+                deg = int(command[6:]) if len(command) > 6 else 90
+            except ValueError:
+                self._queue_line("ERROR:SWEEP expects degrees")
+                return
+            self.auto_rotation_active = False
+            self.sweep_steps = abs(deg) * STEPS_PER_REV // 360
+            self.sweep_stage = 0
+            self.axes['ROT'].start_move(self.sweep_steps // 2)
+            self.macro = 'SWEEP'
+            self.macro_axes = ('ROT',)
+        elif command.startswith('STEP '):
+            axis_name, _, steps = command[5:].partition(',')
+            axis = {'X': 'X', 'Y': 'Y', 'R': 'ROT'}.get(axis_name.strip())
+            try:
+                steps = int(steps)
+            except ValueError:
+                axis = None
+            if axis is None:
+                self._queue_line("ERROR:STEP expects axis,n")
+                return
+            if axis == 'ROT':
+                self.auto_rotation_active = False
+            self.axes[axis].stop()
+            self.axes[axis].start_move(steps)
+            self.macro = 'STEP'
+            self.macro_axes = (axis,)
+        elif command == 'SET_HOME':
+            self._stop_all()
+            for motor in self.axes.values():
+                motor.position = 0.0
+        elif command == 'POS':
+            x, y, deg = self._position_unlocked()
+            self._queue_line(f"POS:{x},{y},{deg}")
+            return
+        elif command == 'PING':
+            self._queue_line("PONG")
+            return
+        elif command == 'STATUS':
+            mode = 'PC' if self.pc_control_active else 'MANUAL'
+            auto = 'ON' if self.auto_rotation_active else 'OFF'
+            self._queue_line(f"MODE:{mode},AUTO_ROT:{auto}")
+            return
+        else:
+            self._queue_line(f"ERROR:Unknown command: {command}")
+            return
+
+        self._queue_line(f"ACK:{command.split(' ')[0]}")
+
+    def _start_goto(self, x, y, deg):
+        self.auto_rotation_active = False
+        for motor in self.axes.values():
+            motor.stop()
+
+        target = (deg % 360) * STEPS_PER_REV // 360
+        current = int(self.axes['ROT'].position) % STEPS_PER_REV
+        delta = target - current
+        if delta > STEPS_PER_REV // 2:
+            delta -= STEPS_PER_REV
+        if delta < -STEPS_PER_REV // 2:
+            delta += STEPS_PER_REV
+
+        self.axes['X'].start_move(x - int(self.axes['X'].position))
+        self.axes['Y'].start_move(y - int(self.axes['Y'].position))
+        self.axes['ROT'].start_move(delta)
+        self.macro = 'GOTO'
+        self.macro_axes = ('X', 'Y', 'ROT')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulated HARBOR Arduino on a pseudo-terminal')
+    parser.add_argument('--baudrate', type=int, default=9600, help='wire timing (0 = instant)')
+    parser.add_argument('--ack-delay', type=float, default=0.001, help='seconds before each reply')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random reply delay (s)')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='probability of dropping a byte')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    sim = SimulatedArduino(baudrate=args.baudrate, ack_delay=args.ack_delay, jitter=args.jitter,
+                           drop_rate=args.drop_rate, seed=args.seed)
+    port = sim.start()
+    print(f"Simulated Arduino listening on {port}")
+    print(f"Run the server with: ARDUINO_PORT={port} python web_server.py")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.stop()
+        print(f"Simulator stopped ({len(sim.commands)} commands received)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+HARBOR Diamond Viewer - Autofocus
+Contrast-based autofocus on the X (zoom) rail. The focus measure is the
+variance of the Laplacian over a centred ROI of the top-camera frame,
+downsampled to 320 px wide - about a millisecond per frame, cheap enough to
+evaluate on every frame.
+
+The search hill-climbs: keep stepping while sharpness improves; when it
+drops, reverse and halve the step. It stops when the step falls below
+`min_step`, after `max_moves` moves or at the timeout, and finishes on the
+sharpest position seen. Every move waits for the firmware's DONE:STEP and then for fresh frames, so
+the measure never sees motion blur.
+"""
+
+import logging
+import threading
+import time
+
+from src.log import get_logger, log_event
+
+logger = get_logger('autofocus')
+
+
+def focus_measure(frame, roi=0.5, width=320):
+    """Variance of the Laplacian over the centre `roi` fraction of the frame"""
+    import cv2
+    height, full_width = frame.shape[:2]
+    roi_h, roi_w = int(height * roi), int(full_width * roi)
+    y0, x0 = (height - roi_h) // 2, (full_width - roi_w) // 2
+    crop = frame[y0:y0 + roi_h, x0:x0 + roi_w]
+    if roi_w > width:
+        scale = width / roi_w
+        crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    return float(cv2.Laplacian(gray, cv2.CV_32F).var())
+
+
+class Autofocus:
+    """One hill-climbing focus search on an axis, measured from the frame hub"""
+
+    def __init__(self, arduino, frames, camera_index=0, axis='X', initial_step=200,
+                 min_step=10, max_moves=30, settle_frames=2, samples=2, timeout=5.0):
+        self.arduino = arduino
+        self.frames = frames
+        self.camera_index = camera_index
+        self.axis = axis
+        self.initial_step = initial_step
+        self.min_step = min_step
+        self.max_moves = max_moves
+        self.settle_frames = settle_frames
+        self.samples = samples
+        self.timeout = timeout
+        self.cancelled = threading.Event()
+        self.trace = []
+
+    def cancel(self):
+        """Stop after the current move (e.g. staff pressed a zoom button)"""
+        self.cancelled.set()
+
+    def measure(self):
+        """Average focus over `samples` frames captured after the stage settled"""
+        seq, frame = self.frames.latest(self.camera_index)
+        if frame is None:
+            return None
+        # Frames already in the pipeline may have been exposed while moving
+        for _ in range(self.settle_frames):
+            seq, frame = self.frames.wait_newer(self.camera_index, seq)
+            if frame is None:
+                return None
+        values = [focus_measure(frame)]
+        for _ in range(self.samples - 1):
+            seq, frame = self.frames.wait_newer(self.camera_index, seq)
+            if frame is None:
+                return None
+            values.append(focus_measure(frame))
+        return sum(values) / len(values)
+
+    def move(self, steps):
+        if steps == 0:
+            return True
+        return self.arduino.step_axis(self.axis, steps)
+
+    def run(self):
+        """Search for best focus; returns a result dict (also logged with the trace)"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        self.trace = []
+
+        best = self.measure()
+        if best is None:
+            return self._finish(started, 'no_frames', 0, None)
+        self.trace.append({'position': 0, 'step': 0, 'metric': round(best, 1)})
+
+        position = best_position = 0
+        step = self.initial_step
+        direction = 1
+        moves = 0
+        reason = 'converged'
+        while step >= self.min_step:
+            if self.cancelled.is_set():
+                reason = 'cancelled'
+                break
+            if moves >= self.max_moves or time.monotonic() > deadline:
+                reason = 'timeout'
+                break
+            if not self.move(direction * step):
+                reason = 'serial_error'
+                break
+            position += direction * step
+            moves += 1
+
+            value = self.measure()
+            if value is None:
+                reason = 'no_frames'
+                break
+            self.trace.append({'position': position, 'step': direction * step, 'metric': round(value, 1)})
+            log_event(logger, logging.DEBUG, "Autofocus step", position=position, step=direction * step,
+                      metric=round(value, 1))
+
+            if value > best:
+                best, best_position = value, position
+                continue
+            # Past the peak: reverse and refine
+            direction = -direction
+            step //= 2
+
+        # A cancel means staff took over the zoom; leave the rail where they put it
+        if position != best_position and reason not in ('serial_error', 'cancelled'):
+            self.move(best_position - position)
+            moves += 1
+        return self._finish(started, reason, moves, best, best_position)
+
+    def _finish(self, started, reason, moves, best, position=0):
+        result = {
+            'result': reason,
+            'moves': moves,
+            'position': position,
+            'metric': round(best, 1) if best is not None else None,
+            'seconds': round(time.monotonic() - started, 2),
+            'trace': self.trace,
+        }
+        log_event(logger, logging.INFO if reason == 'converged' else logging.WARNING, "Autofocus finished",
+                  result=reason, moves=moves, position=position, metric=result['metric'],
+                  seconds=result['seconds'], trace=self.trace)
+        return result
@@ -0,0 +1,107 @@
+"""
+HARBOR Diamond Viewer - Camera Access
+Single place where cameras are opened, so the display, the recorder and the
+test harnesses can swap in synthetic sources.
+
+Set HARBOR_SYNTHETIC_CAMERAS=1 to replace every camera with a generated
+test pattern (no USB cameras or drivers needed).
+
+Set HARBOR_CAMERA_PROCESSES=1 to capture each camera in its own process and
+share frames through shared memory (see src/frame_transport.py).
+
+Devices open in their probed mode (see src/camera_profiles.py).
+"""
+
+import os
+import time
+
+import numpy as np
+
+
+def synthetic_cameras_enabled():
+    return os.getenv('HARBOR_SYNTHETIC_CAMERAS', '').lower() in ('1', 'true', 'yes')
+
+
+class SyntheticCamera:
+    """Drop-in stand-in for cv2.VideoCapture producing a moving test pattern at a fixed rate"""
+
+    def __init__(self, index=0, width=1280, height=720, fps=30):
+        import cv2
+        self.index = index
+        self.props = {
+            cv2.CAP_PROP_FRAME_WIDTH: float(width),
+            cv2.CAP_PROP_FRAME_HEIGHT: float(height),
+            cv2.CAP_PROP_FPS: float(fps),
+        }
+        self.opened = True
+        self.frame_number = 0
+        self.next_frame_time = time.perf_counter()
+        self._base = None
+
+    def isOpened(self):
+        return self.opened
+
+    def get(self, prop):
+        return self.props.get(prop, 0.0)
+
+    def set(self, prop, value):
+        self.props[prop] = float(value)
+        self._base = None
+        return True
+
+    def read(self):
+        import cv2
+        if not self.opened:
+            return False, None
+
+        # Pace reads like a real camera delivering frames at its configured fps
+        fps = self.props[cv2.CAP_PROP_FPS] or 30.0
+        now = time.perf_counter()
+        if now < self.next_frame_time:
+            time.sleep(self.next_frame_time - now)
+        self.next_frame_time = max(now, self.next_frame_time) + 1.0 / fps
+
+        width = int(self.props[cv2.CAP_PROP_FRAME_WIDTH])
+        height = int(self.props[cv2.CAP_PROP_FRAME_HEIGHT])
+        if self._base is None or self._base.shape[:2] != (height, width):
+            gradient = np.linspace(0, 255, width, dtype=np.uint8)
+            self._base = np.dstack([np.tile(gradient, (height, 1))] * 3)
+
+        # Roll the gradient and draw a bright "stone" so frames differ like live video
+        frame = np.roll(self._base, self.frame_number * 4, axis=1)
+        cx = width // 2 + int(width * 0.1 * np.sin(self.frame_number / 15.0))
+        cv2.circle(frame, (cx, height // 2), min(width, height) // 6, (255, 255, 255), -1)
+        self.frame_number += 1
+        return True, frame
+
+    def release(self):
+        self.opened = False
+
+
+def camera_processes_enabled():
+    return os.getenv('HARBOR_CAMERA_PROCESSES', '').lower() in ('1', 'true', 'yes')
+
+
+def open_raw_device(index):
+    """Open the camera device itself in the driver's default mode (synthetic when HARBOR_SYNTHETIC_CAMERAS is set)"""
+    if synthetic_cameras_enabled():
+        return SyntheticCamera(index)
+    import cv2
+    return cv2.VideoCapture(index)
+
+
+def open_device(index):
+    """Open the camera device in its profiled pixel format, resolution and frame rate"""
+    from src.camera_profiles import apply_mode, camera_mode
+    cap = open_raw_device(index)
+    if cap.isOpened():
+        apply_mode(cap, camera_mode(index))
+    return cap
+
+
+def open_capture(index, restart=False):
+    """Open a camera by index; a shared-memory reader when camera processes are enabled (`restart`: a new process)"""
+    if camera_processes_enabled():
+        from src.frame_transport import shared_capture
+        return shared_capture(index, restart)
+    return open_device(index)
@@ -0,0 +1,121 @@
+"""
+HARBOR Diamond Viewer - Camera Health
+Per-camera frame health, so a frozen picture can be told apart: is read()
+failing, slow, or returning the same frame over and over? The display
+records every read here, and the web server reports it at /api/cameras (both
+run in one process). The display's diagnostics overlay (D key) shows it too.
+
+Duplicates are found by hashing a coarse grid of pixels (every Nth pixel,
+about 64 across), which costs a few microseconds at 1080p. Live video always
+differs somewhat from frame to frame because of sensor noise, so an
+identical grid means the camera handed back a stale frame.
+"""
+
+import collections
+import threading
+import time
+
+LATENCY_WINDOW = 300     # reads kept for the latency percentiles (~10 s at 30 fps)
+SIGNATURE_WIDTH = 64
+
+
+def frame_signature(frame):
+    """Hash of a ~64-pixel-wide subsample of the frame"""
+    step = max(1, frame.shape[1] // SIGNATURE_WIDTH)
+    return hash(frame[::step, ::step].tobytes())
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class CameraHealth:
+    """Counters for one camera; written by the display thread, read by anyone"""
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.reads = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.duplicates = 0
+        self.consecutive_duplicates = 0
+        self.reopens = 0
+        self.fps = 0.0
+        self.last_signature = None
+        self.last_good = None
+
+    def record_read(self, seconds, frame):
+        """One read() that took `seconds`, frame None if it failed; returns 'failed', 'duplicate' or 'new'"""
+        now = time.monotonic()
+        signature = frame_signature(frame) if frame is not None else None
+        with self.lock:
+            self.reads += 1
+            self.latencies.append(seconds)
+            if frame is None:
+                self.failures += 1
+                self.consecutive_failures += 1
+                return 'failed'
+            self.consecutive_failures = 0
+            if signature == self.last_signature:
+                self.duplicates += 1
+                self.consecutive_duplicates += 1
+                return 'duplicate'
+            self.consecutive_duplicates = 0
+            self.last_good = now
+            self.last_signature = signature
+            return 'new'
+
+    def record_fps(self, fps):
+        with self.lock:
+            self.fps = fps
+
+    def record_reopen(self):
+        with self.lock:
+            self.reopens += 1
+            self.consecutive_failures = 0
+            self.last_signature = None
+
+    def summary(self):
+        with self.lock:
+            ordered = sorted(self.latencies)
+            last_good = self.last_good
+            summary = {
+                'fps': self.fps,
+                'reads': self.reads,
+                'failures': self.failures,
+                'consecutive_failures': self.consecutive_failures,
+                'duplicates': self.duplicates,
+                'consecutive_duplicates': self.consecutive_duplicates,
+                'reopens': self.reopens,
+            }
+        summary['read_ms'] = {
+            name: round(value * 1000, 2) if value is not None else None
+            for name, value in (('p50', percentile(ordered, 0.5)), ('p95', percentile(ordered, 0.95)),
+                                ('p99', percentile(ordered, 0.99)), ('max', ordered[-1] if ordered else None))
+        }
+        summary['since_last_good'] = round(time.monotonic() - last_good, 2) if last_good is not None else None
+        return summary
+
+
+_cameras = {}
+_cameras_lock = threading.Lock()
+
+
+def camera_health(name):
+    """Health record for the camera shown as `name` (created on first use)"""
+    with _cameras_lock:
+        health = _cameras.get(name)
+        if health is None:
+            health = _cameras[name] = CameraHealth(name)
+        return health
+
+
+def all_health():
+    """{camera name: summary} for every camera the display has read"""
+    with _cameras_lock:
+        cameras = list(_cameras.values())
+    return {health.name: health.summary() for health in cameras}
@@ -0,0 +1,273 @@
+"""
+HARBOR Diamond Viewer - Warm Cameras
+A CameraOwner keeps one camera open for the life of the server, so a
+recording never waits for the device to open, the driver to negotiate a mode
+or auto exposure to settle. Frames only count once exposure has settled (the
+picture's brightness stops changing). From then on the owner always holds
+the newest frame. A new subscriber gets that frame at once, then every frame
+after it: a recording starts on a well-exposed frame no more than one frame
+period old. Frames are queued with the time they were read, so a recording
+can hold its frame rate when the camera delivers frames late or a slow
+writer loses some.
+
+Set HARBOR_LOCK_EXPOSURE=1 to freeze exposure, white balance and focus at
+their settled values, so the picture does not drift while the stone turns.
+Locking is best effort: not every driver accepts manual settings.
+
+When the display viewer runs the server, the display already owns the
+device. The owner then follows the frames it publishes to the frame hub
+instead of opening the camera a second time. Its frame rate is then the
+rate the display really draws at, measured, not the camera's mode.
+"""
+
+import collections
+import logging
+import os
+import queue
+import threading
+import time
+
+from src.camera import open_capture
+from src.camera_profiles import camera_mode
+from src.log import get_logger, log_event
+
+logger = get_logger('camera')
+
+SETTLE_SECONDS = 3.0
+# Brightness (0-255) of a tiny thumbnail may move this much between frames once exposure has settled
+SETTLE_TOLERANCE = 1.0
+SETTLE_FRAMES = 5
+REOPEN_SECONDS = 2.0
+# Frames the delivered rate is measured over when following the display
+RATE_FRAMES = 30
+# CAP_PROP_AUTO_EXPOSURE value meaning "manual" differs by backend
+MANUAL_EXPOSURE = {'V4L2': 1, 'DSHOW': 0.25, 'MSMF': 0}
+
+
+def lock_exposure_enabled():
+    return os.getenv('HARBOR_LOCK_EXPOSURE', '').lower() in ('1', 'true', 'yes')
+
+
+def brightness(frame):
+    """Mean brightness of a 32x18 thumbnail - a few microseconds per frame"""
+    import cv2
+    return float(cv2.resize(frame, (32, 18), interpolation=cv2.INTER_AREA).mean())
+
+
+class CameraOwner:
+    """Keeps one camera open and settled, and fans its frames out to subscribed recordings"""
+
+    def __init__(self, index, opener=open_capture, backlog=8, settle_seconds=SETTLE_SECONDS, lock=None):
+        self.index = index
+        self.opener = opener
+        self.backlog = backlog
+        self.settle_seconds = settle_seconds
+        self.lock_settings = lock_exposure_enabled() if lock is None else lock
+        self.condition = threading.Condition()
+        self.subscribers = set()
+        self.thread = None
+        self.source = None
+        self.state = 'stopped'      # opening -> settling -> ready, or unavailable
+        self.latest = None
+        self.width = 0
+        self.height = 0
+        self.fps = 0
+        self.settled_after = None
+        self.locked = {}
+        self._settle_started = 0.0
+        self._previous = None
+        self._steady = 0
+
+    def start(self, follow=None):
+        """Open and settle the camera in the background; with a FrameHub as `follow`, use the display's frames"""
+        with self.condition:
+            if self.thread is not None:
+                return
+            self.source = 'display' if follow is not None else 'device'
+            target, args = (self._follow, (follow,)) if follow is not None else (self._own, ())
+            self.thread = threading.Thread(target=target, args=args, name=f'camera-owner-{self.index}', daemon=True)
+            self.thread.start()
+
+    def subscribe(self, timeout=None):
+        """Queue of (time read, frame) from the newest settled frame on (None ends the stream); None if unavailable"""
+        self.start()
+        if timeout is None:
+            timeout = self.settle_seconds + 10.0  # a cold USB camera can take seconds to open
+        with self.condition:
+            self.condition.wait_for(lambda: self.state in ('ready', 'unavailable'), timeout)
+            if self.state != 'ready':
+                return None
+            frames = queue.Queue(maxsize=self.backlog)
+            frames.put_nowait(self.latest)
+            self.subscribers.add(frames)
+            return frames
+
+    def unsubscribe(self, frames):
+        with self.condition:
+            self.subscribers.discard(frames)
+
+    def summary(self):
+        with self.condition:
+            return {
+                'source': self.source,
+                'state': self.state,
+                'width': self.width,
+                'height': self.height,
+                'fps': self.fps,
+                'settled_after': round(self.settled_after, 2) if self.settled_after is not None else None,
+                'locked': dict(self.locked),
+            }
+
+    def _set_state(self, state):
+        with self.condition:
+            self.state = state
+            self.condition.notify_all()
+
+    def _own(self):
+        """Owner thread: open, settle, read; reopen after the camera drops out"""
+        import cv2
+        announced = False
+        while True:
+            self._set_state('opening')
+            cap = self.opener(self.index)
+            if not cap.isOpened():
+                cap.release()
+                self._set_state('unavailable')
+                if not announced:
+                    log_event(logger, logging.WARNING, "Camera not available - retrying", camera=self.index)
+                    announced = True
+                time.sleep(REOPEN_SECONDS)
+                continue
+            announced = False
+            self.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            self.fps = int(round(cap.get(cv2.CAP_PROP_FPS))) or camera_mode(self.index)['fps']
+            self._begin_settling()
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if hasattr(cap, 'ring'):
+                    # A camera process's ring view: subscribers hold frames long after its slot is reused
+                    frame = frame.copy()
+                    if not cap.ring.intact(cap.seq):
+                        continue  # overwritten while we copied it
+                if self._deliver(frame) and self.lock_settings and not self.locked:
+                    self._lock(cap)
+            cap.release()
+            self._end_stream()
+            log_event(logger, logging.WARNING, "Camera stopped delivering frames - reopening", camera=self.index)
+            time.sleep(REOPEN_SECONDS)
+
+    def _follow(self, hub):
+        """Owner thread when the display owns the device: take each frame it publishes (hub frames never change)"""
+        seq = 0
+        stamps = collections.deque(maxlen=RATE_FRAMES)
+        self._set_state('opening')
+        while True:
+            newer, frame = hub.wait_newer(self.index, seq, timeout=2.0)
+            if frame is None:
+                if self.state == 'ready':
+                    self._end_stream()
+                    log_event(logger, logging.WARNING, "Display stopped publishing frames", camera=self.index)
+                stamps.clear()
+                continue
+            if self.state == 'opening':
+                self.height, self.width = frame.shape[:2]
+                self.fps = camera_mode(self.index)['fps']
+                self._begin_settling()
+            seq = newer
+            # The display draws on a timer, slower than a fast camera mode: record at the rate it delivers
+            stamps.append(time.monotonic())
+            if len(stamps) > 1 and stamps[-1] > stamps[0]:
+                measured = (len(stamps) - 1) / (stamps[-1] - stamps[0])
+                self.fps = max(1, min(camera_mode(self.index)['fps'], int(round(measured))))
+            self._deliver(frame)
+
+    def _begin_settling(self):
+        self._settle_started = time.monotonic()
+        self._previous = None
+        self._steady = 0
+        self.locked = {}
+        self._set_state('settling')
+
+    def _deliver(self, frame):
+        """Hand a frame to the subscribers once exposure has settled; True on the frame that settles it"""
+        settled_now = False
+        stamp = time.monotonic()
+        if self.state == 'settling':
+            level = brightness(frame)
+            steady = self._previous is not None and abs(level - self._previous) <= SETTLE_TOLERANCE
+            self._previous = level
+            self._steady = self._steady + 1 if steady else 0
+            elapsed = time.monotonic() - self._settle_started
+            if self._steady < SETTLE_FRAMES and elapsed < self.settle_seconds:
+                return False
+            self.settled_after = elapsed
+            settled_now = True
+            log_event(logger, logging.INFO, "Camera warm", camera=self.index, source=self.source,
+                      settled_after=round(elapsed, 2), converged=self._steady >= SETTLE_FRAMES)
+
+        with self.condition:
+            self.latest = (stamp, frame)
+            subscribers = list(self.subscribers)
+            if settled_now:
+                self.state = 'ready'
+                self.condition.notify_all()
+        for frames in subscribers:
+            self._offer(frames, (stamp, frame))
+        return settled_now
+
+    def _end_stream(self):
+        """End every subscriber's stream; new subscribers wait for the camera to come back"""
+        with self.condition:
+            subscribers = list(self.subscribers)
+            self.subscribers.clear()
+            self.latest = None
+            self.state = 'opening'
+        for frames in subscribers:
+            self._offer(frames, None)
+
+    def _lock(self, cap):
+        """Switch exposure, white balance and focus to manual at their current values"""
+        import cv2
+        backend = cap.getBackendName() if hasattr(cap, 'getBackendName') else ''
+        exposure = cap.get(cv2.CAP_PROP_EXPOSURE)
+        white_balance = cap.get(cv2.CAP_PROP_WB_TEMPERATURE)
+        focus = cap.get(cv2.CAP_PROP_FOCUS)
+        locked = {
+            'exposure': cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, MANUAL_EXPOSURE.get(backend, 0.25))
+            and cap.set(cv2.CAP_PROP_EXPOSURE, exposure),
+            'white_balance': cap.set(cv2.CAP_PROP_AUTO_WB, 0)
+            and (not white_balance or cap.set(cv2.CAP_PROP_WB_TEMPERATURE, white_balance)),
+            'focus': cap.set(cv2.CAP_PROP_AUTOFOCUS, 0) and cap.set(cv2.CAP_PROP_FOCUS, focus),
+        }
+        self.locked = locked
+        log_event(logger, logging.INFO if all(locked.values()) else logging.WARNING, "Camera settings locked",
+                  camera=self.index, backend=backend, exposure=exposure, white_balance=white_balance,
+                  focus=focus, **{f'{name}_locked': ok for name, ok in locked.items()})
+
+    @staticmethod
+    def _offer(frames, frame):
+        # A slow writer loses its oldest frame rather than holding up the camera
+        try:
+            frames.put_nowait(frame)
+        except queue.Full:
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                pass
+            frames.put_nowait(frame)
+
+
+_owners = {}
+_owners_lock = threading.Lock()
+
+
+def camera_owner(index):
+    """The process-wide owner of camera `index`"""
+    with _owners_lock:
+        owner = _owners.get(index)
+        if owner is None:
+            owner = _owners[index] = CameraOwner(index)
+        return owner
@@ -0,0 +1,173 @@
+"""
+HARBOR Diamond Viewer - Camera Profiles
+Many USB microscope cameras fall back to uncompressed YUYV when no format is
+requested, which USB 2 can only carry at about 10 fps at 720p. The probe tries
+each pixel format / resolution / frame rate a camera accepts, measures the
+frame rate it really delivers, and saves the best mode per camera to
+camera_profiles.json (HARBOR_CAMERA_PROFILES). src.camera then opens every
+camera in that mode, for the display, the recorder and the camera processes.
+
+Run it with the display viewer closed (it needs the cameras to itself):
+    python -m src.camera_profiles --cameras 0 1
+
+Profiles are keyed by camera index, so probe again after swapping cameras.
+Without a profile, cameras open as MJPG at 1280x720, 30 fps.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_MODE = {'fourcc': 'MJPG', 'width': 1280, 'height': 720, 'fps': 30}
+FOURCCS = ('MJPG', 'YUYV', 'H264')
+MODES = ((3840, 2160, 30), (2592, 1944, 30), (1920, 1080, 60), (1920, 1080, 30),
+         (1280, 720, 60), (1280, 720, 30), (640, 480, 30))
+# A mode has to keep up with live video to be worth its resolution
+MIN_FPS = 24
+WARMUP_FRAMES = 5
+
+_profiles = None
+_profiles_lock = threading.Lock()
+
+
+def profiles_path():
+    return os.getenv('HARBOR_CAMERA_PROFILES', 'camera_profiles.json')
+
+
+def load_profiles(path=None):
+    """{camera index (str): profile} from the profiles file, {} if there is none"""
+    try:
+        with open(path or profiles_path(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_profiles(profiles, path=None):
+    path = path or profiles_path()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def camera_mode(index):
+    """Mode to open camera `index` in: its probed profile, else DEFAULT_MODE"""
+    global _profiles
+    with _profiles_lock:
+        if _profiles is None:
+            _profiles = load_profiles()
+        profile = _profiles.get(str(index))
+    if not profile:
+        return dict(DEFAULT_MODE)
+    return {key: profile[key] for key in DEFAULT_MODE}
+
+
+def fourcc_name(code):
+    code = int(code)
+    return ''.join(chr((code >> 8 * i) & 0xFF) for i in range(4))
+
+
+def apply_mode(cap, mode):
+    """Request a mode; the pixel format goes first, as some drivers only honour it before the size"""
+    import cv2
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode['fourcc']))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode['width'])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode['height'])
+    cap.set(cv2.CAP_PROP_FPS, mode['fps'])
+
+
+def actual_mode(cap, requested):
+    """The mode the driver settled on (some backends report no pixel format; assume the requested one)"""
+    import cv2
+    fourcc = fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)).strip('\0 ') or requested['fourcc']
+    return {
+        'fourcc': fourcc,
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'fps': int(round(cap.get(cv2.CAP_PROP_FPS))) or requested['fps'],
+    }
+
+
+def benchmark(cap, seconds):
+    """(delivered fps, failed reads) over `seconds`, after the mode change has settled"""
+    for _ in range(WARMUP_FRAMES):
+        cap.read()
+    frames = failures = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        ret, _ = cap.read()
+        if ret:
+            frames += 1
+        else:
+            failures += 1
+    return frames / (time.perf_counter() - started), failures
+
+
+def probe_camera(index, seconds=1.0, fourccs=FOURCCS, modes=MODES):
+    """Benchmark every mode camera `index` accepts; returns one result per distinct mode"""
+    from src.camera import open_raw_device
+    cap = open_raw_device(index)
+    if not cap.isOpened():
+        cap.release()
+        return []
+    results = []
+    try:
+        for fourcc in fourccs:
+            for width, height, fps in modes:
+                requested = {'fourcc': fourcc, 'width': width, 'height': height, 'fps': fps}
+                apply_mode(cap, requested)
+                mode = actual_mode(cap, requested)
+                # The driver substituted another mode: it is (or will be) measured under its own name
+                if (mode['fourcc'], mode['width'], mode['height']) != (fourcc, width, height):
+                    continue
+                if any(all(r[key] == mode[key] for key in DEFAULT_MODE) for r in results):
+                    continue
+                measured, failures = benchmark(cap, seconds)
+                results.append(dict(mode, measured_fps=round(measured, 1), failures=failures))
+    finally:
+        cap.release()
+    return results
+
+
+def best_mode(results, min_fps=MIN_FPS):
+    """Highest resolution that delivers its frame rate and keeps up with live video; else the most pixels per second"""
+    usable = [r for r in results
+              if r['measured_fps'] >= max(min_fps, 0.9 * r['fps']) and not r['failures']]
+    if usable:
+        return max(usable, key=lambda r: (r['width'] * r['height'], r['measured_fps'], r['fourcc'] == 'MJPG'))
+    if results:
+        return max(results, key=lambda r: r['width'] * r['height'] * r['measured_fps'])
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Probe camera modes and save the best one per camera')
+    parser.add_argument('--cameras', type=int, nargs='+', default=[0, 1], help='camera indices to probe')
+    parser.add_argument('--seconds', type=float, default=1.0, help='benchmark time per mode')
+    parser.add_argument('--output', default=None, help='profiles file (default: HARBOR_CAMERA_PROFILES)')
+    args = parser.parse_args()
+
+    profiles = load_profiles(args.output)
+    for index in args.cameras:
+        print(f"Camera {index}:")
+        results = probe_camera(index, args.seconds)
+        for r in results:
+            print(f"  {r['fourcc']} {r['width']}x{r['height']} @ {r['fps']}: "
+                  f"{r['measured_fps']} fps, {r['failures']} failed reads")
+        best = best_mode(results)
+        if best is None:
+            print("  not available")
+            continue
+        profiles[str(index)] = dict({key: best[key] for key in DEFAULT_MODE}, measured_fps=best['measured_fps'],
+                                    probed=datetime.now().isoformat(timespec='seconds'), modes=results)
+        print(f"  -> {best['fourcc']} {best['width']}x{best['height']} @ {best['fps']}")
+    save_profiles(profiles, args.output)
+    print(f"Saved {args.output or profiles_path()}")
+
+
+if __name__ == '__main__':
+    main()
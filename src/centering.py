@@ -0,0 +1,162 @@
+"""
+HARBOR Diamond Viewer - Stone Centering
+Finds the stone in the camera frames and drives the stage until it is
+framed consistently:
+
+    girdle camera  vertical offset of the stone  ->  Y axis (height)
+    top camera     size of the stone in frame    ->  X axis (zoom)
+
+Detection runs on a 320 px wide copy of each frame: blur, Otsu threshold
+(inverted when the background is the bright class), then the largest
+contour's bounding box. It takes a couple of milliseconds, so every new
+frame can be checked. Moves are proportional to the error and clamped. The
+direction of each axis is learned on the fly: if a move makes the error
+worse, that axis' sign is flipped.
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+from src.log import get_logger, log_event
+
+logger = get_logger('centering')
+
+MISSED_FRAMES_LIMIT = 10
+
+
+def detect_stone(frame, width=320, min_area=0.002):
+    """Bounding box of the stone as fractions of the frame {'cx', 'cy', 'width', 'height', 'area'}, or None"""
+    import cv2
+    height, full_width = frame.shape[:2]
+    scale = width / full_width
+    small = cv2.resize(frame, (width, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    # The stone is whichever class the frame border is not
+    border = np.concatenate([mask[0], mask[-1], mask[:, 0], mask[:, -1]])
+    if border.mean() > 127:
+        mask = cv2.bitwise_not(mask)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+
+    contours = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
+    if not contours:
+        return None
+    contour = max(contours, key=cv2.contourArea)
+    mask_h, mask_w = mask.shape
+    area = cv2.contourArea(contour) / float(mask_h * mask_w)
+    if area < min_area:
+        return None
+    x, y, box_w, box_h = cv2.boundingRect(contour)
+    return {
+        'cx': (x + box_w / 2.0) / mask_w,
+        'cy': (y + box_h / 2.0) / mask_h,
+        'width': box_w / float(mask_w),
+        'height': box_h / float(mask_h),
+        'area': area,
+    }
+
+
+class StoneCentering:
+    """Closed-loop centering of the stone on Y and sizing on the zoom rail"""
+
+    def __init__(self, arduino, frames, top_camera=0, side_camera=1, target_fill=0.6,
+                 tolerance=0.05, y_gain=1500, zoom_gain=2000, max_step=800, timeout=8.0):
+        self.arduino = arduino
+        self.frames = frames
+        self.top_camera = top_camera
+        self.side_camera = side_camera
+        self.target_fill = target_fill
+        self.tolerance = tolerance
+        self.gains = {'Y': y_gain, 'X': zoom_gain}
+        self.max_step = max_step
+        self.timeout = timeout
+        self.cancelled = threading.Event()
+        self.trace = []
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def observe(self, camera):
+        """Detection on the first frame captured after the call (the stage has stopped by then)"""
+        seq, _ = self.frames.latest(camera)
+        seq, frame = self.frames.wait_newer(camera, seq, timeout=0.5)
+        return detect_stone(frame) if frame is not None else None
+
+    def errors(self):
+        """Signed error per axis: Y from the girdle view, X (zoom) from the top view"""
+        errors = {}
+        side = self.observe(self.side_camera)
+        if side:
+            errors['Y'] = 0.5 - side['cy']
+        top = self.observe(self.top_camera)
+        if top:
+            errors['X'] = self.target_fill - max(top['width'], top['height'])
+        return errors
+
+    def run(self):
+        """Centre and size the stone; returns a result dict (also logged with the trace)"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        signs = {'Y': 1, 'X': 1}
+        flipped = set()
+        previous = {}
+        missed = 0
+        moves = 0
+        self.trace = []
+
+        while True:
+            if self.cancelled.is_set():
+                reason = 'cancelled'
+                break
+            if time.monotonic() > deadline:
+                reason = 'timeout'
+                break
+
+            errors = self.errors()
+            if not errors:
+                missed += 1
+                if missed >= MISSED_FRAMES_LIMIT:
+                    reason = 'not_found'
+                    break
+                continue
+            missed = 0
+            self.trace.append({axis: round(error, 3) for axis, error in errors.items()})
+
+            pending = {axis: error for axis, error in errors.items() if abs(error) > self.tolerance}
+            if not pending:
+                reason = 'centered'
+                break
+
+            failed = False
+            for axis, error in pending.items():
+                # Learn the axis direction from the first move that made things worse
+                if axis in previous and axis not in flipped and abs(error) > abs(previous[axis]) + self.tolerance / 2:
+                    signs[axis] = -signs[axis]
+                    flipped.add(axis)
+                steps = int(round(signs[axis] * self.gains[axis] * error))
+                steps = max(-self.max_step, min(self.max_step, steps))
+                if steps and not self.arduino.step_axis(axis, steps):
+                    failed = True
+                    break
+                moves += 1
+                log_event(logger, logging.DEBUG, "Centering step", axis=axis, error=round(error, 3), steps=steps)
+            if failed:
+                reason = 'serial_error'
+                break
+            previous = errors
+
+        result = {
+            'result': reason,
+            'moves': moves,
+            'errors': self.trace[-1] if self.trace else {},
+            'seconds': round(time.monotonic() - started, 2),
+            'trace': self.trace,
+        }
+        log_event(logger, logging.INFO if reason == 'centered' else logging.WARNING, "Centering finished",
+                  result=reason, moves=moves, seconds=result['seconds'], trace=self.trace)
+        return result
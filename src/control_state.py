@@ -0,0 +1,82 @@
+"""
+HARBOR Diamond Viewer - Shared Control State
+A single lock-protected, versioned state store and the control lease that
+decides which connected phone may drive the motors.
+"""
+
+import threading
+import time
+
+
+class StateStore:
+    """Versioned key/value state; every effective change bumps the version once"""
+
+    def __init__(self, **initial):
+        self.lock = threading.Lock()
+        self.version = 0
+        self.state = dict(initial)
+
+    def update(self, **changes):
+        """Apply changes, returns {'version', 'changes'} for what actually changed or None"""
+        with self.lock:
+            diff = {key: value for key, value in changes.items() if self.state.get(key) != value}
+            if not diff:
+                return None
+            self.state.update(diff)
+            self.version += 1
+            return {'version': self.version, 'changes': diff}
+
+    def get(self, key, default=None):
+        with self.lock:
+            return self.state.get(key, default)
+
+    def snapshot(self):
+        with self.lock:
+            return {'version': self.version, 'state': dict(self.state)}
+
+
+class ControlLease:
+    """One client holds control at a time; the lease lapses after `timeout` idle seconds"""
+
+    def __init__(self, timeout=60.0):
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.holder = None
+        self.expires_at = 0.0
+
+    def _current_unlocked(self):
+        if self.holder is not None and time.monotonic() >= self.expires_at:
+            self.holder = None
+        return self.holder
+
+    def current(self):
+        """Sid of the current holder, or None if free or expired"""
+        with self.lock:
+            return self._current_unlocked()
+
+    def acquire(self, sid):
+        """Take (or keep) control if nobody else holds a live lease, returns True on success"""
+        with self.lock:
+            holder = self._current_unlocked()
+            if holder not in (None, sid):
+                return False
+            self.holder = sid
+            self.expires_at = time.monotonic() + self.timeout
+            return True
+
+    def hand_off(self, from_sid, to_sid):
+        """Transfer control from the current holder to another client"""
+        with self.lock:
+            if self._current_unlocked() != from_sid:
+                return False
+            self.holder = to_sid
+            self.expires_at = time.monotonic() + self.timeout
+            return True
+
+    def release(self, sid):
+        """Give up control, returns True if `sid` was the holder"""
+        with self.lock:
+            if self._current_unlocked() != sid:
+                return False
+            self.holder = None
+            return True
@@ -0,0 +1,230 @@
+"""
+HARBOR Diamond Viewer - Image Enhancement
+Chain of enhancement stages applied to camera frames before display (and
+optionally before recording): white balance, CLAHE contrast, unsharp mask
+and gamma. Tone stages are precomputed lookup tables; all stages write into
+preallocated buffers so no frame-sized arrays are allocated per frame.
+
+Each stage keeps a running average of its cost. A stage switches off when
+it would push the chain past its frame budget, or when it has overrun its
+own budget. It is re-measured every `probe_every` frames on a scratch copy
+that is never shown, and switches back on only once it fits with HEADROOM
+to spare, so a stage near its budget does not flicker on and off.
+
+HARBOR_ENHANCE selects the stages and their strength, in order, e.g.
+    HARBOR_ENHANCE=white_balance,clahe:2.0,unsharp:0.6,gamma:1.1
+HARBOR_ENHANCE_BUDGET_MS caps the chain per frame (default 12 ms of the 33 ms
+available at 30 fps) and HARBOR_ENHANCE_RECORDINGS=1 applies it to videos too.
+"""
+
+import os
+import time
+
+import numpy as np
+
+from src import metrics
+
+# A switched-off stage comes back only once it fits in this share of its own and the chain's budget
+HEADROOM = 0.8
+
+
+class Stage:
+    """One enhancement step; `apply(frame)` modifies the frame in place"""
+
+    name = 'stage'
+
+    def __init__(self, budget=0.005):
+        self.budget = budget
+        self.average = 0.0
+        self.runs = 0
+        self.skipped = 0
+        self.active = True
+
+    def apply(self, frame):
+        raise NotImplementedError
+
+    def record(self, seconds):
+        self.runs += 1
+        self.average = seconds if self.runs == 1 else 0.8 * self.average + 0.2 * seconds
+
+    def stats(self):
+        return {'average_ms': round(self.average * 1000, 2), 'runs': self.runs, 'skipped': self.skipped,
+                'active': self.active}
+
+
+class WhiteBalanceStage(Stage):
+    """Gray-world white balance applied through a per-channel LUT"""
+
+    name = 'white_balance'
+
+    def __init__(self, strength=1.0, refresh_every=15, budget=0.003):
+        super().__init__(budget)
+        self.strength = strength
+        self.refresh_every = refresh_every
+        self.frames = 0
+        self.lut = np.dstack([np.arange(256, dtype=np.uint8)] * 3)
+
+    def refresh(self, frame):
+        # Channel means from a sparse sample; gains pull every channel to the gray mean
+        means = frame[::8, ::8].reshape(-1, 3).mean(axis=0) + 1e-3
+        gains = 1.0 + self.strength * (means.mean() / means - 1.0)
+        ramp = np.arange(256, dtype=np.float32)[:, None] * gains[None, :]
+        self.lut = np.clip(ramp, 0, 255).astype(np.uint8).reshape(1, 256, 3)
+
+    def apply(self, frame):
+        import cv2
+        if self.frames % self.refresh_every == 0:
+            self.refresh(frame)
+        self.frames += 1
+        cv2.LUT(frame, self.lut, dst=frame)
+
+
+class ClaheStage(Stage):
+    """Local contrast (CLAHE) on the lightness channel"""
+
+    name = 'clahe'
+
+    def __init__(self, clip_limit=2.0, tiles=8, budget=0.008):
+        import cv2
+        super().__init__(budget)
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(tiles, tiles))
+        self.lab = None
+        self.lightness = None
+
+    def apply(self, frame):
+        import cv2
+        if self.lab is None or self.lab.shape != frame.shape:
+            self.lab = np.empty_like(frame)
+            self.lightness = np.empty(frame.shape[:2], dtype=np.uint8)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2LAB, dst=self.lab)
+        cv2.extractChannel(self.lab, 0, dst=self.lightness)
+        self.clahe.apply(self.lightness, dst=self.lightness)
+        cv2.insertChannel(self.lightness, self.lab, 0)
+        cv2.cvtColor(self.lab, cv2.COLOR_LAB2BGR, dst=frame)
+
+
+class UnsharpStage(Stage):
+    """Unsharp mask: frame + amount * (frame - blurred)"""
+
+    name = 'unsharp'
+
+    def __init__(self, amount=0.6, sigma=1.5, budget=0.006):
+        super().__init__(budget)
+        self.amount = amount
+        self.sigma = sigma
+        self.blurred = None
+
+    def apply(self, frame):
+        import cv2
+        if self.blurred is None or self.blurred.shape != frame.shape:
+            self.blurred = np.empty_like(frame)
+        cv2.GaussianBlur(frame, (0, 0), self.sigma, dst=self.blurred)
+        cv2.addWeighted(frame, 1.0 + self.amount, self.blurred, -self.amount, 0, dst=frame)
+
+
+class GammaStage(Stage):
+    """Gamma curve through a precomputed LUT"""
+
+    name = 'gamma'
+
+    def __init__(self, gamma=1.1, budget=0.002):
+        super().__init__(budget)
+        ramp = np.arange(256, dtype=np.float32) / 255.0
+        self.lut = np.clip(255.0 * ramp ** (1.0 / gamma), 0, 255).astype(np.uint8)
+
+    def apply(self, frame):
+        import cv2
+        cv2.LUT(frame, self.lut, dst=frame)
+
+
+STAGES = {
+    'white_balance': WhiteBalanceStage,
+    'clahe': ClaheStage,
+    'unsharp': UnsharpStage,
+    'gamma': GammaStage,
+}
+
+
+class EnhancementChain:
+    """Runs stages in order within a per-frame time budget"""
+
+    def __init__(self, stages, frame_budget=0.012, probe_every=30):
+        self.stages = list(stages)
+        self.frame_budget = frame_budget
+        self.probe_every = probe_every
+        self.frames = 0
+        self.buffer = None
+        self.scratch = None
+        self.timings = {stage.name: metrics.ENHANCE_STAGE_SECONDS.labels(stage=stage.name)
+                        for stage in self.stages}
+        self.skips = {stage.name: metrics.ENHANCE_STAGE_SKIPPED.labels(stage=stage.name)
+                      for stage in self.stages}
+
+    def process(self, frame, in_place=True):
+        """Enhance a BGR frame; pass in_place=False for frames the caller does not own"""
+        if not self.stages:
+            return frame
+        if not in_place:
+            if self.buffer is None or self.buffer.shape != frame.shape:
+                self.buffer = np.empty_like(frame)
+            np.copyto(self.buffer, frame)
+            frame = self.buffer
+
+        self.frames += 1
+        probing = self.frames % self.probe_every == 0
+        started = time.perf_counter()
+        probe_seconds = 0.0
+        for stage in self.stages:
+            elapsed = time.perf_counter() - started - probe_seconds
+            # Hysteresis: off when over budget, on again only with headroom
+            margin = 1.0 if stage.active else HEADROOM
+            stage.active = (stage.average <= margin * stage.budget
+                            and elapsed + stage.average <= margin * self.frame_budget)
+            if stage.active:
+                self.run(stage, frame)
+                continue
+            stage.skipped += 1
+            self.skips[stage.name].inc()
+            if probing:
+                # Re-measure on a copy of the frame so far; the displayed frame is left as it is
+                probe_started = time.perf_counter()
+                if self.scratch is None or self.scratch.shape != frame.shape:
+                    self.scratch = np.empty_like(frame)
+                np.copyto(self.scratch, frame)
+                self.run(stage, self.scratch)
+                probe_seconds += time.perf_counter() - probe_started
+        return frame
+
+    def run(self, stage, frame):
+        stage_started = time.perf_counter()
+        stage.apply(frame)
+        seconds = time.perf_counter() - stage_started
+        stage.record(seconds)
+        self.timings[stage.name].observe(seconds)
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
+
+
+def parse_stages(spec):
+    """'white_balance,clahe:2.0,gamma:1.1' -> stage instances (unknown names are an error)"""
+    stages = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, value = item.partition(':')
+        if name not in STAGES:
+            raise ValueError(f"Unknown enhancement stage '{name}' (choose from {', '.join(STAGES)})")
+        stages.append(STAGES[name](float(value)) if value else STAGES[name]())
+    return stages
+
+
+def chain_from_env():
+    """Chain configured by HARBOR_ENHANCE, or None when enhancement is off"""
+    spec = os.getenv('HARBOR_ENHANCE', '')
+    if not spec.strip():
+        return None
+    budget = float(os.getenv('HARBOR_ENHANCE_BUDGET_MS', '12')) / 1000.0
+    return EnhancementChain(parse_stages(spec), frame_budget=budget)
+
+
+def enhance_recordings():
+    return os.getenv('HARBOR_ENHANCE_RECORDINGS', '').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,47 @@
+"""
+HARBOR Diamond Viewer - Frame Hub
+Latest frame of each camera, published by the display as it draws them, so
+vision routines in the web server (autofocus, centering) can look at live
+frames without opening the cameras a second time.
+
+Published frames must not be modified afterwards; consumers only read them.
+"""
+
+import threading
+import time
+
+
+class FrameHub:
+    """Latest frame per camera index with a wait-for-newer primitive"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.frames = {}  # camera index -> (sequence, frame, monotonic time)
+
+    def publish(self, index, frame):
+        with self.condition:
+            seq = self.frames.get(index, (0, None, 0.0))[0] + 1
+            self.frames[index] = (seq, frame, time.monotonic())
+            self.condition.notify_all()
+
+    def latest(self, index, max_age=1.0):
+        """(sequence, frame) of the newest frame, or (0, None) if none is recent enough"""
+        with self.condition:
+            seq, frame, stamp = self.frames.get(index, (0, None, 0.0))
+        if frame is None or time.monotonic() - stamp > max_age:
+            return 0, None
+        return seq, frame
+
+    def wait_newer(self, index, seq, timeout=1.0):
+        """Block until a frame newer than `seq` arrives; (sequence, frame) or (0, None) on timeout"""
+        with self.condition:
+            arrived = self.condition.wait_for(
+                lambda: self.frames.get(index, (0,))[0] > seq, timeout)
+            if not arrived:
+                return 0, None
+            seq, frame, _ = self.frames[index]
+            return seq, frame
+
+
+# Process-wide hub: the display viewer and web server run in one process
+hub = FrameHub()
@@ -0,0 +1,300 @@
+"""
+HARBOR Diamond Viewer - Shared-Memory Frame Transport
+Optional mode (HARBOR_CAMERA_PROCESSES=1) where each camera is captured in
+its own process, out of reach of the GIL held by Qt, Flask/SocketIO and the
+recorder. Frames are published into a multiprocessing.shared_memory ring
+buffer and read in the main process as numpy views - no copy, no pickling.
+
+Ring layout (one shared memory block per camera):
+
+    header   frame counter (uint64) - number of the newest complete frame,
+             failure counter (uint64) - failed camera reads so far
+    slot i   sequence (uint64), height/width/channels (3 x uint32),
+             timestamp (float64), pixels (max_bytes)
+
+Frame n goes to slot n % slots. The slot sequence is a seqlock: it is odd
+(2n - 1) while the writer copies pixels in and becomes 2n once the frame is
+complete, so a reader can tell a finished frame from one being overwritten.
+"""
+
+import atexit
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+HEADER_BYTES = 64
+SLOT_HEADER_BYTES = 32
+DEFAULT_SLOTS = 4
+DEFAULT_MAX_BYTES = 1920 * 1080 * 3
+# A reader counts a camera process as failing after this many frame periods without a new frame
+STALL_PERIODS = 5
+
+
+class FrameRing:
+    """Single-writer, many-reader ring of frames in shared memory"""
+
+    def __init__(self, name=None, slots=DEFAULT_SLOTS, max_bytes=DEFAULT_MAX_BYTES, create=False):
+        self.slots = slots
+        self.max_bytes = max_bytes
+        size = HEADER_BYTES + slots * (SLOT_HEADER_BYTES + max_bytes)
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.name = self.shm.name
+
+        buf = self.shm.buf
+        self.counter = np.ndarray((1,), np.uint64, buffer=buf, offset=0)
+        self.failures = np.ndarray((1,), np.uint64, buffer=buf, offset=8)
+        self.seq, self.dims, self.stamp, self.pixels = [], [], [], []
+        for i in range(slots):
+            base = HEADER_BYTES + i * (SLOT_HEADER_BYTES + max_bytes)
+            self.seq.append(np.ndarray((1,), np.uint64, buffer=buf, offset=base))
+            self.dims.append(np.ndarray((3,), np.uint32, buffer=buf, offset=base + 8))
+            self.stamp.append(np.ndarray((1,), np.float64, buffer=buf, offset=base + 24))
+            self.pixels.append(np.ndarray((max_bytes,), np.uint8, buffer=buf, offset=base + SLOT_HEADER_BYTES))
+
+    def write(self, frame):
+        """Publish a frame (uint8, contiguous, at most max_bytes); returns its number"""
+        n = int(self.counter[0]) + 1
+        i = n % self.slots
+        self.seq[i][0] = 2 * n - 1
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        self.pixels[i][:frame.nbytes] = frame.reshape(-1)
+        self.dims[i][:] = (height, width, channels)
+        self.stamp[i][0] = time.time()
+        self.seq[i][0] = 2 * n
+        self.counter[0] = n
+        return n
+
+    def record_failure(self):
+        self.failures[0] += 1
+
+    def latest(self):
+        """(frame number, zero-copy view) of the newest complete frame, or (0, None)"""
+        # close() may run on another thread: work on references taken once, which keep the mapping alive
+        counter, seq, dims, pixels = self.counter, self.seq, self.dims, self.pixels
+        if counter is None or not seq or not dims or not pixels:
+            return 0, None  # closed: the camera process was restarted
+        n = int(counter[0])
+        if n == 0:
+            return 0, None
+        i = n % self.slots
+        if int(seq[i][0]) != 2 * n:
+            return 0, None  # writer lapped us while we looked
+        height, width, channels = (int(v) for v in dims[i])
+        view = pixels[i][:height * width * channels].reshape(height, width, channels)
+        return n, view
+
+    def intact(self, n):
+        """True while frame n has not been overwritten; check after using a view"""
+        seq = self.seq
+        if not seq:
+            return False
+        return int(seq[n % self.slots][0]) == 2 * n
+
+    def failed_reads(self):
+        """Failed camera reads so far, None once closed"""
+        failures = self.failures
+        return int(failures[0]) if failures is not None else None
+
+    def timestamp(self, n):
+        stamp = self.stamp
+        return float(stamp[n % self.slots][0]) if stamp else None
+
+    def close(self):
+        # Rebinds the fields, never clears them in place: a reader mid-latest() keeps the arrays it took
+        self.counter = self.failures = None
+        self.seq, self.dims, self.stamp, self.pixels = [], [], [], []
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # a reader still holds a view; the OS reclaims the mapping at exit
+
+    def unlink(self):
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _capture_main(index, ring_name, slots, max_bytes, ready, failed, stop, needed):
+    """Camera process: read frames and publish them into the ring until stopped"""
+    import cv2
+    from src.camera import open_device
+
+    ring = FrameRing(ring_name, slots, max_bytes)
+    cap = open_device(index)
+    opened = cap.isOpened()
+    if opened:
+        # The driver may have settled on a bigger mode than the profile asked for: ask for a bigger ring
+        size = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) * int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) * 3
+        if size > max_bytes:
+            needed.value = size
+            opened = False
+    if not opened:
+        cap.release()
+        failed.set()
+        ready.set()
+        ring.close()
+        return
+    ready.set()
+
+    try:
+        while not stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                ring.record_failure()  # readers count it (the display reopens the camera after enough)
+                time.sleep(0.05)
+                continue
+            if frame.nbytes > max_bytes:
+                ring.record_failure()  # the mode changed under us; reopening sizes a new ring
+                continue
+            ring.write(np.ascontiguousarray(frame))
+    finally:
+        cap.release()
+        ring.close()
+
+
+class CameraProcess:
+    """Owns one camera process and its ring buffer (created here, unlinked on stop)"""
+
+    def __init__(self, index, slots=DEFAULT_SLOTS, max_bytes=None):
+        from src.camera_profiles import camera_mode
+        self.index = index
+        self.slots = slots
+        # The process opens the camera in this mode (until the first frame shows what it really delivers)
+        self.mode = camera_mode(index)
+        # Slots hold exactly one frame of that mode, so frames are never scaled down to fit
+        self.max_bytes = max_bytes or self.mode['width'] * self.mode['height'] * 3
+        # spawn everywhere: the LattePanda runs Windows, and forking a Qt process is unsafe
+        self.context = multiprocessing.get_context('spawn')
+        self.needed = self.context.Value('q', 0)
+        self._prepare()
+
+    def _prepare(self):
+        self.ring = FrameRing(slots=self.slots, max_bytes=self.max_bytes, create=True)
+        self.ready = self.context.Event()
+        self.failed = self.context.Event()
+        self.stopped = self.context.Event()
+        self.process = self.context.Process(
+            target=_capture_main, name=f'camera-{self.index}', daemon=True,
+            args=(self.index, self.ring.name, self.slots, self.max_bytes,
+                  self.ready, self.failed, self.stopped, self.needed))
+
+    def start(self, timeout=15.0):
+        """Start the process and wait until the camera is open; returns True on success"""
+        self.process.start()
+        self.ready.wait(timeout)
+        if self.needed.value > self.max_bytes:
+            # Once more, with slots the size of the mode the driver really chose
+            self.process.join(timeout=3)
+            self.ring.close()
+            self.ring.unlink()
+            self.max_bytes = self.needed.value
+            self._prepare()
+            self.process.start()
+            self.ready.wait(timeout)
+        return self.is_open()
+
+    def is_open(self):
+        return self.ready.is_set() and not self.failed.is_set() and self.process.is_alive()
+
+    def stop(self):
+        self.stopped.set()
+        self.process.join(timeout=3)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.ring.close()
+        self.ring.unlink()
+
+
+class SharedFrameReader:
+    """cv2.VideoCapture-like view of a camera process (several readers may share one process)"""
+
+    def __init__(self, camera_process):
+        self.source = camera_process
+        self.ring = camera_process.ring
+        self.seq = 0
+        self.opened = camera_process.is_open()
+        self.last_new = time.monotonic()
+        self.failures_seen = (self.ring.failed_reads() or 0) if self.opened else 0
+
+    def isOpened(self):
+        return self.opened and self.source.is_open()
+
+    def read_new(self):
+        """(frame number, view) if a newer frame than the last one read exists, else (0, None)"""
+        n, frame = self.ring.latest()
+        if frame is None or n == self.seq:
+            return 0, None
+        self.seq = n
+        self.last_new = time.monotonic()
+        return n, frame
+
+    def stalled(self, periods=STALL_PERIODS):
+        """True if the camera process failed a read since the last call, or sent no new frame for `periods` frames"""
+        failures = self.ring.failed_reads()
+        if failures is None:
+            return True  # ring closed: the camera process was restarted
+        failed, self.failures_seen = failures > self.failures_seen, failures
+        return failed or time.monotonic() - self.last_new > periods / float(self.source.mode['fps'] or 30)
+
+    def read(self, timeout=1.0):
+        """Blocks for the next frame like cv2.VideoCapture.read(); the frame is a shared view"""
+        deadline = time.monotonic() + timeout
+        while self.isOpened():
+            n, frame = self.read_new()
+            if frame is not None:
+                return True, frame
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.002)
+        return False, None
+
+    def get(self, prop):
+        import cv2
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            _, frame = self.ring.latest()
+            if frame is not None:
+                height, width = frame.shape[:2]
+            else:
+                height, width = self.source.mode['height'], self.source.mode['width']
+            return float(width if prop == cv2.CAP_PROP_FRAME_WIDTH else height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.source.mode['fps'])
+        return 0.0
+
+    def set(self, prop, value):
+        return False  # the mode is fixed when the camera process starts
+
+    def release(self):
+        self.opened = False  # the process keeps running for other readers
+
+
+_processes = {}
+_processes_lock = threading.Lock()
+
+
+def shared_capture(index, restart=False):
+    """Reader for camera `index`, starting its process on first use; `restart` stops a running one first"""
+    with _processes_lock:
+        camera_process = _processes.get(index)
+        if restart and camera_process is not None:
+            # Readers of the old process see it closed, and reopen onto the new one
+            camera_process.stop()
+            camera_process = None
+        if camera_process is None or not camera_process.process.is_alive():
+            camera_process = CameraProcess(index)
+            camera_process.start()
+            _processes[index] = camera_process
+    return SharedFrameReader(camera_process)
+
+
+@atexit.register
+def stop_camera_processes():
+    with _processes_lock:
+        for camera_process in _processes.values():
+            camera_process.stop()
+        _processes.clear()
@@ -0,0 +1,161 @@
+"""
+HARBOR Diamond Viewer - Logging
+Structured logging kept off the hot paths: callers only enqueue records, a
+background listener thread writes them to the console and keeps the most
+recent events in an in-memory ring buffer for the diagnostics endpoint.
+That endpoint needs no login, so customer e-mail addresses and phone numbers
+are masked in the buffer (the console keeps them for the shop's own logs).
+
+Levels are configured from the environment, no code changes needed:
+    HARBOR_LOG_LEVEL=INFO                                  (default for everything)
+    HARBOR_LOG_LEVELS=harbor.serial.commands=WARNING,harbor.web=DEBUG
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+
+
+RING_BUFFER_SIZE = int(os.getenv('HARBOR_LOG_BUFFER', '1000'))
+# Fields that always hold a customer's address or number, whatever it looks like
+CONTACT_FIELDS = ('to', 'email', 'phone')
+EMAIL = re.compile(r'([A-Za-z0-9._%+-])[A-Za-z0-9._%+-]*@([A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)+)')
+# International (+44 20 7946 0958) or separated (555-123-4567) numbers; bare digit runs are ids
+PHONE = re.compile(r'\+\d[\d\s().-]{6,}\d|\(?\b\d{3}\)?[\s.-]\d{3}[\s.-]\d{4}\b')
+
+_listener = None
+_ring_buffer = None
+_log_queue = None
+_configure_lock = threading.Lock()
+
+
+def mask_phone(match):
+    digits = re.sub(r'\D', '', match.group(0))
+    return f"***{digits[-2:]}"
+
+
+def redact(text):
+    """Text with e-mail addresses (j***@example.com) and phone numbers (***58) masked"""
+    return PHONE.sub(mask_phone, EMAIL.sub(r'\1***@\2', text))
+
+
+def redact_contact(value):
+    """A value known to be an address or number, masked even if the patterns miss it"""
+    text = str(value)
+    masked = redact(text)
+    if masked != text or not text:
+        return masked
+    return f"***{text[-2:]}"
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent records as plain dicts, with customer contact details masked"""
+
+    def __init__(self, capacity=RING_BUFFER_SIZE):
+        super().__init__()
+        self.events = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.events.append({
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': redact(record.getMessage()),
+            'fields': {key: self.clean(key, value) for key, value in (getattr(record, 'fields', None) or {}).items()},
+        })
+
+    @staticmethod
+    def clean(key, value):
+        if value is None:
+            return None
+        if key in CONTACT_FIELDS:
+            return redact_contact(value)
+        if isinstance(value, (int, float, bool)):
+            return value
+        return redact(str(value))
+
+    def recent(self, limit=100, min_level=logging.NOTSET, logger_prefix=None):
+        """Newest-last list of up to `limit` events at or above `min_level`"""
+        events = list(self.events)
+        if min_level:
+            events = [e for e in events if logging.getLevelName(e['level']) >= min_level]
+        if logger_prefix:
+            events = [e for e in events if e['logger'].startswith(logger_prefix)]
+        return events[-limit:] if limit else events
+
+
+class StructuredFormatter(logging.Formatter):
+    """`time level logger message key=value ...` console lines"""
+
+    def format(self, record):
+        line = (f"{time.strftime('%H:%M:%S', time.localtime(record.created))}"
+                f".{int(record.msecs):03d} {record.levelname:<7} {record.name} {record.getMessage()}")
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, level = item.partition('=')
+        if level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """Install the queue handler on the `harbor` logger (safe to call more than once)"""
+    global _listener, _ring_buffer, _log_queue
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        root = logging.getLogger('harbor')
+        root.setLevel(os.getenv('HARBOR_LOG_LEVEL', 'INFO').upper())
+        for name, level in _parse_levels(os.getenv('HARBOR_LOG_LEVELS', '')).items():
+            logging.getLogger(name).setLevel(level)
+
+        console = logging.StreamHandler()
+        console.setFormatter(StructuredFormatter())
+        _ring_buffer = RingBufferHandler()
+
+        _log_queue = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(_log_queue))
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(_log_queue, console, _ring_buffer)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def get_logger(name):
+    """Logger under the `harbor` namespace, e.g. get_logger('serial')"""
+    return logging.getLogger(f"harbor.{name}")
+
+
+def log_event(logger, level, message, **fields):
+    """Log with structured fields; skipped entirely when the level is filtered out"""
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={'fields': fields})
+
+
+def queue_depth():
+    """Records waiting for the background writer"""
+    return _log_queue.qsize() if _log_queue is not None else 0
+
+
+def recent_events(limit=100, min_level=logging.NOTSET, logger_prefix=None):
+    """Events held in the ring buffer (empty until configure_logging() has run)"""
+    if _ring_buffer is None:
+        return []
+    return _ring_buffer.recent(limit, min_level, logger_prefix)
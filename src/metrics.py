@@ -0,0 +1,242 @@
+"""
+HARBOR Diamond Viewer - Metrics
+Prometheus-style counters, gauges and histograms served at /metrics in the
+text exposition format.
+
+The hot paths (camera reads, serial writes, Socket.IO handlers) must not
+contend on a lock, so counters and histograms keep one cell per thread:
+an update only touches the calling thread's own cell and the scrape sums
+them. Locks are only taken the first time a label set or thread is seen.
+"""
+
+import bisect
+import threading
+
+
+class _ThreadCells:
+    """Per-thread list cells; only the owning thread ever writes to its cell"""
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = {}
+        self.lock = threading.Lock()
+
+    def cell(self):
+        ident = threading.get_ident()
+        cell = self.cells.get(ident)
+        if cell is None:
+            with self.lock:
+                cell = self.cells.setdefault(ident, [0] * self.size)
+        return cell
+
+    def totals(self):
+        with self.lock:
+            cells = list(self.cells.values())
+        return [sum(values) for values in zip(*cells)] if cells else [0] * self.size
+
+
+class _CounterChild:
+    def __init__(self):
+        self.cells = _ThreadCells(1)
+
+    def inc(self, amount=1):
+        self.cells.cell()[0] += amount
+
+    def value(self):
+        return self.cells.totals()[0]
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0.0
+
+    def set(self, value):
+        self._value = value  # single store, atomic under the GIL
+
+    def value(self):
+        return self._value
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket, then sum and count
+        self.cells = _ThreadCells(len(buckets) + 2)
+
+    def observe(self, value):
+        cell = self.cells.cell()
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            cell[index] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def value(self):
+        return self.cells.totals()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self.lock = threading.Lock()
+        if not self.labelnames:
+            self.labels()  # unlabelled metrics are exported from the start, at zero
+        REGISTRY.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        """Child metric for one label set, e.g. counter.labels(camera='Top View').inc()"""
+        key = tuple(str(v) for v in values) if values else tuple(str(kwargs[n]) for n in self.labelnames)
+        child = self.children.get(key)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(key, self._new_child())
+        return child
+
+    def _label_text(self, key, extra=None):
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ''
+        escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+        return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            children = list(self.children.items())
+        for key, child in children:
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{self._label_text(key)} {child.value()}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=None):
+        self.buckets = tuple(sorted(buckets or DEFAULT_BUCKETS))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _render_child(self, key, child):
+        totals = child.value()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, totals):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{self._label_text(key, ('le', repr(float(bound))))} {cumulative}")
+        lines.append(f"{self.name}_bucket{self._label_text(key, ('le', '+Inf'))} {totals[-1]}")
+        lines.append(f"{self.name}_sum{self._label_text(key)} {totals[-2]}")
+        lines.append(f"{self.name}_count{self._label_text(key)} {totals[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            self.metrics.append(metric)
+
+    def render(self):
+        """Whole registry in Prometheus text exposition format (version 0.0.4)"""
+        with self.lock:
+            metrics = list(self.metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+# --- Cameras (display) ---
+CAMERA_FRAMES = Counter('harbor_camera_frames_total', 'Frames read successfully', ['camera'])
+CAMERA_READ_FAILURES = Counter('harbor_camera_read_failures_total', 'Failed camera reads', ['camera'])
+CAMERA_READ_SECONDS = Histogram('harbor_camera_read_seconds', 'Time spent in camera.read()', ['camera'])
+CAMERA_FPS = Gauge('harbor_camera_fps', 'Achieved display frame rate over the last second', ['camera'])
+CAMERA_DUPLICATES = Counter('harbor_camera_duplicate_frames_total', 'Reads that returned the previous frame again',
+                            ['camera'])
+CAMERA_REOPENS = Counter('harbor_camera_reopens_total', 'Cameras reopened after repeated read failures', ['camera'])
+
+# --- Enhancement ---
+ENHANCE_STAGE_SECONDS = Histogram('harbor_enhance_stage_seconds', 'Time per enhancement stage', ['stage'])
+ENHANCE_STAGE_SKIPPED = Counter('harbor_enhance_stage_skipped_total', 'Stages skipped to stay in the frame budget',
+                                ['stage'])
+
+# --- Recorder ---
+RECORDINGS = Counter('harbor_recordings_total', 'Finished recordings by result', ['result'])
+RECORDINGS_ACTIVE = Gauge('harbor_recordings_active', 'Recordings in progress')
+RECORDING_QUEUE = Gauge('harbor_recording_queue', 'Recordings waiting for a free slot', ['station'])
+RECORDING_SECONDS = Histogram('harbor_recording_duration_seconds', 'Wall time of each recording',
+                              buckets=(1, 5, 10, 20, 29, 30, 31, 35, 45, 60))
+RECORDING_FRAMES = Counter('harbor_recording_frames_total', 'Frames written to recordings')
+RECORDING_FPS = Gauge('harbor_recording_fps', 'Frames per second achieved by the last recording')
+RENDITIONS = Counter('harbor_renditions_total', 'Playback rendition ladders built, by result', ['result'])
+RENDITION_SECONDS = Histogram('harbor_rendition_seconds', 'Time to encode and package one ladder',
+                              buckets=(5, 10, 20, 30, 45, 60, 90, 120, 180, 300))
+
+SNAPSHOT_SECONDS = Histogram('harbor_snapshot_seconds', 'Snapshot request latency (capture to response)', ['format'])
+
+# --- Arduino serial ---
+SERIAL_COMMANDS = Counter('harbor_serial_commands_total', 'Commands written to the Arduino', ['command'])
+SERIAL_ERRORS = Counter('harbor_serial_errors_total', 'Serial failures by kind', ['kind'])
+SERIAL_WRITE_SECONDS = Histogram('harbor_serial_write_seconds', 'Time to write one command')
+
+# --- Web ---
+SOCKETIO_EVENTS = Counter('harbor_socketio_events_total', 'Socket.IO events handled', ['event'])
+SOCKETIO_EVENT_SECONDS = Histogram('harbor_socketio_event_seconds', 'Socket.IO handler time', ['event'])
+HTTP_REQUESTS = Counter('harbor_http_requests_total', 'HTTP requests', ['endpoint', 'status'])
+HTTP_REQUEST_SECONDS = Histogram('harbor_http_request_seconds', 'HTTP request handling time', ['endpoint'])
+
+# --- Sharing ---
+SHARE_DELIVERIES = Counter('harbor_share_deliveries_total', 'Share deliveries by channel and outcome',
+                           ['channel', 'outcome'])
+
+# --- Uploads ---
+UPLOADS = Counter('harbor_uploads_total', 'Upload attempts by result', ['result'])
+UPLOAD_BYTES = Counter('harbor_upload_bytes_total', 'Bytes sent to the central store')
+UPLOAD_QUEUE = Gauge('harbor_upload_queue', 'Files waiting to be uploaded')
+UPLOAD_SECONDS = Histogram('harbor_upload_seconds', 'Wall time of each completed upload',
+                           buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800))
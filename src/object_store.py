@@ -0,0 +1,207 @@
+"""
+HARBOR Diamond Viewer - Stand-in Object Store
+Local server for the resumable chunk protocol used by src.upload, so the
+upload agent can be tried and tested without a cloud account.
+
+    POST /uploads                    {"key", "size", "sha256"} -> {"upload_id", "offset"}
+    PUT  /uploads/<id>?offset=N      chunk body, X-Chunk-SHA256 -> {"offset"}
+    POST /uploads/<id>/complete      verifies size and SHA-256 -> {"key"}
+    GET  /objects/<key>              the stored file
+
+A repeated POST /uploads for the same key and checksum returns the same
+upload with the bytes stored so far, which is how clients resume.
+
+Usage:
+    python -m src.object_store --root object_store --port 9000 --fail-rate 0.1
+    HARBOR_UPLOAD_URL=http://127.0.0.1:9000 python web_server.py
+"""
+
+import argparse
+import hashlib
+import json
+import mimetypes
+import os
+import random
+import re
+import shutil
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.upload import file_sha256
+
+UPLOAD_PATH = re.compile(r'^/uploads/([0-9a-f]{32})(/complete)?$')
+
+
+class ObjectStore:
+    """Partial uploads in <root>/.uploads, finished objects in <root>/objects"""
+
+    def __init__(self, root):
+        self.root = root
+        self.partial_dir = os.path.join(root, '.uploads')
+        self.objects_dir = os.path.join(root, 'objects')
+        os.makedirs(self.partial_dir, exist_ok=True)
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.lock = threading.Lock()
+
+    def _paths(self, upload_id):
+        base = os.path.join(self.partial_dir, upload_id)
+        return f"{base}.part", f"{base}.json"
+
+    def object_path(self, key):
+        """Path of an object; keys may not escape the objects directory"""
+        root = os.path.abspath(self.objects_dir)
+        path = os.path.abspath(os.path.join(root, key))
+        if not path.startswith(root + os.sep):
+            raise ValueError(f"Invalid key: {key}")
+        return path
+
+    def begin(self, key, size, sha256):
+        self.object_path(key)
+        upload_id = hashlib.sha256(f"{key}:{sha256}".encode()).hexdigest()[:32]
+        part_path, meta_path = self._paths(upload_id)
+        with self.lock:
+            if not os.path.exists(meta_path):
+                with open(meta_path, 'w', encoding='utf-8') as f:
+                    json.dump({'key': key, 'size': size, 'sha256': sha256}, f)
+                open(part_path, 'wb').close()
+            return {'upload_id': upload_id, 'offset': os.path.getsize(part_path)}
+
+    def put_chunk(self, upload_id, offset, data, chunk_sha256):
+        part_path, meta_path = self._paths(upload_id)
+        if not os.path.exists(meta_path):
+            return 404, {'error': 'Unknown upload'}
+        if hashlib.sha256(data).hexdigest() != chunk_sha256:
+            return 400, {'error': 'Chunk checksum mismatch'}
+        with self.lock:
+            stored = os.path.getsize(part_path)
+            if offset != stored:
+                return 409, {'error': 'Offset mismatch', 'offset': stored}
+            with open(part_path, 'ab') as f:
+                f.write(data)
+            return 200, {'offset': stored + len(data)}
+
+    def complete(self, upload_id):
+        part_path, meta_path = self._paths(upload_id)
+        with self.lock:
+            if not os.path.exists(meta_path):
+                return 404, {'error': 'Unknown upload'}
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if os.path.getsize(part_path) != meta['size'] or file_sha256(part_path) != meta['sha256']:
+                # Corrupt: start over rather than keep appending to bad bytes
+                os.remove(part_path)
+                os.remove(meta_path)
+                return 409, {'error': 'File checksum mismatch'}
+            path = self.object_path(meta['key'])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            shutil.move(part_path, path)
+            os.remove(meta_path)
+            return 200, {'key': meta['key']}
+
+
+class StoreHandler(BaseHTTPRequestHandler):
+    store = None
+    token = None
+    fail_rate = 0.0
+
+    def _reply(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self):
+        if self.token and self.headers.get('Authorization') != f"Bearer {self.token}":
+            self._reply(401, {'error': 'Unauthorized'})
+            return False
+        return True
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        path = urllib.parse.urlparse(self.path).path
+        if path == '/uploads':
+            request = json.loads(self._body() or b'{}')
+            try:
+                self._reply(200, self.store.begin(request['key'], int(request['size']), request['sha256']))
+            except (KeyError, ValueError) as e:
+                self._reply(400, {'error': str(e)})
+            return
+        match = UPLOAD_PATH.match(path)
+        if match and match.group(2):
+            self._reply(*self.store.complete(match.group(1)))
+        else:
+            self._reply(404, {'error': 'Not found'})
+
+    def do_PUT(self):
+        if not self._authorized():
+            return
+        parsed = urllib.parse.urlparse(self.path)
+        match = UPLOAD_PATH.match(parsed.path)
+        if not match or match.group(2):
+            self._reply(404, {'error': 'Not found'})
+            return
+        data = self._body()
+        offset = int(urllib.parse.parse_qs(parsed.query).get('offset', ['0'])[0])
+        if random.random() < self.fail_rate:
+            # Simulated dropped connection: keep half the chunk, as a cut-off transfer would
+            partial = data[:len(data) // 2]
+            self.store.put_chunk(match.group(1), offset, partial, hashlib.sha256(partial).hexdigest())
+            self._reply(503, {'error': 'Injected failure'})
+            return
+        self._reply(*self.store.put_chunk(match.group(1), offset, data, self.headers.get('X-Chunk-SHA256')))
+
+    def do_GET(self):
+        path = urllib.parse.unquote(urllib.parse.urlparse(self.path).path)
+        if not path.startswith('/objects/'):
+            self._reply(404, {'error': 'Not found'})
+            return
+        try:
+            file_path = self.store.object_path(path[len('/objects/'):])
+        except ValueError:
+            file_path = None
+        if not file_path or not os.path.isfile(file_path):
+            self._reply(404, {'error': 'Not found'})
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', mimetypes.guess_type(file_path)[0] or 'application/octet-stream')
+        self.send_header('Content-Length', str(os.path.getsize(file_path)))
+        self.end_headers()
+        with open(file_path, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the central recording store')
+    parser.add_argument('--root', default='object_store', help='directory for uploads and objects')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--token', default=None, help='require this bearer token')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='probability of cutting off a chunk')
+    args = parser.parse_args()
+
+    StoreHandler.store = ObjectStore(args.root)
+    StoreHandler.token = args.token
+    StoreHandler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer((args.host, args.port), StoreHandler)
+    print(f"Stand-in object store on http://{args.host}:{args.port} (files in {os.path.abspath(args.root)})")
+    print(f"Run the server with: HARBOR_UPLOAD_URL=http://{args.host}:{args.port} python web_server.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+HARBOR Diamond Viewer - Preset Positions
+Named camera/stage positions stored on the server and replayed with GOTO
+"""
+
+import json
+import logging
+import os
+import threading
+from src.log import get_logger, log_event
+
+logger = get_logger('presets')
+
+
+class PresetStore:
+    """Thread-safe store of named positions persisted to a JSON file"""
+    
+    def __init__(self, path='presets.json'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.presets = self._load()
+    
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            log_event(logger, logging.WARNING, "Could not read presets", path=self.path, error=e)
+            return {}
+    
+    def _save(self):
+        # Write to a temp file first so a crash never leaves a half-written file
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.presets, f, indent=2)
+        os.replace(tmp_path, self.path)
+    
+    def list(self):
+        with self.lock:
+            return dict(self.presets)
+    
+    def get(self, name):
+        with self.lock:
+            return self.presets.get(name)
+    
+    def save(self, name, x, y, theta):
+        """Create or overwrite a preset, returns the stored position"""
+        position = {'x': int(x), 'y': int(y), 'theta': int(theta) % 360}
+        with self.lock:
+            self.presets[name] = position
+            self._save()
+        return position
+    
+    def delete(self, name):
+        with self.lock:
+            if self.presets.pop(name, None) is None:
+                return False
+            self._save()
+        return True
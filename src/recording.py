@@ -0,0 +1,118 @@
+"""
+HARBOR Diamond Viewer - Recording Scheduler
+Admission control for customer recordings. At most `max_active` recordings
+run at once and at most `max_queued` wait behind them; beyond that a request
+is refused with an estimated wait instead of starting another thread. A
+second request for a session that is queued, recording or already recorded
+joins it rather than recording twice.
+
+Each station has its own scheduler (src/stations.py): its slots and queue
+belong to its own top camera, so a busy bench never holds up another.
+Recordings of the same camera share its warm CameraOwner (src/camera_owner.py),
+so two customers recording at the same moment never fight over the device.
+"""
+
+import collections
+import logging
+import math
+import threading
+
+from src import metrics
+from src.log import get_logger, log_event
+
+logger = get_logger('recorder')
+
+
+class QueueFull(Exception):
+    """No recording slot and the queue is full"""
+
+    def __init__(self, queued, retry_after):
+        super().__init__(f"{queued} recordings already waiting")
+        self.queued = queued
+        self.retry_after = retry_after
+
+
+class RecordingJob:
+    def __init__(self, session_id, args):
+        self.session_id = session_id
+        self.args = args
+        self.state = 'queued'     # queued -> recording -> complete / failed
+        self.done = threading.Event()
+
+
+class RecordingScheduler:
+    """Bounded queue in front of a fixed number of recording threads"""
+
+    def __init__(self, run, max_active=2, max_queued=4, expected_seconds=30, keep_finished=100, name=''):
+        self.run = run
+        self.name = name
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.expected_seconds = expected_seconds
+        self.keep_finished = keep_finished
+        self.lock = threading.Lock()
+        self.pending = collections.deque()
+        self.jobs = collections.OrderedDict()  # session_id -> RecordingJob, oldest first
+        self.active = 0
+
+    def submit(self, session_id, *args):
+        """Start or queue `run(session_id, *args)` (truthy on success); returns (job, joined). Raises QueueFull."""
+        with self.lock:
+            job = self.jobs.get(session_id)
+            if job is not None and job.state != 'failed':
+                return job, True
+            if self.active >= self.max_active and len(self.pending) >= self.max_queued:
+                metrics.RECORDINGS.labels(result='rejected').inc()
+                raise QueueFull(len(self.pending), self.estimated_start(len(self.pending) + 1))
+
+            job = RecordingJob(session_id, args)
+            self.jobs.pop(session_id, None)
+            self.jobs[session_id] = job
+            self._trim()
+            if self.active < self.max_active:
+                self._start(job)
+            else:
+                self.pending.append(job)
+            metrics.RECORDING_QUEUE.labels(station=self.name).set(len(self.pending))
+        return job, False
+
+    def position(self, job):
+        """0 while recording or finished, otherwise 1-based place in the queue"""
+        with self.lock:
+            try:
+                return self.pending.index(job) + 1
+            except ValueError:
+                return 0
+
+    def estimated_start(self, position):
+        """Seconds until the job at queue `position` starts, if every slot runs a full recording"""
+        return math.ceil(position / self.max_active) * self.expected_seconds
+
+    def get(self, session_id):
+        with self.lock:
+            return self.jobs.get(session_id)
+
+    def _trim(self):
+        finished = [sid for sid, job in self.jobs.items() if job.state in ('complete', 'failed')]
+        for sid in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[sid]
+
+    def _start(self, job):
+        # Called with the lock held
+        job.state = 'recording'
+        self.active += 1
+        threading.Thread(target=self._run, args=(job,), name=f'record-{job.session_id}', daemon=True).start()
+
+    def _run(self, job):
+        try:
+            state = 'complete' if self.run(job.session_id, *job.args) else 'failed'
+        except Exception as e:
+            log_event(logger, logging.ERROR, "Recording crashed", session_id=job.session_id, error=e)
+            state = 'failed'
+        with self.lock:
+            job.state = state
+            self.active -= 1
+            if self.pending:
+                self._start(self.pending.popleft())
+            metrics.RECORDING_QUEUE.labels(station=self.name).set(len(self.pending))
+        job.done.set()
@@ -0,0 +1,182 @@
+"""
+HARBOR Diamond Viewer - Playback Renditions
+After a recording is stitched, a background packager re-encodes it into a
+small ladder of renditions (1080p/720p/480p by default, never above the
+camera's own size) and packages them as HLS with a master playlist:
+
+    recordings/<session_id>/abr/master.m3u8
+    recordings/<session_id>/abr/720p/index.m3u8 + init.mp4 + seg_*.m4s
+    recordings/<session_id>/abr/720p.mp4   (progressive copy for players without HLS)
+
+Every rendition has a keyframe on the same frames, so a player can switch
+between them at any segment boundary. All renditions come from one decode
+of the source, and packaging only copies the encoded video.
+
+Needs ffmpeg (on the PATH or at HARBOR_FFMPEG). Without it, customers get
+the single MP4 as before.
+"""
+
+import logging
+import os
+import queue
+import subprocess
+import threading
+import time
+
+from src import metrics
+from src.log import get_logger, log_event
+from src.segments import ffmpeg_path, segment_seconds
+
+logger = get_logger('recorder')
+
+MASTER = 'master.m3u8'
+DEFAULT_HEIGHTS = (1080, 720, 480)
+# Roughly 5 Mbit/s at 1080p, scaled by pixel count
+BITS_PER_PIXEL = 2.4
+MIN_KBPS = 400
+# The rendition a player starts on, so the first segment arrives quickly on a slow phone
+START_HEIGHT = 720
+
+
+def rendition_heights():
+    """HARBOR_RENDITIONS, e.g. "1080,720,480" """
+    value = os.getenv('HARBOR_RENDITIONS')
+    if not value:
+        return DEFAULT_HEIGHTS
+    return tuple(sorted({int(part) for part in value.split(',') if part.strip()}, reverse=True))
+
+
+def plan_ladder(width, height, heights):
+    """Renditions for a width x height source: no upscaling, even dimensions, bitrate by pixel count"""
+    ladder = []
+    for target in [h for h in heights if h <= height] or [height]:
+        target -= target % 2
+        scaled_width = int(round(width * target / height / 2.0)) * 2
+        kbps = max(MIN_KBPS, int(round(scaled_width * target * BITS_PER_PIXEL / 1000)))
+        # H.264 Main profile at the lowest level that fits the frame size
+        level = 30 if target <= 480 else 31 if target <= 720 else 40
+        ladder.append({
+            'name': f'{target}p',
+            'width': scaled_width,
+            'height': target,
+            'kbps': kbps,
+            'level': level,
+            'codecs': f'avc1.4d40{level:02x}',
+        })
+    return ladder
+
+
+def encode_command(ffmpeg, source, directory, ladder, fps, seconds):
+    """One ffmpeg run: decode once, split, encode every rendition with aligned keyframes"""
+    gop = str(max(1, int(round(fps * seconds))))
+    splits = ''.join(f'[v{i}]' for i in range(len(ladder)))
+    scales = ';'.join(f"[v{i}]scale={r['width']}:{r['height']}[o{i}]" for i, r in enumerate(ladder))
+    command = [ffmpeg, '-loglevel', 'error', '-y', '-i', source,
+               '-filter_complex', f'[0:v]split={len(ladder)}{splits};{scales}']
+    for i, rendition in enumerate(ladder):
+        kbps = rendition['kbps']
+        command += [
+            '-map', f'[o{i}]', '-an',
+            '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+            '-profile:v', 'main', '-level:v', f"{rendition['level'] / 10:.1f}",
+            '-b:v', f'{kbps}k', '-maxrate', f'{int(kbps * 1.1)}k', '-bufsize', f'{kbps * 2}k',
+            '-g', gop, '-keyint_min', gop, '-sc_threshold', '0',
+            '-movflags', '+faststart',
+            os.path.join(directory, f"{rendition['name']}.mp4"),
+        ]
+    return command
+
+
+def package_command(ffmpeg, source, directory, seconds):
+    """Copy an encoded rendition into a VOD playlist of fMP4 segments"""
+    return [ffmpeg, '-loglevel', 'error', '-y', '-i', source, '-c', 'copy',
+            '-f', 'hls', '-hls_time', str(seconds), '-hls_playlist_type', 'vod',
+            '-hls_segment_type', 'fmp4', '-hls_fmp4_init_filename', 'init.mp4',
+            '-hls_segment_filename', os.path.join(directory, 'seg_%05d.m4s'),
+            os.path.join(directory, 'index.m3u8')]
+
+
+def master_playlist(ladder, fps):
+    """Master playlist text; the START_HEIGHT rendition (or the nearest below it) is listed first"""
+    start = max((r for r in ladder if r['height'] <= START_HEIGHT), key=lambda r: r['height'], default=ladder[-1])
+    lines = ['#EXTM3U', '#EXT-X-VERSION:7', '#EXT-X-INDEPENDENT-SEGMENTS']
+    for rendition in [start] + [r for r in ladder if r is not start]:
+        lines.append(
+            f"#EXT-X-STREAM-INF:BANDWIDTH={rendition['peak_bps']},"
+            f"AVERAGE-BANDWIDTH={rendition['average_bps']},"
+            f"RESOLUTION={rendition['width']}x{rendition['height']},"
+            f"FRAME-RATE={fps:.3f},CODECS=\"{rendition['codecs']}\"")
+        lines.append(f"{rendition['name']}/index.m3u8")
+    return '\n'.join(lines) + '\n'
+
+
+def build_renditions(ffmpeg, source, directory, width, height, fps, duration, heights, seconds):
+    """Encode and package the ladder into `directory`; returns the renditions (with their files), lowest last"""
+    os.makedirs(directory, exist_ok=True)
+    ladder = plan_ladder(width, height, heights)
+    subprocess.run(encode_command(ffmpeg, source, directory, ladder, fps, seconds),
+                   capture_output=True, check=True)
+    for rendition in ladder:
+        mp4 = os.path.join(directory, f"{rendition['name']}.mp4")
+        rendition_dir = os.path.join(directory, rendition['name'])
+        os.makedirs(rendition_dir, exist_ok=True)
+        subprocess.run(package_command(ffmpeg, mp4, rendition_dir, seconds), capture_output=True, check=True)
+        rendition['mp4'] = mp4
+        rendition['playlist'] = os.path.join(rendition_dir, 'index.m3u8')
+        # Measured average; the advertised peak is the encoder's -maxrate (and never below the average)
+        rendition['average_bps'] = int(os.path.getsize(mp4) * 8 / max(duration, 1e-3))
+        rendition['peak_bps'] = max(rendition['kbps'] * 1100, rendition['average_bps'])
+
+    tmp_path = os.path.join(directory, f'{MASTER}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(master_playlist(ladder, fps))
+    os.replace(tmp_path, os.path.join(directory, MASTER))
+    return ladder
+
+
+class RenditionPackager:
+    """One background worker, so packaging never holds up a recording slot"""
+
+    def __init__(self, on_done, ffmpeg=None, heights=None, seconds=None):
+        self.on_done = on_done
+        self.ffmpeg = ffmpeg or ffmpeg_path()
+        self.heights = heights or rendition_heights()
+        self.seconds = seconds or segment_seconds()
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.ffmpeg)
+
+    def submit(self, session_id, source, directory, width, height, fps, duration):
+        """Queue a recording; on_done(session_id, renditions) follows, with [] if packaging failed"""
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._work, name='renditions', daemon=True)
+                self.thread.start()
+        self.jobs.put((session_id, source, directory, width, height, fps, duration))
+
+    def _work(self):
+        while True:
+            session_id, source, directory, width, height, fps, duration = self.jobs.get()
+            started = time.monotonic()
+            try:
+                renditions = build_renditions(self.ffmpeg, source, directory, width, height, fps,
+                                              duration, self.heights, self.seconds)
+                elapsed = time.monotonic() - started
+                metrics.RENDITIONS.labels(result='complete').inc()
+                metrics.RENDITION_SECONDS.observe(elapsed)
+                log_event(logger, logging.INFO, "Renditions ready", session_id=session_id,
+                          renditions=[r['name'] for r in renditions], seconds=round(elapsed, 1))
+            except (OSError, subprocess.CalledProcessError) as e:
+                stderr = getattr(e, 'stderr', None)
+                metrics.RENDITIONS.labels(result='failed').inc()
+                log_event(logger, logging.ERROR, "Could not build renditions", session_id=session_id,
+                          error=stderr.decode(errors='replace')[-300:] if stderr else e)
+                renditions = []
+            try:
+                self.on_done(session_id, renditions)
+            except Exception as e:
+                log_event(logger, logging.ERROR, "Rendition callback failed", session_id=session_id, error=e)
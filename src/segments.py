@@ -0,0 +1,254 @@
+"""
+HARBOR Diamond Viewer - Segmented Recording
+Writes a recording as short segments plus a playlist that grows while the
+camera is still capturing. Each segment is final once it is listed, so the
+player and the upload agent can start before the recording ends, and a
+crash leaves everything up to the last listed segment usable.
+
+With ffmpeg on the PATH (or at HARBOR_FFMPEG), frames are piped to ffmpeg.
+It encodes H.264 into an HLS event playlist of fragmented-MP4 segments that
+browsers play while the playlist grows. Without ffmpeg (or when ffmpeg
+gives up before its first segment, e.g. a build without libx264), OpenCV
+closes a self-contained MP4 every HARBOR_SEGMENT_SECONDS and the playlist
+lists those files. That playlist is for the upload agent and for stitching the final
+file; native HLS players cannot play it.
+
+Either way, `finish()` produces the single <session_id>.mp4 that share
+links have always pointed to.
+"""
+
+import logging
+import math
+import os
+import shutil
+import subprocess
+
+from src.log import get_logger, log_event
+
+logger = get_logger('recorder')
+
+PLAYLIST = 'index.m3u8'
+
+# Content types for serving a recording's directory
+SEGMENT_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.m4s': 'video/iso.segment',
+    '.mp4': 'video/mp4',
+}
+
+
+def ffmpeg_path():
+    return os.getenv('HARBOR_FFMPEG') or shutil.which('ffmpeg')
+
+
+def segment_seconds():
+    return float(os.getenv('HARBOR_SEGMENT_SECONDS', '2'))
+
+
+def playlist_entries(path):
+    """File names listed in an HLS playlist (the init segment first), in order"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    entries = []
+    for line in lines:
+        if line.startswith('#EXT-X-MAP:') and 'URI="' in line:
+            entries.append(line.split('URI="', 1)[1].split('"', 1)[0])
+        elif line and not line.startswith('#'):
+            entries.append(line)
+    return entries
+
+
+class FfmpegHlsWriter:
+    """Pipes BGR frames into ffmpeg, which writes H.264 fMP4 segments and an event playlist"""
+
+    kind = 'hls'
+
+    def __init__(self, directory, width, height, fps, seconds, ffmpeg):
+        self.directory = directory
+        self.ffmpeg = ffmpeg
+        self.size = (width, height)
+        self.fps = fps
+        self.seconds = seconds
+        self.playlist = os.path.join(directory, PLAYLIST)
+        self.reported = set()
+        self.failed = False
+        self.fallback = None   # OpenCvSegmentWriter taking over from an ffmpeg that failed early
+        gop = str(max(1, int(round(fps * seconds))))
+        command = [
+            ffmpeg, '-loglevel', 'error', '-y',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+            '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+            # A keyframe at every segment boundary so each segment starts cleanly
+            '-g', gop, '-keyint_min', gop, '-sc_threshold', '0',
+            '-f', 'hls', '-hls_time', str(seconds), '-hls_list_size', '0',
+            '-hls_playlist_type', 'event', '-hls_segment_type', 'fmp4',
+            '-hls_fmp4_init_filename', 'init.mp4',
+            '-hls_segment_filename', os.path.join(directory, 'seg_%05d.m4s'),
+            self.playlist,
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        if self.fallback is not None:
+            return self.fallback.write(frame)
+        if self.failed:
+            return False
+        try:
+            # OpenCV frames are C-contiguous, so ffmpeg reads the frame's own memory
+            self.process.stdin.write(frame.data)
+        except (BrokenPipeError, OSError) as e:
+            return self._fail(frame, e)
+        # An ffmpeg that cannot encode exits after the first frames, before the pipe fills up
+        if not self.reported and self.process.poll() is not None:
+            return self._fail(frame, f"ffmpeg exited with code {self.process.returncode}")
+        return True
+
+    def _fail(self, frame, error):
+        """ffmpeg is gone: hand over to OpenCV segments if nothing has been listed yet"""
+        self.failed = True
+        if self.reported or playlist_entries(self.playlist):
+            log_event(logger, logging.ERROR, "ffmpeg stopped accepting frames", directory=self.directory, error=error)
+            return False
+        log_event(logger, logging.WARNING, "ffmpeg failed before its first segment - using OpenCV segments",
+                  directory=self.directory, error=error)
+        self.process.wait()
+        self.fallback = OpenCvSegmentWriter(self.directory, *self.size, self.fps, self.seconds)
+        self.kind = self.fallback.kind
+        return self.fallback.write(frame)
+
+    def completed_segments(self):
+        """Segments listed since the last call (listed segments are complete)"""
+        if self.fallback is not None:
+            return self.fallback.completed_segments()
+        fresh = [name for name in playlist_entries(self.playlist) if name not in self.reported]
+        self.reported.update(fresh)
+        return [os.path.join(self.directory, name) for name in fresh]
+
+    def close(self):
+        """Flush ffmpeg (it appends #EXT-X-ENDLIST); returns the remaining segments"""
+        if self.fallback is not None:
+            return self.fallback.close()
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        return self.completed_segments()
+
+    def finish(self, output_path):
+        """Stitch the segments into one MP4 without re-encoding"""
+        if self.fallback is not None:
+            return self.fallback.finish(output_path)
+        result = subprocess.run(
+            [self.ffmpeg, '-loglevel', 'error', '-y', '-i', self.playlist,
+             '-c', 'copy', '-movflags', '+faststart', output_path],
+            capture_output=True)
+        if result.returncode != 0:
+            log_event(logger, logging.ERROR, "Could not stitch segments", output=output_path,
+                      error=result.stderr.decode(errors='replace')[-300:])
+            if os.path.exists(output_path):
+                os.remove(output_path)  # never share a truncated file
+            return False
+        return True
+
+
+class OpenCvSegmentWriter:
+    """Fallback without ffmpeg: a self-contained MP4 every `seconds`, listed in a playlist"""
+
+    kind = 'mp4-segments'
+
+    def __init__(self, directory, width, height, fps, seconds):
+        import cv2
+        self.directory = directory
+        self.size = (width, height)
+        self.fps = fps
+        self.frames_per_segment = max(1, int(round(fps * seconds)))
+        self.target_duration = math.ceil(self.frames_per_segment / float(fps))
+        self.playlist = os.path.join(directory, PLAYLIST)
+        self.fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        self.out = None
+        self.count = 0
+        self.segments = []  # (file name, seconds)
+        self.pending = []
+        self._write_playlist(ended=False)
+
+    def _write_playlist(self, ended):
+        lines = ['#EXTM3U', '#EXT-X-VERSION:7', f'#EXT-X-TARGETDURATION:{self.target_duration}',
+                 '#EXT-X-PLAYLIST-TYPE:EVENT', '#EXT-X-MEDIA-SEQUENCE:0']
+        for name, seconds in self.segments:
+            lines += [f'#EXTINF:{seconds:.3f},', name]
+        if ended:
+            lines.append('#EXT-X-ENDLIST')
+        tmp_path = f"{self.playlist}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.playlist)
+
+    def write(self, frame):
+        import cv2
+        if self.out is None:
+            name = f'seg_{len(self.segments):05d}.mp4'
+            self.out = cv2.VideoWriter(os.path.join(self.directory, name), self.fourcc, self.fps, self.size)
+        self.out.write(frame)
+        self.count += 1
+        if self.count >= self.frames_per_segment:
+            self._close_segment()
+        return True
+
+    def _close_segment(self):
+        self.out.release()
+        self.out = None
+        name = f'seg_{len(self.segments):05d}.mp4'
+        self.segments.append((name, self.count / float(self.fps)))
+        self.pending.append(os.path.join(self.directory, name))
+        self.count = 0
+        # The segment is listed only after release() has written its index
+        self._write_playlist(ended=False)
+
+    def completed_segments(self):
+        fresh, self.pending = self.pending, []
+        return fresh
+
+    def close(self):
+        if self.out is not None:
+            self._close_segment()
+        self._write_playlist(ended=True)
+        return self.completed_segments()
+
+    def finish(self, output_path):
+        """Stitch the segments into one MP4 (OpenCV cannot remux, so this re-encodes)"""
+        import cv2
+        out = cv2.VideoWriter(output_path, self.fourcc, self.fps, self.size)
+        if not out.isOpened():
+            log_event(logger, logging.ERROR, "Could not stitch segments", output=output_path,
+                      error="VideoWriter did not open")
+            return False
+        for name, _ in self.segments:
+            segment = cv2.VideoCapture(os.path.join(self.directory, name))
+            while True:
+                ret, frame = segment.read()
+                if not ret:
+                    break
+                out.write(frame)
+            segment.release()
+        out.release()
+        return True
+
+
+def open_segment_writer(directory, width, height, fps):
+    """ffmpeg HLS writer when ffmpeg is available, the OpenCV MP4-segment writer otherwise"""
+    os.makedirs(directory, exist_ok=True)
+    ffmpeg = ffmpeg_path()
+    if ffmpeg:
+        try:
+            return FfmpegHlsWriter(directory, width, height, fps, segment_seconds(), ffmpeg)
+        except OSError as e:
+            log_event(logger, logging.WARNING, "Could not start ffmpeg - using OpenCV segments",
+                      ffmpeg=ffmpeg, error=e)
+    return OpenCvSegmentWriter(directory, width, height, fps, segment_seconds())
@@ -0,0 +1,112 @@
+"""
+HARBOR Diamond Viewer - Server Mode
+Selects the Socket.IO async mode and applies a matching monkey-patching
+strategy. Must be imported before Flask/SocketIO (web_server.py does this
+on its first lines).
+
+HARBOR_ASYNC_MODE:
+    eventlet (default)  - green-thread production server for many concurrent
+    / gevent              clients. Sockets, select and time are patched;
+                          threads are NOT, so the recorder and camera threads
+                          stay real OS threads and a blocking cap.read() never
+                          stalls the event loop. Handlers run as green threads,
+                          so their serial I/O (pyserial and its real locks) is
+                          handed to a native thread pool through blocking_io().
+    threading           - one OS thread per connection on Werkzeug's
+                          development server. Opt-in only, and logged as a
+                          warning. The display viewer selects it for its
+                          in-process server, as eventlet's patching does not
+                          mix with the Qt event loop.
+"""
+
+import collections
+import os
+
+
+ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+
+_patched = False
+
+
+def selected_async_mode():
+    """Async mode requested through HARBOR_ASYNC_MODE (eventlet when unset)"""
+    mode = os.getenv('HARBOR_ASYNC_MODE', 'eventlet').strip().lower()
+    if mode not in ASYNC_MODES:
+        raise ValueError(f"HARBOR_ASYNC_MODE must be one of {', '.join(ASYNC_MODES)}, got '{mode}'")
+    return mode
+
+
+def monkey_patch(mode):
+    """Patch the standard library for green-thread modes, leaving threads native"""
+    global _patched
+    if _patched or mode == 'threading':
+        return
+    if mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch(thread=False)
+    elif mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all(thread=False, subprocess=False)
+    _patched = True
+
+
+def run_options(mode):
+    """Extra socketio.run() arguments for the selected mode"""
+    if mode == 'threading':
+        # Only reached when HARBOR_ASYNC_MODE=threading was chosen explicitly;
+        # start_web_server logs a warning about the development server
+        return {'allow_unsafe_werkzeug': True}
+    return {}
+
+
+def blocking_io(mode):
+    """Runner for blocking calls, `run(fn, *args)`: on a native thread pool when called from a green thread"""
+    if mode == 'threading':
+        return None
+    import greenlet
+    if mode == 'eventlet':
+        from eventlet import tpool
+        execute = tpool.execute
+    else:
+        import gevent
+
+        def execute(fn, *args):
+            return gevent.get_hub().threadpool.apply(fn, args)
+
+    def run(fn, *args):
+        # Native threads (camera, recorder, the pool itself) may block; green threads must not
+        if greenlet.getcurrent().parent is None:
+            return fn(*args)
+        return execute(fn, *args)
+    return run
+
+
+class EmitQueue:
+    """Socket.IO emits that are safe from any thread (camera, recorder, Qt)
+
+    In threading mode emits go straight out. Under eventlet/gevent a native
+    thread must not touch the green sockets, so emits are queued and relayed
+    by `run()`, started with socketio.start_background_task.
+    """
+
+    def __init__(self, socketio, mode):
+        self.socketio = socketio
+        self.mode = mode
+        self.pending = collections.deque()
+
+    def emit(self, event, data, to=None):
+        if self.mode == 'threading':
+            self.socketio.emit(event, data, to=to)
+        else:
+            self.pending.append((event, data, to))
+
+    def run(self):
+        while True:
+            while self.pending:
+                event, data, to = self.pending.popleft()
+                self.socketio.emit(event, data, to=to)
+            self.socketio.sleep(0.02)
+
+
+ASYNC_MODE = selected_async_mode()
+monkey_patch(ASYNC_MODE)
@@ -0,0 +1,47 @@
+"""
+HARBOR Diamond Viewer - Still Snapshots
+Encodes full-resolution stills in a small worker pool. cv2.imencode releases
+the GIL, so the cameras of one request encode in parallel and a running
+recording or the display never waits behind them.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# format -> (file extension, mimetype, (cv2 encoder parameter, value)); cv2 loads on the first snapshot
+FORMATS = {
+    'jpeg': ('.jpg', 'image/jpeg', ('IMWRITE_JPEG_QUALITY', 95)),
+    'png': ('.png', 'image/png', ('IMWRITE_PNG_COMPRESSION', 1)),  # fast, still lossless
+}
+
+
+class SnapshotEncoder:
+    """Thread pool that encodes frames and writes them next to the recordings"""
+
+    def __init__(self, workers=2, directory='recordings'):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='snapshot')
+        self.directory = directory
+
+    def _encode(self, frame, fmt, path):
+        import cv2
+        started = time.perf_counter()
+        extension, _, (param, value) = FORMATS[fmt]
+        ok, encoded = cv2.imencode(extension, frame, [getattr(cv2, param), value])
+        if not ok:
+            raise ValueError(f"Could not encode {fmt} snapshot")
+        data = encoded.tobytes()
+        with open(path, 'wb') as f:
+            f.write(data)
+        return {'path': path, 'bytes': len(data), 'encode_ms': round((time.perf_counter() - started) * 1000, 1)}
+
+    def capture(self, session_id, frames, fmt='jpeg'):
+        """Encode {camera index: frame} in parallel; returns {camera index: info dict}"""
+        os.makedirs(self.directory, exist_ok=True)
+        extension = FORMATS[fmt][0]
+        futures = {
+            camera: self.pool.submit(self._encode, frame, fmt,
+                                     os.path.join(self.directory, f"{session_id}_cam{camera}{extension}"))
+            for camera, frame in frames.items()
+        }
+        return {camera: future.result() for camera, future in futures.items()}
@@ -0,0 +1,100 @@
+"""
+HARBOR Diamond Viewer - Startup Profile
+Per-phase boot timings. Phases may run in parallel threads (camera opens,
+web server start), so each records its own offset from process start and
+duration. Once every expected milestone is reached the profile is logged and
+appended to startup_profile.jsonl, with the change against the previous boot,
+so cold-start regressions show up in the logs.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from src.log import get_logger, log_event
+
+logger = get_logger('startup')
+
+HISTORY_PATH = os.getenv('HARBOR_STARTUP_HISTORY', 'startup_profile.jsonl')
+
+
+class StartupProfile:
+    """Collects phase durations and milestones for one boot"""
+
+    def __init__(self, history_path=HISTORY_PATH):
+        self.origin = time.perf_counter()
+        self.history_path = history_path
+        self.lock = threading.Lock()
+        self.phases = {}
+        self.milestones = {}
+        self.expected = set()
+        self.reported = False
+
+    def _offset(self):
+        return round(time.perf_counter() - self.origin, 3)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time a block: `with profile.phase('qt_init'): ...`"""
+        start = self._offset()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.phases[name] = {'start': start, 'seconds': round(self._offset() - start, 3)}
+
+    def mark(self, name):
+        """Record a milestone (seconds since start); reports once all expected ones are in"""
+        with self.lock:
+            self.milestones.setdefault(name, self._offset())
+            complete = self.expected and self.expected.issubset(self.milestones)
+        if complete:
+            self.report()
+
+    def expect(self, *names):
+        """Milestones that mark the end of startup"""
+        with self.lock:
+            self.expected.update(names)
+
+    def _previous_total(self):
+        try:
+            with open(self.history_path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 4096))
+                last = f.read().splitlines()[-1]
+            return json.loads(last).get('total')
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def report(self):
+        """Log the profile and append it to the history file (only once per boot)"""
+        with self.lock:
+            if self.reported:
+                return
+            self.reported = True
+            missing = sorted(self.expected - set(self.milestones))
+            entry = {
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'total': max(self.milestones.values(), default=self._offset()),
+                'phases': dict(self.phases),
+                'milestones': dict(self.milestones),
+            }
+            if missing:
+                entry['missing'] = missing
+
+        previous = self._previous_total()
+        change = round(entry['total'] - previous, 3) if previous is not None else None
+        log_event(logger, logging.WARNING if missing else logging.INFO, "Startup profile",
+                  total=entry['total'], change=change,
+                  **{name: info['seconds'] for name, info in entry['phases'].items()})
+        try:
+            with open(self.history_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, sort_keys=True) + '\n')
+        except OSError as e:
+            log_event(logger, logging.WARNING, "Could not write startup history", error=e)
+
+
+# One profile per process, started as early as possible (display_viewer imports it first)
+profile = StartupProfile()
@@ -0,0 +1,180 @@
+"""
+HARBOR Diamond Viewer - Static Asset Pipeline
+Minifies, fingerprints and precompresses everything under static/ once at
+startup so the control and share pages load fast on shop WiFi:
+
+    static/js/control.js  ->  static/dist/js/control.3f9a1c2b7d.js (+ .gz, + .br)
+
+Fingerprinted files never change, so they are served with a one-year
+immutable Cache-Control and the phone never asks for them again.
+
+The Socket.IO client and hls.js are served locally from static/vendor/ when present.
+Fetch it once on a machine with internet access:
+    python -m src.static_assets --fetch-vendor
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import urllib.request
+from src.log import get_logger, log_event
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = get_logger('assets')
+
+STATIC_DIR = 'static'
+BUILD_DIR = os.path.join(STATIC_DIR, 'dist')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+# Pinned third-party files: local path -> download/CDN fallback URL
+VENDOR_FILES = {
+    'vendor/socket.io.min.js': 'https://cdn.socket.io/4.5.4/socket.io.min.js',
+    'vendor/hls.min.js': 'https://cdn.jsdelivr.net/npm/hls.js@1.5.17/dist/hls.min.js',
+}
+
+COMPRESSIBLE = ('.js', '.css', '.svg', '.json', '.html', '.txt')
+
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{}:;,>])\s*', r'\1', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text):
+    """Conservative: drops indentation, blank lines and whole-line // comments only"""
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+    return '\n'.join(lines) + '\n'
+
+
+class AssetPipeline:
+    """Builds fingerprinted, precompressed copies of static/ and maps logical names to URLs"""
+
+    def __init__(self, static_dir=STATIC_DIR, build_dir=BUILD_DIR, url_prefix='/assets'):
+        self.static_dir = static_dir
+        self.build_dir = build_dir
+        self.url_prefix = url_prefix
+        self.manifest = {}
+
+    def build(self):
+        """Rebuild dist/ from static/, returns the manifest {logical name: fingerprinted name}"""
+        if os.path.isdir(self.build_dir):
+            shutil.rmtree(self.build_dir)
+        os.makedirs(self.build_dir)
+        manifest = {}
+        for root, dirs, files in os.walk(self.static_dir):
+            if os.path.abspath(root).startswith(os.path.abspath(self.build_dir)):
+                continue
+            for filename in files:
+                source = os.path.join(root, filename)
+                logical = os.path.relpath(source, self.static_dir).replace(os.sep, '/')
+                if filename.startswith('.'):
+                    continue
+                if logical == 'sw.js':
+                    continue  # served unfingerprinted at /sw.js so its scope covers the site
+                manifest[logical] = self._build_file(source, logical)
+
+        with open(os.path.join(self.build_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        self.manifest = manifest
+        log_event(logger, logging.INFO, "Static assets built", files=len(manifest),
+                  brotli=brotli is not None)
+        return manifest
+
+    def _build_file(self, source, logical):
+        with open(source, 'rb') as f:
+            data = f.read()
+
+        if not logical.endswith(('.min.js', '.min.css')):
+            if logical.endswith('.css'):
+                data = minify_css(data.decode('utf-8')).encode('utf-8')
+            elif logical.endswith('.js'):
+                data = minify_js(data.decode('utf-8')).encode('utf-8')
+
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        stem, ext = os.path.splitext(logical)
+        fingerprinted = f"{stem}.{digest}{ext}"
+        target = os.path.join(self.build_dir, fingerprinted)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+
+        if logical.endswith(COMPRESSIBLE):
+            with open(target + '.gz', 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                with open(target + '.br', 'wb') as f:
+                    f.write(brotli.compress(data, quality=11))
+        return fingerprinted
+
+    def url(self, logical):
+        """URL for a logical asset name (CDN fallback for vendor files that were never fetched)"""
+        fingerprinted = self.manifest.get(logical)
+        if fingerprinted:
+            return f"{self.url_prefix}/{fingerprinted}"
+        if logical in VENDOR_FILES:
+            return VENDOR_FILES[logical]
+        return f"/static/{logical}"
+
+    def urls(self):
+        return [f"{self.url_prefix}/{name}" for name in self.manifest.values()]
+
+    def version(self):
+        """Changes whenever any asset changes (used to name the service worker cache)"""
+        joined = json.dumps(self.manifest, sort_keys=True).encode()
+        return hashlib.sha256(joined).hexdigest()[:10]
+
+    def resolve(self, fingerprinted, accept_encoding):
+        """(path, content encoding or None) of the best precompressed variant to send"""
+        root = os.path.abspath(self.build_dir)
+        path = os.path.abspath(os.path.join(root, fingerprinted))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            return None, None
+        accept_encoding = accept_encoding or ''
+        if 'br' in accept_encoding and os.path.isfile(path + '.br'):
+            return path + '.br', 'br'
+        if 'gzip' in accept_encoding and os.path.isfile(path + '.gz'):
+            return path + '.gz', 'gzip'
+        return path, None
+
+
+def fetch_vendor_files(static_dir=STATIC_DIR):
+    """Download pinned third-party assets into static/vendor/"""
+    for logical, url in VENDOR_FILES.items():
+        target = os.path.join(static_dir, logical)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        with open(target, 'wb') as f:
+            f.write(data)
+        print(f"Fetched {url} -> {target} ({len(data)} bytes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build HARBOR static assets')
+    parser.add_argument('--fetch-vendor', action='store_true', help='download the third-party clients first')
+    args = parser.parse_args()
+    if args.fetch_vendor:
+        fetch_vendor_files()
+    manifest = AssetPipeline().build()
+    for logical, fingerprinted in sorted(manifest.items()):
+        print(f"{logical} -> {fingerprinted}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+HARBOR Diamond Viewer - Stations
+A station is one viewing bench: its Arduino, its two cameras, presets,
+motion state, control lease, watchdog and recording queue. One server drives several
+stations and they share nothing but the process, so a serial stall or a
+recording on one bench never waits on another.
+
+Stations come from stations.json (HARBOR_STATIONS_FILE), e.g.
+    [{"id": "main", "arduino_port": "COM3"},
+     {"id": "bench2", "name": "Bench 2", "arduino_port": "COM5", "top_camera": 2, "side_camera": 3}]
+Without the file there is one station, 'main', on cameras 0 and 1 that
+behaves exactly as a single-station install always has (ARDUINO_PORT,
+presets.json, /control and /share).
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+from src.arduino_controller import ArduinoController
+from src.control_state import ControlLease, StateStore
+from src.presets import PresetStore
+from src.recording import RecordingScheduler
+from src.watchdog import HardwareWatchdog
+
+DEFAULT_STATION = 'main'
+STATION_ID = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+
+
+def load_station_configs(path=None):
+    """Station definitions from HARBOR_STATIONS_FILE, or the single default station"""
+    path = path or os.getenv('HARBOR_STATIONS_FILE', 'stations.json')
+    if not os.path.exists(path):
+        return [{'id': DEFAULT_STATION, 'arduino_port': os.getenv('ARDUINO_PORT')}]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        configs = json.load(f)
+    if not isinstance(configs, list) or not configs:
+        raise ValueError(f"{path} must contain a non-empty list of stations")
+    seen = set()
+    for config in configs:
+        station_id = config.get('id') if isinstance(config, dict) else None
+        if not station_id or not STATION_ID.match(station_id):
+            raise ValueError(f"Invalid station id in {path}: {station_id!r} (letters, digits, - and _)")
+        if station_id in seen:
+            raise ValueError(f"Duplicate station id in {path}: {station_id}")
+        seen.add(station_id)
+    return configs
+
+
+def page_path(station_id, page):
+    """URL path of a station's page; the default station keeps the short /control and /share"""
+    if station_id == DEFAULT_STATION:
+        return f"/{page}"
+    return f"/stations/{station_id}/{page}"
+
+
+class Station:
+    """Everything one bench owns; nothing here is shared with other stations"""
+
+    def __init__(self, station_id, name=None, arduino_port=None, top_camera=0, side_camera=1,
+                 presets_path=None, lease_timeout=60.0, ping_interval=10.0, client_timeout=40.0,
+                 on_controller_silent=None, record=None, max_recordings=2, recording_queue=4,
+                 recording_seconds=30, blocking_io=None, sleep=time.sleep):
+        self.id = station_id
+        self.name = name or station_id
+        self.arduino_port = arduino_port
+        self.top_camera = int(top_camera)
+        self.side_camera = int(side_camera)
+        self.room = f'station:{station_id}'
+
+        self.arduino = ArduinoController(blocking_io)
+        self.connect_lock = threading.Lock()
+        if presets_path is None:
+            presets_path = 'presets.json' if station_id == DEFAULT_STATION else f'presets_{station_id}.json'
+        self.presets = PresetStore(presets_path)
+
+        # Motion state, broadcast as versioned diffs to the station's room
+        self.state = StateStore(
+            arduino_connected=False,
+            controller=None,          # sid of the client holding the control lease
+            x_motion=0,               # 1 / -1 while a zoom button is held
+            y_motion=0,               # 1 / -1 while a height button is held
+            rotation=0,
+            auto_rotation=False,
+            auto_rotation_direction=0,
+        )
+        self.lease = ControlLease(timeout=lease_timeout)
+        self.watchdog = HardwareWatchdog(
+            self.arduino,
+            ping_interval=ping_interval,
+            client_timeout=client_timeout,
+            get_controller=self.lease.current,
+            on_controller_silent=(lambda sid: on_controller_silent(self, sid)) if on_controller_silent else None,
+            sleep=sleep,
+        )
+
+        # Customer recordings of the top camera: record(session_id, station), with this bench's own
+        # slots and queue (see src/recording.py)
+        self.recordings = RecordingScheduler(
+            lambda session_id: record(session_id, self),
+            max_active=max_recordings,
+            max_queued=recording_queue,
+            expected_seconds=recording_seconds,
+            name=station_id,
+        ) if record else None
+
+        # Autofocus or centering in progress (one at a time; manual moves cancel it)
+        self.vision_job = None
+        self.vision_lock = threading.Lock()
+
+    @property
+    def cameras(self):
+        return [self.top_camera, self.side_camera]
+
+    def cancel_vision_job(self):
+        with self.vision_lock:
+            if self.vision_job is not None:
+                self.vision_job.cancel()
+
+    def summary(self):
+        """Public view of the station for /api/status and /api/stations"""
+        state = self.state.snapshot()['state']
+        return {
+            'name': self.name,
+            'cameras': self.cameras,
+            'arduino_connected': state['arduino_connected'],
+            'auto_rotation': state['auto_rotation'],
+            'controlled': state['controller'] is not None,
+            'clients': len(self.watchdog.live_clients()),
+        }
+
+
+class StationRegistry:
+    """Stations by id; lookups without an id go to the default station"""
+
+    def __init__(self, configs, **options):
+        self.stations = {}
+        for config in configs:
+            config = dict(config)
+            station_id = config.pop('id')
+            self.stations[station_id] = Station(station_id, **config, **options)
+        self.default = self.stations.get(DEFAULT_STATION) or next(iter(self.stations.values()))
+
+    def get(self, station_id=None):
+        """Station by id (None means the default), or None if unknown"""
+        if not station_id:
+            return self.default
+        return self.stations.get(station_id)
+
+    def ports_in_use(self, exclude=None):
+        """Serial ports configured for or opened by the other stations"""
+        ports = set()
+        for station in self:
+            if station is exclude:
+                continue
+            if station.arduino_port:
+                ports.add(station.arduino_port)
+            if station.arduino.is_connected():
+                ports.add(station.arduino.serial_connection.port)
+        return ports
+
+    def __iter__(self):
+        return iter(list(self.stations.values()))
+
+    def __len__(self):
+        return len(self.stations)
@@ -0,0 +1,85 @@
+"""
+HARBOR Diamond Viewer - System Status
+One status snapshot shared by the display and the web server. It is rebuilt
+only when a value actually changes; the serialized JSON and its ETag are
+cached so /api/status polls cost a dict lookup (or a 304).
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+
+
+class StatusSnapshot:
+    """Change-driven status object with cached JSON body, ETag and change listeners"""
+
+    def __init__(self, **initial):
+        self.lock = threading.Lock()
+        self.fields = dict(initial)
+        self.version = 0
+        self.listeners = []
+        self._rebuild()
+
+    def _rebuild(self):
+        self.fields['version'] = self.version
+        self.fields['timestamp'] = datetime.now().isoformat()
+        self.body = json.dumps(self.fields, sort_keys=True).encode()
+        self.etag = hashlib.sha1(self.body).hexdigest()[:16]
+
+    def _apply_unlocked(self, changes):
+        diff = {key: value for key, value in changes.items() if self.fields.get(key) != value}
+        if not diff:
+            return None
+        self.fields.update(diff)
+        self.version += 1
+        self._rebuild()
+        return json.loads(self.body), list(self.listeners)
+
+    def _notify(self, applied):
+        if applied is None:
+            return False
+        snapshot, listeners = applied
+        for listener in listeners:
+            listener(snapshot)
+        return True
+
+    def update(self, **changes):
+        """Merge changes; rebuilds and notifies listeners only if something differs"""
+        with self.lock:
+            applied = self._apply_unlocked(changes)
+        return self._notify(applied)
+
+    def update_item(self, key, item, value):
+        """Update one entry of a dict-valued field, e.g. stations['main']"""
+        with self.lock:
+            current = dict(self.fields.get(key) or {})
+            if current.get(item) == value:
+                return False
+            current[item] = value
+            applied = self._apply_unlocked({key: current})
+        return self._notify(applied)
+
+    def cached_response(self):
+        """(json bytes, etag) for the current version"""
+        with self.lock:
+            return self.body, self.etag
+
+    def as_dict(self):
+        with self.lock:
+            return json.loads(self.body)
+
+    def subscribe(self, listener):
+        """Call `listener(snapshot_dict)` after every change"""
+        with self.lock:
+            self.listeners.append(listener)
+
+
+# Process-wide snapshot: the display viewer and web server run in one process
+status = StatusSnapshot(
+    arduino_connected=False,
+    auto_rotation=False,
+    active_recordings=0,
+    connected_clients=0,
+    queues={},
+)
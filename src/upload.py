@@ -0,0 +1,402 @@
+"""
+HARBOR Diamond Viewer - Recording Upload
+Background agent that copies finished recordings and stills to a central
+store so share links work away from the store's WiFi.
+
+Files go up in chunks. The store keeps the partial upload, and `begin()`
+reports how much it already has. After a dropped connection or a kiosk
+restart the agent continues from that offset instead of starting again.
+Each chunk carries its SHA-256, and the whole file's SHA-256 is checked when
+the upload completes. Bandwidth is shared by all workers through one
+throttle, so uploads never starve the customers' phones.
+
+Stores:
+    HttpChunkStore  the small resumable protocol spoken by src.object_store
+                    (python -m src.object_store runs a local stand-in)
+    S3Store         S3-compatible multipart upload (pip install boto3)
+
+Configured with HARBOR_UPLOAD_URL (http(s)://... or s3://bucket/prefix),
+HARBOR_UPLOAD_PUBLIC_URL, HARBOR_UPLOAD_TOKEN, HARBOR_UPLOAD_WORKERS,
+HARBOR_UPLOAD_CHUNK_MB and HARBOR_UPLOAD_KBPS (0 = unthrottled).
+"""
+
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import queue
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from src import metrics
+from src.log import get_logger, log_event
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+logger = get_logger('upload')
+
+PACE_BYTES = 64 * 1024
+
+
+class UploadError(Exception):
+    """The store rejected a request; the agent retries from the store's offset"""
+
+
+def file_sha256(path, block=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(block), b''):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+class Throttle:
+    """Token bucket shared by all upload workers (rate in bytes per second, 0 = unlimited)"""
+
+    def __init__(self, rate=0):
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.next_free = time.monotonic()
+
+    def consume(self, size):
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_free)
+            self.next_free = start + size / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+class HttpChunkStore:
+    """Client for the resumable chunk protocol of src.object_store"""
+
+    def __init__(self, base_url, public_url=None, token=None, timeout=30.0):
+        self.base_url = base_url.rstrip('/')
+        self.public_url = (public_url or f"{self.base_url}/objects").rstrip('/')
+        self.token = token
+        self.timeout = timeout
+
+    def _request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        request = urllib.request.Request(f"{self.base_url}{path}", data=body, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read() or b'{}')
+        except urllib.error.HTTPError as e:
+            raise UploadError(f"{method} {path} -> {e.code} {e.read()[:200]!r}") from e
+
+    def begin(self, key, size, sha256, chunk_size):
+        """Start or resume the upload of `key`; returns (upload id, bytes the store already has)"""
+        reply = self._request('POST', '/uploads', {'key': key, 'size': size, 'sha256': sha256})
+        return reply['upload_id'], reply['offset']
+
+    def put_chunk(self, upload_id, offset, data, pace):
+        """Append `data` at `offset`, calling `pace(n)` before every piece sent; returns the new offset"""
+        def pieces():
+            for start in range(0, len(data), PACE_BYTES):
+                piece = data[start:start + PACE_BYTES]
+                pace(len(piece))
+                yield piece
+        headers = {
+            'Content-Type': 'application/octet-stream',
+            'Content-Length': str(len(data)),
+            'X-Chunk-SHA256': hashlib.sha256(data).hexdigest(),
+        }
+        reply = self._request('PUT', f"/uploads/{upload_id}?offset={offset}", pieces(), headers)
+        return reply['offset']
+
+    def complete(self, upload_id, key):
+        """Ask the store to verify the whole file; returns its public URL"""
+        self._request('POST', f"/uploads/{upload_id}/complete")
+        return self.url(key)
+
+    def url(self, key):
+        return f"{self.public_url}/{urllib.parse.quote(key)}"
+
+
+class S3Store:
+    """S3-compatible multipart upload; parts already stored are found with list_parts"""
+
+    def __init__(self, bucket, prefix='', public_url=None, endpoint_url=None,
+                 state_path='recordings/s3_uploads.json'):
+        if boto3 is None:
+            raise RuntimeError("S3 uploads need boto3 (pip install boto3)")
+        self.client = boto3.client('s3', endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.public_url = (public_url or f"https://{bucket}.s3.amazonaws.com").rstrip('/')
+        self.uploads = {}  # upload id -> {'key', 'chunk_size', 'parts': [{'PartNumber', 'ETag', 'ChecksumSHA256'}]}
+        # S3 does not list the metadata of unfinished uploads, so the SHA-256 each was started for is kept here
+        self.state_path = state_path
+        self.lock = threading.Lock()
+        self.checksums = self._load()  # upload id -> sha256
+
+    def _load(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _remember(self, upload_id, sha256):
+        """Record (or with sha256 None, forget) the checksum an upload was started for"""
+        with self.lock:
+            if sha256 is None:
+                self.checksums.pop(upload_id, None)
+            else:
+                self.checksums[upload_id] = sha256
+            os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.checksums, f, indent=2)
+            os.replace(tmp_path, self.state_path)
+
+    def _key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def begin(self, key, size, sha256, chunk_size):
+        object_key = self._key(key)
+        listed = self.client.list_multipart_uploads(Bucket=self.bucket, Prefix=object_key).get('Uploads', [])
+        upload_id = None
+        for existing in listed:
+            if existing['Key'] != object_key:
+                continue
+            if upload_id is None and self.checksums.get(existing['UploadId']) == sha256:
+                upload_id = existing['UploadId']
+            else:
+                # Started for other bytes (an older version of the file): its parts would corrupt this one
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=object_key, UploadId=existing['UploadId'])
+                self._remember(existing['UploadId'], None)
+        parts = []
+        if upload_id is None:
+            # Content type from the name, so player pages and playlists open in the browser
+            upload_id = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=object_key, Metadata={'sha256': sha256},
+                ContentType=mimetypes.guess_type(key)[0] or 'application/octet-stream',
+                ChecksumAlgorithm='SHA256')['UploadId']
+            self._remember(upload_id, sha256)
+        else:
+            # Resume after the last contiguous full-size part
+            stored = self.client.list_parts(Bucket=self.bucket, Key=object_key, UploadId=upload_id).get('Parts', [])
+            for number, part in enumerate(sorted(stored, key=lambda p: p['PartNumber']), start=1):
+                if part['PartNumber'] != number or part['Size'] != chunk_size:
+                    break
+                parts.append({'PartNumber': number, 'ETag': part['ETag'],
+                              'ChecksumSHA256': part.get('ChecksumSHA256')})
+        self.uploads[upload_id] = {'key': object_key, 'chunk_size': chunk_size, 'parts': parts}
+        return upload_id, len(parts) * chunk_size
+
+    def put_chunk(self, upload_id, offset, data, pace):
+        upload = self.uploads[upload_id]
+        number = offset // upload['chunk_size'] + 1
+        pace(len(data))
+        # S3 verifies the part against its SHA-256 before storing it
+        reply = self.client.upload_part(Bucket=self.bucket, Key=upload['key'], UploadId=upload_id,
+                                        PartNumber=number, Body=data, ChecksumAlgorithm='SHA256')
+        del upload['parts'][number - 1:]
+        upload['parts'].append({'PartNumber': number, 'ETag': reply['ETag'],
+                                'ChecksumSHA256': reply.get('ChecksumSHA256')})
+        return offset + len(data)
+
+    def complete(self, upload_id, key):
+        upload = self.uploads.pop(upload_id)
+        self.client.complete_multipart_upload(Bucket=self.bucket, Key=upload['key'], UploadId=upload_id,
+                                              MultipartUpload={'Parts': upload['parts']})
+        self._remember(upload_id, None)
+        return self.url(key)
+
+    def url(self, key):
+        return f"{self.public_url}/{urllib.parse.quote(self._key(key))}"
+
+
+class UploadAgent:
+    """Worker pool that uploads queued files and remembers what is already in the store"""
+
+    def __init__(self, store, workers=2, chunk_size=8 * 1024 * 1024, rate=0,
+                 state_path='recordings/uploads.json', max_backoff=300.0):
+        self.store = store
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.throttle = Throttle(rate)
+        self.state_path = state_path
+        self.max_backoff = max_backoff
+        self.queue = queue.Queue()
+        self.condition = threading.Condition()
+        self.stopped = threading.Event()
+        self.uploads = self._load()  # key -> {'path', 'size', 'sha256', 'state', 'url'}
+
+    def _load(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            log_event(logger, logging.WARNING, "Could not read upload state", path=self.state_path, error=e)
+            return {}
+
+    def _save(self):
+        # Called with the condition held; temp file first so a crash never leaves half a file
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.uploads, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def start(self):
+        """Start the workers and requeue anything a previous run did not finish"""
+        with self.condition:
+            pending = [key for key, upload in self.uploads.items() if upload['state'] != 'done']
+        for key in pending:
+            self.queue.put(key)
+        metrics.UPLOAD_QUEUE.set(self.queue.qsize())
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f'upload-{i}', daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def enqueue(self, path, key=None):
+        """Queue a finished file; `key` (default: the file name) names it in the store"""
+        key = key or os.path.basename(path)
+        size = os.path.getsize(path)
+        sha256 = None
+        with self.condition:
+            known = dict(self.uploads.get(key) or {})
+        if known.get('sha256') and known['size'] == size and known['state'] != 'missing':
+            # Same name, same bytes: nothing to send. A rewritten file (a republished page) goes up again
+            sha256 = file_sha256(path)
+            if sha256 == known['sha256']:
+                return
+        with self.condition:
+            state = self.uploads.get(key, {}).get('state')
+            pending = state in ('queued', 'uploading', 'retrying')
+            # A pending key is not queued twice; its worker picks up the new size and checksum
+            self.uploads[key] = {'path': path, 'size': size, 'sha256': sha256,
+                                 'state': state if pending else 'queued', 'url': None}
+            self._save()
+        if pending:
+            return
+        self.queue.put(key)
+        metrics.UPLOAD_QUEUE.set(self.queue.qsize())
+
+    def url_for(self, key):
+        """Central URL once the upload has completed, else None"""
+        with self.condition:
+            upload = self.uploads.get(key)
+            return upload['url'] if upload and upload['state'] == 'done' else None
+
+    def wait(self, key, timeout):
+        """Block until `key` is uploaded (or `timeout`), even if it is not queued yet; returns its URL or None"""
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.uploads.get(key, {}).get('state') in ('done', 'missing'), timeout)
+        return self.url_for(key)
+
+    def summary(self):
+        with self.condition:
+            return {key: {'state': upload['state'], 'size': upload['size'], 'url': upload['url']}
+                    for key, upload in self.uploads.items()}
+
+    def _set(self, key, **changes):
+        with self.condition:
+            self.uploads[key].update(changes)
+            self._save()
+            self.condition.notify_all()
+
+    def _work(self):
+        while not self.stopped.is_set():
+            try:
+                key = self.queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            metrics.UPLOAD_QUEUE.set(self.queue.qsize())
+            attempt = 0
+            # Keep retrying: a kiosk can be offline for hours and should catch up afterwards
+            while not self.stopped.is_set():
+                try:
+                    self._upload(key)
+                    break
+                except Exception as e:
+                    attempt += 1
+                    backoff = min(self.max_backoff, 2 ** attempt)
+                    metrics.UPLOADS.labels(result='retry').inc()
+                    log_event(logger, logging.WARNING, "Upload failed, will resume", key=key,
+                              attempt=attempt, retry_in=backoff, error=e)
+                    self._set(key, state='retrying')
+                    self.stopped.wait(backoff)
+
+    def _upload(self, key):
+        with self.condition:
+            upload = dict(self.uploads[key])
+        path = upload['path']
+        if not os.path.exists(path):
+            log_event(logger, logging.WARNING, "File to upload is gone", key=key, path=path)
+            metrics.UPLOADS.labels(result='missing').inc()
+            self._set(key, state='missing')
+            return
+        if upload['sha256'] is None:
+            upload['sha256'] = file_sha256(path)
+            self._set(key, sha256=upload['sha256'])
+
+        started = time.monotonic()
+        self._set(key, state='uploading')
+        upload_id, offset = self.store.begin(key, upload['size'], upload['sha256'], self.chunk_size)
+        resumed_at = offset
+        with open(path, 'rb') as f:
+            while offset < upload['size'] and not self.stopped.is_set():
+                f.seek(offset)
+                data = f.read(self.chunk_size)
+                offset = self.store.put_chunk(upload_id, offset, data, self.throttle.consume)
+                metrics.UPLOAD_BYTES.inc(len(data))
+        if offset < upload['size']:
+            return  # stopping; the store keeps the partial upload
+
+        url = self.store.complete(upload_id, key)
+        with self.condition:
+            changed = self.uploads[key]['sha256'] != upload['sha256'] or self.uploads[key]['size'] != upload['size']
+        if changed:
+            # Enqueued again while uploading: send the new version too
+            self._set(key, state='queued')
+            self.queue.put(key)
+            return
+        elapsed = time.monotonic() - started
+        metrics.UPLOADS.labels(result='complete').inc()
+        metrics.UPLOAD_SECONDS.observe(elapsed)
+        self._set(key, state='done', url=url)
+        log_event(logger, logging.INFO, "Upload complete", key=key, bytes=upload['size'],
+                  resumed_at=resumed_at, seconds=round(elapsed, 1), url=url)
+
+
+def agent_from_env():
+    """Agent configured by HARBOR_UPLOAD_URL, or None when uploads are off"""
+    target = os.getenv('HARBOR_UPLOAD_URL', '').strip()
+    if not target:
+        return None
+    public_url = os.getenv('HARBOR_UPLOAD_PUBLIC_URL') or None
+    if target.startswith('s3://'):
+        parsed = urllib.parse.urlparse(target)
+        store = S3Store(parsed.netloc, parsed.path, public_url=public_url,
+                        endpoint_url=os.getenv('HARBOR_UPLOAD_S3_ENDPOINT') or None)
+    else:
+        store = HttpChunkStore(target, public_url=public_url, token=os.getenv('HARBOR_UPLOAD_TOKEN') or None)
+    return UploadAgent(
+        store,
+        workers=int(os.getenv('HARBOR_UPLOAD_WORKERS', '2')),
+        chunk_size=int(float(os.getenv('HARBOR_UPLOAD_CHUNK_MB', '8')) * 1024 * 1024),
+        rate=float(os.getenv('HARBOR_UPLOAD_KBPS', '0')) * 1024,
+    )
@@ -0,0 +1,87 @@
+"""
+HARBOR Diamond Viewer - Hardware Watchdog
+Keeps the firmware's 30 s PC_TIMEOUT fed with one PING per interval no matter
+how many phones are connected, tracks client liveness from their heartbeats
+and reports when the client holding control has gone silent. The client that
+last drove the motors stays watched after its lease lapses, since motion it
+started (auto-rotation, a sweep) keeps running without it.
+"""
+
+import logging
+import threading
+import time
+from src.log import get_logger, log_event
+
+logger = get_logger('watchdog')
+
+
+class HardwareWatchdog:
+    """Server-side PING cadence plus client liveness tracking"""
+
+    def __init__(self, arduino, ping_interval=10.0, client_timeout=40.0,
+                 get_controller=None, on_controller_silent=None, sleep=time.sleep):
+        self.arduino = arduino
+        self.ping_interval = ping_interval
+        self.client_timeout = client_timeout
+        self.get_controller = get_controller
+        self.on_controller_silent = on_controller_silent
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.last_seen = {}
+        self.mover = None        # sid of the client that last sent a motion command
+        self.last_ping = 0.0
+        self.running = False
+
+    def client_seen(self, sid):
+        """Record a heartbeat (or any message) from a client"""
+        with self.lock:
+            self.last_seen[sid] = time.monotonic()
+
+    def motion_sent(self, sid):
+        """Record a motion command; its sender is watched until it goes silent or disconnects"""
+        with self.lock:
+            self.last_seen[sid] = time.monotonic()
+            self.mover = sid
+
+    def client_gone(self, sid):
+        with self.lock:
+            self.last_seen.pop(sid, None)
+            if self.mover == sid:
+                self.mover = None
+
+    def live_clients(self):
+        cutoff = time.monotonic() - self.client_timeout
+        with self.lock:
+            return [sid for sid, seen in self.last_seen.items() if seen >= cutoff]
+
+    def check(self):
+        """One watchdog pass: PING the firmware when due, then check the controller"""
+        now = time.monotonic()
+        if self.arduino.is_connected() and now - self.last_ping >= self.ping_interval:
+            self.arduino.send_command("PING")
+            self.last_ping = now
+
+        controller = self.get_controller() if self.get_controller else None
+        with self.lock:
+            watched = {sid for sid in (controller, self.mover) if sid is not None}
+            silent = [(sid, now - self.last_seen[sid]) for sid in watched
+                      if sid in self.last_seen and now - self.last_seen[sid] > self.client_timeout]
+        for sid, silent_for in silent:
+            log_event(logger, logging.WARNING, "Controller went silent - stopping motion",
+                      sid=sid, silent_for=round(silent_for, 1), lease=sid == controller)
+            self.client_gone(sid)
+            if self.on_controller_silent:
+                self.on_controller_silent(sid)
+
+    def run(self):
+        """Loop forever; start with socketio.start_background_task so it suits the async mode"""
+        self.running = True
+        while self.running:
+            try:
+                self.check()
+            except Exception as e:
+                log_event(logger, logging.ERROR, "Watchdog check failed", error=e)
+            self.sleep(1.0)
+
+    def stop(self):
+        self.running = False
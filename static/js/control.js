@@ -0,0 +1,272 @@
+// The page belongs to one station; the server routes every event to that station
+const station = document.body.dataset.station;
+const socket = io({ query: { station: station } });
+
+// Offline-capable reopen (browsers only allow service workers on HTTPS or localhost)
+if ('serviceWorker' in navigator && window.isSecureContext) {
+    navigator.serviceWorker.register('/sw.js').catch((error) => console.log('Service worker not registered', error));
+}
+
+let arduinoConnected = false;
+let autoRotationActive = false;
+
+// Shared server state (versioned; diffs arrive on 'state')
+let serverState = {};
+let stateVersion = 0;
+
+// Double-tap detection
+let lastTapTime = 0;
+const doubleTapDelay = 300; // ms
+
+// Status updates
+socket.on('connect', () => {
+    console.log('Connected to server');
+    updateStatus('Connecting to hardware...', false);
+    socket.emit('arduino_connect');
+    socket.emit('list_presets');
+});
+
+socket.on('disconnect', () => {
+    console.log('Disconnected from server');
+    updateStatus('Disconnected', false);
+});
+
+socket.on('arduino_status', (data) => {
+    arduinoConnected = data.connected;
+    if (data.connected) {
+        updateStatus(`Connected`, true);
+    } else {
+        updateStatus('Hardware not connected', false);
+    }
+});
+
+socket.on('status', (data) => {
+    const own = (data.stations && data.stations[station]) || data;
+    arduinoConnected = own.arduino_connected;
+    autoRotationActive = own.auto_rotation;
+    updateStatus(arduinoConnected ? 'Connected' : 'Not Connected', arduinoConnected);
+});
+
+socket.on('state_snapshot', (snapshot) => {
+    serverState = snapshot.state;
+    stateVersion = snapshot.version;
+    applyServerState();
+});
+
+socket.on('state', (diff) => {
+    if (diff.version <= stateVersion) {
+        return;
+    }
+    if (diff.version !== stateVersion + 1) {
+        // Missed an update - resync from the full state
+        socket.emit('get_state');
+        return;
+    }
+    Object.assign(serverState, diff.changes);
+    stateVersion = diff.version;
+    applyServerState();
+});
+
+socket.on('control_denied', () => {
+    document.getElementById('control-banner').classList.add('visible');
+    resetVisionButtons();
+});
+
+socket.on('control_requested', (data) => {
+    if (confirm('Another device wants to control the viewer. Hand over control?')) {
+        socket.emit('handoff_control', { to: data.requester });
+    }
+});
+
+function applyServerState() {
+    arduinoConnected = serverState.arduino_connected;
+    autoRotationActive = serverState.auto_rotation;
+    updateAutoRotationUI();
+
+    const otherController = serverState.controller && serverState.controller !== socket.id;
+    document.getElementById('control-banner').classList.toggle('visible', otherController);
+}
+
+document.getElementById('request-control').addEventListener('click', () => {
+    socket.emit('request_control');
+});
+
+socket.on('presets', (presets) => {
+    const select = document.getElementById('preset-select');
+    const current = select.value;
+    select.innerHTML = '';
+    Object.keys(presets).sort().forEach((name) => {
+        const option = document.createElement('option');
+        option.value = name;
+        option.textContent = name;
+        select.appendChild(option);
+    });
+    if (current in presets) {
+        select.value = current;
+    }
+});
+
+socket.on('preset_error', (data) => {
+    console.log(data.error);
+});
+
+socket.on('error', (data) => {
+    console.log(data.error);
+});
+
+function updateStatus(message, connected) {
+    const statusEl = document.getElementById('status');
+    statusEl.textContent = `● ${message}`;
+    statusEl.className = connected ? 'status connected' : 'status disconnected';
+}
+
+function updateAutoRotationUI() {
+    document.getElementById('rotate-left').classList.toggle('auto-active', autoRotationActive);
+    document.getElementById('rotate-right').classList.toggle('auto-active', autoRotationActive);
+}
+
+// Zoom controls
+document.getElementById('zoom-out').addEventListener('touchstart', (e) => {
+    e.preventDefault();
+    socket.emit('move_axis', { axis: 'X', direction: -1 });
+});
+
+document.getElementById('zoom-out').addEventListener('touchend', (e) => {
+    e.preventDefault();
+    socket.emit('stop_axis', { axis: 'X' });
+});
+
+document.getElementById('zoom-in').addEventListener('touchstart', (e) => {
+    e.preventDefault();
+    socket.emit('move_axis', { axis: 'X', direction: 1 });
+});
+
+document.getElementById('zoom-in').addEventListener('touchend', (e) => {
+    e.preventDefault();
+    socket.emit('stop_axis', { axis: 'X' });
+});
+
+// Height controls
+document.getElementById('height-down').addEventListener('touchstart', (e) => {
+    e.preventDefault();
+    socket.emit('move_axis', { axis: 'Y', direction: -1 });
+});
+
+document.getElementById('height-down').addEventListener('touchend', (e) => {
+    e.preventDefault();
+    socket.emit('stop_axis', { axis: 'Y' });
+});
+
+document.getElementById('height-up').addEventListener('touchstart', (e) => {
+    e.preventDefault();
+    socket.emit('move_axis', { axis: 'Y', direction: 1 });
+});
+
+document.getElementById('height-up').addEventListener('touchend', (e) => {
+    e.preventDefault();
+    socket.emit('stop_axis', { axis: 'Y' });
+});
+
+// Rotation controls with double-tap detection
+function handleRotationTap(direction) {
+    const currentTime = Date.now();
+    const timeSinceLastTap = currentTime - lastTapTime;
+
+    if (timeSinceLastTap < doubleTapDelay) {
+        // Double tap detected - start auto-rotation
+        socket.emit('auto_rotate', { direction: direction });
+        autoRotationActive = true;
+        updateAutoRotationUI();
+    } else {
+        // Single tap - stop any auto-rotation, start manual rotation
+        if (autoRotationActive) {
+            socket.emit('stop_rotation');
+            autoRotationActive = false;
+            updateAutoRotationUI();
+        }
+        socket.emit('rotate', { direction: direction });
+    }
+
+    lastTapTime = currentTime;
+}
+
+document.getElementById('rotate-left').addEventListener('touchstart', (e) => {
+    e.preventDefault();
+    handleRotationTap(-1);
+});
+
+document.getElementById('rotate-left').addEventListener('touchend', (e) => {
+    e.preventDefault();
+    if (!autoRotationActive) {
+        socket.emit('stop_rotation');
+    }
+});
+
+document.getElementById('rotate-right').addEventListener('touchstart', (e) => {
+    e.preventDefault();
+    handleRotationTap(1);
+});
+
+document.getElementById('rotate-right').addEventListener('touchend', (e) => {
+    e.preventDefault();
+    if (!autoRotationActive) {
+        socket.emit('stop_rotation');
+    }
+});
+
+// Presets and motion macros (executed on the Arduino in one command)
+document.getElementById('preset-go').addEventListener('click', () => {
+    const name = document.getElementById('preset-select').value;
+    if (name) {
+        socket.emit('goto_preset', { name: name });
+        autoRotationActive = false;
+        updateAutoRotationUI();
+    }
+});
+
+document.getElementById('preset-save').addEventListener('click', () => {
+    const name = prompt('Preset name (e.g. Table View)');
+    if (name) {
+        socket.emit('save_preset', { name: name });
+    }
+});
+
+document.getElementById('sweep').addEventListener('click', () => {
+    socket.emit('sweep', { degrees: 90 });
+    autoRotationActive = false;
+    updateAutoRotationUI();
+});
+
+// Autofocus and centering run on the server; each button stays disabled until it reports back
+const visionButtons = {
+    autofocus: { button: document.getElementById('autofocus'), label: 'Autofocus', busy: 'Focusing...' },
+    center_stone: { button: document.getElementById('center-stone'), label: 'Center Stone', busy: 'Centering...' },
+};
+
+function resetVisionButtons() {
+    Object.values(visionButtons).forEach(({ button, label }) => {
+        button.disabled = false;
+        button.textContent = label;
+    });
+}
+
+Object.entries(visionButtons).forEach(([action, { button, busy }]) => {
+    button.addEventListener('click', () => {
+        button.disabled = true;
+        button.textContent = busy;
+        socket.emit(action);
+    });
+
+    socket.on(`${action}_result`, (result) => {
+        resetVisionButtons();
+        if (!['converged', 'centered', 'cancelled'].includes(result.result)) {
+            console.log(`${action} did not finish`, result);
+        }
+    });
+});
+
+// Heartbeat tells the server this phone is still here; if the phone in
+// control goes silent the server stops the motors
+setInterval(() => {
+    socket.emit('heartbeat');
+}, 15000);
@@ -0,0 +1,151 @@
+let deliveryMethod = 'email';
+
+// Recording and stills come from this page's station
+const stationApi = `/stations/${document.body.dataset.station}/api`;
+
+// Delivery method selection
+document.querySelectorAll('.delivery-option').forEach(option => {
+    option.addEventListener('click', function() {
+        document.querySelectorAll('.delivery-option').forEach(opt => opt.classList.remove('active'));
+        this.classList.add('active');
+        deliveryMethod = this.dataset.method;
+
+        const emailGroup = document.getElementById('emailGroup');
+        const phoneGroup = document.getElementById('phoneGroup');
+        const emailInput = document.getElementById('email');
+        const phoneInput = document.getElementById('phone');
+
+        if (deliveryMethod === 'email') {
+            emailGroup.style.display = 'block';
+            phoneGroup.style.display = 'none';
+            emailInput.required = true;
+            phoneInput.required = false;
+        } else if (deliveryMethod === 'sms') {
+            emailGroup.style.display = 'none';
+            phoneGroup.style.display = 'block';
+            emailInput.required = false;
+            phoneInput.required = true;
+        } else {
+            emailGroup.style.display = 'block';
+            phoneGroup.style.display = 'block';
+            emailInput.required = true;
+            phoneInput.required = true;
+        }
+    });
+});
+
+// Form submission
+document.getElementById('shareForm').addEventListener('submit', async function(e) {
+    e.preventDefault();
+
+    const email = document.getElementById('email').value;
+    const phone = document.getElementById('phone').value;
+    const submitBtn = document.getElementById('submitBtn');
+    const loading = document.getElementById('loading');
+    const message = document.getElementById('message');
+
+    // Validate inputs
+    if (deliveryMethod === 'email' || deliveryMethod === 'both') {
+        if (!email || !email.includes('@')) {
+            showMessage('Please enter a valid email address', 'error');
+            return;
+        }
+    }
+
+    if (deliveryMethod === 'sms' || deliveryMethod === 'both') {
+        if (!phone) {
+            showMessage('Please enter a phone number', 'error');
+            return;
+        }
+    }
+
+    // Show loading
+    submitBtn.disabled = true;
+    loading.style.display = 'block';
+    message.style.display = 'none';
+
+    try {
+        // Step 1: Take a sharp still of each camera, then start video recording
+        const sessionId = Date.now().toString();
+        await fetch(`${stationApi}/snapshot`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ session_id: sessionId })
+        }).catch((error) => console.log('Snapshot not taken', error));
+
+        const recordResponse = await fetch(`${stationApi}/video/record`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ session_id: sessionId })
+        });
+
+        if (recordResponse.status === 429) {
+            const busy = await recordResponse.json();
+            showMessage(`The recorder is busy. Please try again in about ${busy.retry_after} seconds.`, 'error');
+            return;
+        }
+        if (!recordResponse.ok) {
+            throw new Error('Failed to start recording');
+        }
+
+        // Wait for the recording to finish (it may queue behind other customers first)
+        let recording = await recordResponse.json();
+        while (recording.status === 'queued' || recording.status === 'recording_started') {
+            if (recording.position) {
+                showMessage(`Waiting for the recorder - you are number ${recording.position} in line.`, 'info');
+            }
+            await new Promise(resolve => setTimeout(resolve, 2000));
+            const pollResponse = await fetch(`/api/video/record/${sessionId}`);
+            if (!pollResponse.ok) {
+                throw new Error('Lost track of the recording');
+            }
+            recording = await pollResponse.json();
+        }
+        message.style.display = 'none';
+        if (recording.status !== 'complete') {
+            throw new Error('Recording failed');
+        }
+
+        // Step 2: Send video via email/SMS
+        const shareData = {
+            session_id: sessionId,
+            method: deliveryMethod,
+            email: email,
+            phone: phone
+        };
+
+        // This endpoint will be implemented next with email/SMS integration
+        const shareResponse = await fetch('/api/share', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(shareData)
+        });
+
+        if (shareResponse.ok) {
+            const result = await shareResponse.json();
+            showMessage(`✓ Success! Your diamond video has been sent to ${deliveryMethod === 'email' ? 'your email' : deliveryMethod === 'sms' ? 'your phone' : 'your email and phone'}.`, 'success');
+
+            // Reset form after 3 seconds
+            setTimeout(() => {
+                document.getElementById('shareForm').reset();
+                message.style.display = 'none';
+            }, 5000);
+        } else {
+            throw new Error('Failed to send video');
+        }
+
+    } catch (error) {
+        console.error('Error:', error);
+        showMessage('Sorry, something went wrong. Please try again.', 'error');
+    } finally {
+        submitBtn.disabled = false;
+        loading.style.display = 'none';
+    }
+});
+
+function showMessage(text, type) {
+    const message = document.getElementById('message');
+    message.textContent = text;
+    message.className = `message ${type}`;
+    message.style.display = 'block';
+}
@@ -0,0 +1,72 @@
+// HARBOR Diamond Viewer - Service Worker
+// Fingerprinted assets are cache-first (they never change); pages are
+// network-first with a cached fallback so the control page reopens on flaky WiFi.
+// The server fills in CACHE_VERSION and PRECACHE when serving this file.
+
+const CACHE_VERSION = '__CACHE_VERSION__';
+const CACHE_NAME = `harbor-${CACHE_VERSION}`;
+const PRECACHE = __PRECACHE__;
+const PAGES = ['/control', '/share'];
+const STATION_PAGE = /^\/stations\/[^/]+\/(control|share)$/;
+const NETWORK_TIMEOUT_MS = 3000;
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then((cache) => cache.addAll(PRECACHE.concat(PAGES)))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys()
+            .then((keys) => Promise.all(keys.filter((key) => key !== CACHE_NAME).map((key) => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+function networkFirst(request) {
+    return new Promise((resolve) => {
+        let settled = false;
+        const fallback = () => caches.match(request).then((cached) => {
+            if (!settled && cached) {
+                settled = true;
+                resolve(cached);
+            }
+        });
+        const timer = setTimeout(fallback, NETWORK_TIMEOUT_MS);
+        fetch(request).then((response) => {
+            clearTimeout(timer);
+            if (response.ok) {
+                const copy = response.clone();
+                caches.open(CACHE_NAME).then((cache) => cache.put(request, copy));
+            }
+            if (!settled) {
+                settled = true;
+                resolve(response);
+            }
+        }).catch(() => {
+            clearTimeout(timer);
+            caches.match(request).then((cached) => {
+                if (!settled) {
+                    settled = true;
+                    resolve(cached || Response.error());
+                }
+            });
+        });
+    });
+}
+
+self.addEventListener('fetch', (event) => {
+    const url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== self.location.origin) {
+        return;
+    }
+    if (url.pathname.startsWith('/assets/')) {
+        event.respondWith(caches.match(event.request).then((cached) => cached || fetch(event.request)));
+    } else if (PAGES.includes(url.pathname) || STATION_PAGE.test(url.pathname)) {
+        event.respondWith(networkFirst(event.request));
+    }
+    // Everything else (API, Socket.IO, videos) goes straight to the network
+});
@@ -0,0 +1 @@
+# HARBOR Diamond Viewer - Tests
@@ -0,0 +1,52 @@
+"""
+HARBOR Diamond Viewer - Simulated Arduino Test
+Drives ArduinoController against the pty simulator, so the firmware's
+motion macros are checked without hardware (Linux/macOS).
+
+Run from the repository root:
+    python -m unittest tests.test_arduino_simulator
+"""
+
+import unittest
+
+from src.arduino_controller import ArduinoController
+from src.arduino_simulator import SimulatedArduino
+
+
+class ArduinoSimulatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = SimulatedArduino(seed=1)
+        port = self.sim.start()
+        self.arduino = ArduinoController()
+        self.assertTrue(self.arduino.connect(port, reset_delay=0.1))
+
+    def tearDown(self):
+        self.arduino.disconnect()
+        self.sim.stop()
+
+    def test_goto_reaches_the_position_reported_by_pos(self):
+        self.assertTrue(self.arduino.goto(200, -100, 90))
+        self.assertEqual(self.arduino.read_until('ACK:'), 'ACK:GOTO')
+        self.assertEqual(self.arduino.read_until('DONE:', timeout=3.0), 'DONE:GOTO')
+        self.assertEqual(self.arduino.query_position(), {'x': 200, 'y': -100, 'theta': 90})
+
+    def test_sweep_returns_to_its_centre(self):
+        self.arduino.goto(0, 0, 45)
+        self.assertEqual(self.arduino.read_until('DONE:', timeout=3.0), 'DONE:GOTO')
+
+        self.assertTrue(self.arduino.sweep(90))
+        self.assertEqual(self.arduino.read_until('ACK:'), 'ACK:SWEEP')
+        self.assertEqual(self.arduino.read_until('DONE:', timeout=3.0), 'DONE:SWEEP')
+        self.assertEqual(self.arduino.query_position(), {'x': 0, 'y': 0, 'theta': 45})
+
+    def test_non_numeric_sweep_is_rejected(self):
+        self.arduino.send_command('SWEEP abc')
+        self.assertEqual(self.arduino.read_until('ERROR:SWEEP'), 'ERROR:SWEEP expects degrees')
+        # Nothing moved, and the simulator still answers
+        self.assertIsNone(self.sim.macro)
+        self.assertEqual(self.arduino.query_position(), {'x': 0, 'y': 0, 'theta': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+HARBOR Diamond Viewer - Upload Resume Test
+Uploads a file to the stand-in object store while the store cuts off one
+chunk, and checks that the agent resumes from the bytes the store kept.
+
+Run from the repository root:
+    python -m unittest tests.test_upload_resume
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+
+from src.object_store import ObjectStore, StoreHandler
+from src.upload import HttpChunkStore, UploadAgent
+
+CHUNK_SIZE = 64 * 1024
+
+
+class FlakyHandler(StoreHandler):
+    """Cuts off the second chunk once, keeping half of it, as --fail-rate does"""
+
+    offsets = []
+
+    def do_PUT(self):
+        offset = int(self.path.rsplit('offset=', 1)[1])
+        FlakyHandler.offsets.append(offset)
+        self.fail_rate = 1.0 if len(FlakyHandler.offsets) == 2 else 0.0
+        super().do_PUT()
+
+
+class UploadResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        FlakyHandler.store = ObjectStore(os.path.join(self.root, 'store'))
+        FlakyHandler.offsets = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        store = HttpChunkStore(f"http://127.0.0.1:{self.server.server_address[1]}")
+        self.agent = UploadAgent(store, workers=1, chunk_size=CHUNK_SIZE, max_backoff=0.1,
+                                 state_path=os.path.join(self.root, 'uploads.json'))
+        self.agent.start()
+
+    def tearDown(self):
+        self.agent.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.root)
+
+    def write(self, name, data):
+        path = os.path.join(self.root, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def stored(self, key):
+        with open(FlakyHandler.store.object_path(key), 'rb') as f:
+            return f.read()
+
+    def test_resumes_after_dropped_chunk(self):
+        data = os.urandom(4 * CHUNK_SIZE + 1000)
+        self.agent.enqueue(self.write('take.mp4', data))
+
+        self.assertIsNotNone(self.agent.wait('take.mp4', timeout=20))
+        self.assertEqual(self.stored('take.mp4'), data)
+        # The cut-off chunk left half its bytes in the store; the retry carries on from there
+        self.assertEqual(FlakyHandler.offsets[:3], [0, CHUNK_SIZE, CHUNK_SIZE + CHUNK_SIZE // 2])
+        self.assertEqual(FlakyHandler.offsets.count(0), 1)
+
+    def test_rewritten_file_goes_up_again(self):
+        path = self.write('watch.html', b'a' * 1000)
+        self.agent.enqueue(path, key='1/watch.html')
+        self.assertIsNotNone(self.agent.wait('1/watch.html', timeout=20))
+        puts = len(FlakyHandler.offsets)
+
+        # Same bytes: skipped. Same size, other bytes: uploaded again
+        self.agent.enqueue(path, key='1/watch.html')
+        self.assertEqual(self.agent.summary()['1/watch.html']['state'], 'done')
+        self.write('watch.html', b'b' * 1000)
+        self.agent.enqueue(path, key='1/watch.html')
+        self.assertIsNotNone(self.agent.wait('1/watch.html', timeout=20))
+        self.assertGreater(len(FlakyHandler.offsets), puts)
+        self.assertEqual(self.stored('1/watch.html'), b'b' * 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
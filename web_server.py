@@ -3,15 +3,42 @@ HARBOR Diamond Viewer - Web Server
 Flask server with WebSocket for mobile control and customer sharing
 """
 
+# Selects the async mode and monkey-patches before anything imports socket
+from src.server_mode import ASYNC_MODE, EmitQueue, blocking_io, run_options
+
 import os
-import cv2
+import json
+import mimetypes
 import time
+import logging
+import functools
+import inspect
+import queue
 import threading
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_file
-from flask_socketio import SocketIO, emit
+from flask import Flask, render_template, request, jsonify, send_file, make_response, g, abort
+from flask_socketio import SocketIO, emit, join_room
 from flask_cors import CORS
+from werkzeug.utils import safe_join
 from src.arduino_controller import ArduinoController
+from src.recording import QueueFull
+from src.camera_owner import camera_owner
+from src.camera_health import all_health
+from src.camera import camera_processes_enabled
+from src.segments import PLAYLIST, SEGMENT_TYPES, open_segment_writer, playlist_entries
+from src.renditions import MASTER, RenditionPackager
+from src.enhance import chain_from_env, enhance_recordings
+from src.autofocus import Autofocus
+from src.centering import StoneCentering
+from src.frame_hub import hub
+from src.snapshot import FORMATS as SNAPSHOT_FORMATS, SnapshotEncoder
+from src.upload import agent_from_env as upload_agent_from_env
+from src.stations import DEFAULT_STATION, StationRegistry, load_station_configs, page_path
+from src.log import configure_logging, get_logger, log_event, queue_depth, recent_events
+from src.status import status
+from src.static_assets import AssetPipeline, IMMUTABLE_CACHE, VENDOR_FILES
+from src import metrics
+from src.startup_profile import profile
 # from dotenv import load_dotenv
 #from twilio.rest import Client
 #import resend
@@ -19,23 +46,134 @@ from src.arduino_controller import ArduinoController
 # Load environment variables from .env file
 # load_dotenv()
 
+configure_logging()
+logger = get_logger('web')
+recorder_logger = get_logger('recorder')
+share_logger = get_logger('share')
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SESSION_SECRET', 'harbor-diamond-viewer-secret')
 
 # Restrict CORS to local network only (more secure than '*')
 # In production, customers will be on same WiFi network
 CORS(app, origins=["http://localhost:*", "http://127.0.0.1:*", "http://192.168.*.*:*", "http://10.*.*.*:*"])
-socketio = SocketIO(app, cors_allowed_origins=["http://localhost:*", "http://127.0.0.1:*", "http://192.168.*.*:*", "http://10.*.*.*:*"])
-
-# Arduino controller instance
-arduino = ArduinoController()
+socketio = SocketIO(app, async_mode=ASYNC_MODE, cors_allowed_origins=["http://localhost:*", "http://127.0.0.1:*", "http://192.168.*.*:*", "http://10.*.*.*:*"])
 
-# Auto-rotation state
-auto_rotation_active = False
-auto_rotation_direction = 0
+# Minified, fingerprinted, precompressed static files (built in start_web_server)
+assets = AssetPipeline()
 
 # Video capture state
 video_recordings = {}
+active_recordings = 0
+recordings_lock = threading.Lock()
+RECORDING_SECONDS = 30
+
+
+@app.context_processor
+def inject_asset_url():
+    return {'asset_url': assets.url}
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or 'unmatched'
+    started = g.get('request_started')
+    if started is not None:
+        metrics.HTTP_REQUEST_SECONDS.labels(endpoint=endpoint).observe(time.perf_counter() - started)
+    metrics.HTTP_REQUESTS.labels(endpoint=endpoint, status=response.status_code).inc()
+    return response
+
+
+def socket_event(name):
+    """socketio.on() that also counts and times the handler for /metrics"""
+    def decorator(handler):
+        count = metrics.SOCKETIO_EVENTS.labels(event=name)
+        timing = metrics.SOCKETIO_EVENT_SECONDS.labels(event=name)
+        # Flask-SocketIO retries connect() without the auth argument on TypeError;
+        # pass only what the handler accepts so it is never called (and counted) twice
+        accepted = len(inspect.signature(handler).parameters)
+
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return handler(*args[:accepted], **kwargs)
+            finally:
+                count.inc()
+                timing.observe(time.perf_counter() - started)
+        return socketio.on(name)(wrapper)
+    return decorator
+
+
+def stop_silent_controller(station, sid):
+    """Watchdog callback: the phone holding control (or the last to move the motors) stopped sending heartbeats"""
+    station.cancel_vision_job()
+    if station.arduino.is_connected():
+        station.arduino.stop_all()
+    station.lease.release(sid)
+    publish_state(station, controller=None, x_motion=0, y_motion=0, rotation=0,
+                  auto_rotation=False, auto_rotation_direction=0)
+
+
+# One Arduino, camera pair, control lease and watchdog per viewing station (see src/stations.py).
+# Only one phone drives a station's motors at a time; the lease lapses when idle.
+# Each watchdog sends one PING per interval regardless of how many phones are connected.
+# Per station, at most HARBOR_MAX_RECORDINGS record at once and HARBOR_RECORDING_QUEUE more may wait.
+stations = StationRegistry(
+    load_station_configs(),
+    lease_timeout=float(os.getenv('HARBOR_CONTROL_LEASE_SECONDS', '60')),
+    ping_interval=float(os.getenv('HARBOR_PING_INTERVAL', '10')),
+    client_timeout=float(os.getenv('HARBOR_CLIENT_TIMEOUT', '40')),
+    on_controller_silent=stop_silent_controller,
+    record=lambda session_id, station: record_video(session_id, station),  # defined below
+    max_recordings=int(os.getenv('HARBOR_MAX_RECORDINGS', '2')),
+    recording_queue=int(os.getenv('HARBOR_RECORDING_QUEUE', '4')),
+    recording_seconds=RECORDING_SECONDS,
+    blocking_io=blocking_io(ASYNC_MODE),
+    sleep=socketio.sleep,
+)
+client_stations = {}  # sid -> Station the client connected to
+
+# Every client joins this room for status; motion state goes to each station's own room
+CONTROL_ROOM = 'control'
+
+
+def lookup_station(station_id):
+    """Station for a route's station id; unknown ids end the request with a 404"""
+    station = stations.get(station_id)
+    if station is None:
+        abort(make_response(jsonify({'error': f'Unknown station: {station_id}'}), 404))
+    return station
+
+
+def current_station():
+    """Station the calling Socket.IO client connected to"""
+    return client_stations.get(request.sid, stations.default)
+
+
+def connected_clients():
+    return sum(len(station.watchdog.live_clients()) for station in stations)
+
+
+# Still snapshots: encoded in a small pool, keyed by share session
+snapshot_encoder = SnapshotEncoder(workers=int(os.getenv('HARBOR_SNAPSHOT_WORKERS', '2')))
+snapshots = {}  # session_id -> {camera index: path}
+
+# Finished recordings and stills are copied to a central store (HARBOR_UPLOAD_URL)
+try:
+    uploads = upload_agent_from_env()
+except (RuntimeError, ValueError) as e:
+    log_event(share_logger, logging.ERROR, "Uploads disabled", error=e)
+    uploads = None
+
+# Status changes are pushed to every client; emits may come from any thread
+emitter = EmitQueue(socketio, ASYNC_MODE)
+status.subscribe(lambda snapshot: emitter.emit('status', snapshot, to=CONTROL_ROOM))
 
 
 @app.route('/')
@@ -44,43 +182,212 @@ def index():
     return "<h1>HARBOR Diamond Viewer</h1><p>Use the display viewer to scan QR codes</p>"
 
 
-@app.route('/control')
-def control_interface():
+def render_page(template, station):
+    """Render a page with an ETag so repeat visits revalidate with a 304"""
+    response = make_response(render_template(template, station_id=station.id, station_name=station.name))
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
+@app.route('/control', defaults={'station_id': DEFAULT_STATION})
+@app.route('/stations/<station_id>/control')
+def control_interface(station_id):
     """Mobile control interface"""
-    return render_template('control.html')
+    return render_page('control.html', lookup_station(station_id))
 
 
-@app.route('/share')
-def share_interface():
+@app.route('/share', defaults={'station_id': DEFAULT_STATION})
+@app.route('/stations/<station_id>/share')
+def share_interface(station_id):
     """Customer sharing interface"""
-    return render_template('share.html')
+    return render_page('share.html', lookup_station(station_id))
+
+
+@app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    """Fingerprinted asset, precompressed variant chosen from Accept-Encoding"""
+    path, encoding = assets.resolve(filename, request.headers.get('Accept-Encoding'))
+    if path is None:
+        return jsonify({'error': 'Asset not found'}), 404
+    
+    response = send_file(path, mimetype=mimetypes.guess_type(filename)[0], conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE
+    return response
+
+
+@app.route('/sw.js')
+def service_worker():
+    """Service worker, served from the root so it controls /control and /share"""
+    with open(os.path.join(assets.static_dir, 'sw.js'), 'r', encoding='utf-8') as f:
+        script = f.read()
+    script = script.replace('__CACHE_VERSION__', assets.version())
+    script = script.replace('__PRECACHE__', json.dumps(assets.urls()))
+    response = make_response(script)
+    response.mimetype = 'application/javascript'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 
 @app.route('/api/status')
 def get_status():
-    """Get system status"""
+    """Get system status (cached snapshot; supports If-None-Match)"""
+    body, etag = status.cached_response()
+    response = make_response(body)
+    response.mimetype = 'application/json'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
+@app.route('/api/stations')
+def list_stations():
+    """Configured stations with their page URLs"""
     return jsonify({
-        'arduino_connected': arduino.is_connected(),
-        'auto_rotation': auto_rotation_active,
-        'timestamp': datetime.now().isoformat()
+        station.id: dict(station.summary(),
+                         control_url=page_path(station.id, 'control'),
+                         share_url=page_path(station.id, 'share'))
+        for station in stations
+    })
+
+
+@app.route('/api/cameras')
+def camera_diagnostics():
+    """Frame health of each displayed camera and the state of each warm recording camera"""
+    return jsonify({
+        'display': all_health(),
+        'recording': {str(station.top_camera): camera_owner(station.top_camera).summary() for station in stations},
     })
 
 
-@app.route('/api/video/record', methods=['POST'])
-def start_video_recording():
-    """Start 30-second video recording from top camera"""
+@app.route('/api/uploads')
+def list_uploads():
+    """Upload state of recordings and stills"""
+    return jsonify(uploads.summary() if uploads else {})
+
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    response = make_response(metrics.REGISTRY.render())
+    response.headers['Content-Type'] = metrics.CONTENT_TYPE
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@app.route('/api/diagnostics/logs')
+def get_diagnostic_logs():
+    """Recent log events from the in-memory ring buffer"""
+    limit = request.args.get('limit', 100, type=int)
+    level = logging.getLevelName(request.args.get('level', 'NOTSET').upper())
+    if not isinstance(level, int):
+        return jsonify({'error': 'Unknown level'}), 400
+    return jsonify({'events': recent_events(limit, level, request.args.get('logger'))})
+
+
+@app.route('/api/presets', defaults={'station_id': DEFAULT_STATION})
+@app.route('/stations/<station_id>/api/presets')
+def list_presets(station_id):
+    """List saved preset positions"""
+    return jsonify(lookup_station(station_id).presets.list())
+
+
+@app.route('/api/presets', methods=['POST'], defaults={'station_id': DEFAULT_STATION})
+@app.route('/stations/<station_id>/api/presets', methods=['POST'])
+def save_preset(station_id):
+    """Save a preset from explicit coordinates or the current stage position"""
+    station = lookup_station(station_id)
+    data = request.json or {}
+    name = (data.get('name') or '').strip()
+    if not name:
+        return jsonify({'error': 'Preset name required'}), 400
+    
+    if all(key in data for key in ('x', 'y', 'theta')):
+        try:
+            position = {key: int(data[key]) for key in ('x', 'y', 'theta')}
+        except (TypeError, ValueError, OverflowError):
+            return jsonify({'error': 'x, y and theta must be integers'}), 400
+    else:
+        position = station.arduino.query_position() if station.arduino.is_connected() else None
+        if position is None:
+            return jsonify({'error': 'Could not read current position'}), 503
+    
+    return jsonify({name: station.presets.save(name, position['x'], position['y'], position['theta'])})
+
+
+@app.route('/api/presets/<name>', methods=['DELETE'], defaults={'station_id': DEFAULT_STATION})
+@app.route('/stations/<station_id>/api/presets/<name>', methods=['DELETE'])
+def delete_preset(station_id, name):
+    """Delete a preset"""
+    if lookup_station(station_id).presets.delete(name):
+        return jsonify({'status': 'deleted', 'name': name})
+    return jsonify({'error': 'Preset not found'}), 404
+
+
+@app.route('/api/video/record', methods=['POST'], defaults={'station_id': DEFAULT_STATION})
+@app.route('/stations/<station_id>/api/video/record', methods=['POST'])
+def start_video_recording(station_id):
+    """Start (or queue) a 30-second video recording from the station's top camera"""
+    station = lookup_station(station_id)
     data = request.json
-    session_id = data.get('session_id', str(int(time.time())))
+    session_id = str(data.get('session_id', int(time.time())))
+    if not valid_session_id(session_id):
+        return jsonify({'error': 'Invalid session_id'}), 400
     
-    # Start recording in background thread
-    thread = threading.Thread(target=record_video, args=(session_id,))
-    thread.start()
+    # A session already recording (or recorded) on any station is joined, not recorded twice
+    owner, job = find_recording(session_id)
+    if job is not None and job.state != 'failed':
+        return jsonify(recording_status(owner, job, joined=True))
     
-    return jsonify({
-        'status': 'recording_started',
-        'session_id': session_id,
-        'duration': 30
-    })
+    try:
+        job, joined = station.recordings.submit(session_id)
+    except QueueFull as e:
+        log_event(recorder_logger, logging.WARNING, "Recording refused - queue full",
+                  session_id=session_id, queued=e.queued)
+        response = jsonify({'error': 'Recorder busy, please try again shortly',
+                            'queued': e.queued, 'retry_after': e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+    
+    return jsonify(recording_status(station, job, joined))
+
+
+@app.route('/api/video/record/<session_id>')
+def get_recording_status(session_id):
+    """Progress of a recording request (queue position while waiting)"""
+    station, job = find_recording(session_id)
+    if job is None:
+        return jsonify({'error': 'Unknown recording'}), 404
+    return jsonify(recording_status(station, job))
+
+
+def find_recording(session_id):
+    """(station, job) of the latest request for a session, whichever station took it, or (None, None)"""
+    found = (None, None)
+    for station in stations:
+        job = station.recordings.get(session_id)
+        if job is not None and (found[1] is None or found[1].state == 'failed'):
+            found = (station, job)
+    return found
+
+
+def recording_status(station, job, joined=False):
+    position = station.recordings.position(job)
+    body = {
+        'status': {'queued': 'queued', 'recording': 'recording_started'}.get(job.state, job.state),
+        'session_id': job.session_id,
+        'duration': RECORDING_SECONDS,
+        'joined': joined,
+        # Playable (with ffmpeg) from the first segment, not only once the recording is complete
+        'playlist': f"/api/video/{job.session_id}/hls/{PLAYLIST}",
+    }
+    if position:
+        body['position'] = position
+        body['estimated_start'] = station.recordings.estimated_start(position)
+    return body
 
 
 @app.route('/api/video/<session_id>')
@@ -92,142 +399,607 @@ def get_video(session_id):
     return jsonify({'error': 'Video not found'}), 404
 
 
-def record_video(session_id, duration=30):
-    """Record video from top camera for specified duration"""
+@app.route('/api/video/<session_id>/hls/<path:filename>')
+def get_video_segment(session_id, filename):
+    """Playlist or segment of a recording, available while it is still being captured"""
+    if not valid_session_id(session_id):
+        return jsonify({'error': 'Invalid session_id'}), 400
+    mimetype = SEGMENT_TYPES.get(os.path.splitext(filename)[1])
+    path = safe_join(os.path.join('recordings', session_id), filename)
+    if mimetype is None or path is None or not os.path.isfile(path):
+        return jsonify({'error': 'Segment not found'}), 404
+    
+    response = send_file(path, mimetype=mimetype, conditional=True)
+    # The playlist grows until #EXT-X-ENDLIST; a listed segment never changes
+    response.headers['Cache-Control'] = 'no-cache' if filename == PLAYLIST else IMMUTABLE_CACHE
+    return response
+
+
+@app.route('/watch/<session_id>')
+def watch_video(session_id):
+    """Player page: picks a rendition for the phone's screen and connection"""
+    if not valid_session_id(session_id) or not os.path.exists(f"recordings/{session_id}.mp4"):
+        return jsonify({'error': 'Video not found'}), 404
+    renditions = video_recordings.get(session_id, {}).get('renditions', [])
+    return render_template('watch.html', **watch_page(renditions, f"/api/video/{session_id}/hls/",
+                                                      f"/api/video/{session_id}", assets.url('vendor/hls.min.js')))
+
+
+def watch_page(renditions, prefix, video_url, hls_script):
+    """Template values for watch.html; `prefix` leads to the recording's directory"""
+    return {
+        'master_url': f"{prefix}abr/{MASTER}" if renditions else None,
+        'video_url': video_url,
+        'renditions': [{'name': r['name'], 'height': r['height'], 'kbps': r['kbps'],
+                        'url': f"{prefix}abr/{r['name']}.mp4"} for r in renditions],
+        'hls_script': hls_script,
+    }
+
+
+def valid_session_id(session_id):
+    """Session ids name files and directories under recordings/"""
+    return bool(session_id) and session_id.replace('-', '').replace('_', '').isalnum()
+
+
+@app.route('/api/snapshot', methods=['POST'], defaults={'station_id': DEFAULT_STATION})
+@app.route('/stations/<station_id>/api/snapshot', methods=['POST'])
+def take_snapshot(station_id):
+    """Encode the newest full-resolution frame of each camera and attach it to the share session"""
+    started = time.perf_counter()
+    station = lookup_station(station_id)
+    data = request.get_json(silent=True) or {}
+    session_id = str(data.get('session_id') or int(time.time() * 1000))
+    fmt = data.get('format', 'jpeg')
+    if fmt not in SNAPSHOT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(SNAPSHOT_FORMATS)}"}), 400
+    if not valid_session_id(session_id):
+        return jsonify({'error': 'Invalid session_id'}), 400
+    cameras = data.get('cameras', station.cameras)
+    if not isinstance(cameras, list) or any(camera not in station.cameras for camera in cameras):
+        return jsonify({'error': f"cameras must be a list drawn from {station.cameras}"}), 400
+    
+    # Copy now: the display (or a camera process) keeps writing new frames
+    frames = {}
+    for camera in cameras:
+        _, frame = hub.latest(camera)
+        if frame is not None:
+            frames[camera] = frame.copy()
+    if not frames:
+        return jsonify({'error': 'No live camera frames (is the display viewer running?)'}), 503
+    
+    try:
+        encoded = snapshot_encoder.capture(session_id, frames, fmt)
+    except (OSError, ValueError) as e:
+        log_event(recorder_logger, logging.ERROR, "Snapshot failed", session_id=session_id, error=e)
+        return jsonify({'error': str(e)}), 500
+    snapshots.setdefault(session_id, {}).update({camera: info['path'] for camera, info in encoded.items()})
+    if uploads:
+        for info in encoded.values():
+            uploads.enqueue(info['path'])
+    
+    elapsed = time.perf_counter() - started
+    metrics.SNAPSHOT_SECONDS.labels(format=fmt).observe(elapsed)
+    log_event(recorder_logger, logging.INFO, "Snapshot taken", session_id=session_id, format=fmt,
+              cameras=sorted(encoded), latency_ms=round(elapsed * 1000, 1))
+    return jsonify({
+        'session_id': session_id,
+        'format': fmt,
+        'latency_ms': round(elapsed * 1000, 1),
+        'snapshots': [
+            {'camera': camera, 'url': f"/api/snapshot/{session_id}/{camera}",
+             'bytes': info['bytes'], 'encode_ms': info['encode_ms']}
+            for camera, info in sorted(encoded.items())
+        ],
+    })
+
+
+@app.route('/api/snapshot/<session_id>/<int:camera>')
+def get_snapshot(session_id, camera):
+    """Retrieve a still taken for a share session"""
+    path = snapshots.get(session_id, {}).get(camera)
+    if path and os.path.exists(path):
+        return send_file(path, mimetype=mimetypes.guess_type(path)[0])
+    return jsonify({'error': 'Snapshot not found'}), 404
+
+
+def set_active_recordings(delta):
+    global active_recordings
+    with recordings_lock:
+        active_recordings += delta
+        count = active_recordings
+    metrics.RECORDINGS_ACTIVE.set(count)
+    status.update(active_recordings=count)
+
+
+def sample_status():
+    """Background task: refresh status fields that have no change event of their own"""
+    while True:
+        for station in stations:
+            status.update_item('stations', station.id, station.summary())
+        status.update(
+            arduino_connected=stations.default.arduino.is_connected(),
+            connected_clients=connected_clients(),
+            queues={'log': queue_depth()},
+        )
+        socketio.sleep(2)
+
+
+def record_video(session_id, station, duration=RECORDING_SECONDS):
+    """Record video from the station's top camera for specified duration; True once it is stitched into its MP4"""
+    set_active_recordings(1)
+    try:
+        return _record_video(session_id, station, duration)
+    finally:
+        set_active_recordings(-1)
+
+
+def _record_video(session_id, station, duration):
     os.makedirs('recordings', exist_ok=True)
     output_path = f"recordings/{session_id}.mp4"
     
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        print(f"Error: Could not open camera for recording {session_id}")
-        return
+    # The camera is already open and settled: the first frame is the newest one
+    feed = camera_owner(station.top_camera)
+    frames = feed.subscribe()
+    if frames is None:
+        log_event(recorder_logger, logging.ERROR, "Could not open camera for recording",
+                  session_id=session_id, station=station.id)
+        metrics.RECORDINGS.labels(result='camera_unavailable').inc()
+        return False
     
-    # Get camera properties
-    fps = 30
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    # Get camera properties (the camera's profiled mode, or the rate the display really delivers)
+    fps = feed.fps or 30
+    width = feed.width
+    height = feed.height
     
-    # Define codec and create VideoWriter
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+    # Short segments and a growing playlist in recordings/<session_id>/, so the
+    # recording can be watched and uploaded while it is still being captured
+    segment_dir = os.path.join('recordings', session_id)
+    writer = open_segment_writer(segment_dir, width, height, fps)
+    
+    # Optional display enhancement baked into the video (HARBOR_ENHANCE_RECORDINGS)
+    enhancer = chain_from_env() if enhance_recordings() else None
     
     start_time = time.time()
+    first_stamp = None
     frame_count = 0
     
     while time.time() - start_time < duration:
-        ret, frame = cap.read()
-        if ret:
-            out.write(frame)
+        try:
+            item = frames.get(timeout=2.0)
+        except queue.Empty:
+            item = None
+        if item is None:
+            break
+        stamp, frame = item
+        if first_stamp is None:
+            first_stamp = stamp
+        # Hold the declared fps by the time each frame was read: repeat a frame to cover a late
+        # or lost one, skip one that arrives before its slot
+        repeats = int((stamp - first_stamp) * fps) + 1 - frame_count
+        if repeats <= 0:
+            continue
+        if enhancer:
+            # Other recordings may be writing the same frame
+            frame = enhancer.process(frame, in_place=False)
+        written = 0
+        while written < repeats and writer.write(frame):
+            written += 1
             frame_count += 1
-        else:
+            if frame_count % fps == 0:
+                upload_segments(session_id, writer.completed_segments())
+        if written < repeats:
             break
     
-    cap.release()
-    out.release()
+    feed.unsubscribe(frames)
+    upload_segments(session_id, writer.close())
+    elapsed = time.time() - start_time
+    
+    # One MP4 for share links and downloads, stitched from the segments; without it the recording failed
+    stitched = bool(frame_count) and writer.finish(output_path)
+    # Shares of a packaged recording link its player page, written once the packager is done (even if it failed)
+    packaged = packager.enabled and stitched
+    
+    metrics.RECORDINGS.labels(result='complete' if stitched else 'failed' if frame_count else 'empty').inc()
+    metrics.RECORDING_SECONDS.observe(elapsed)
+    metrics.RECORDING_FRAMES.inc(frame_count)
+    metrics.RECORDING_FPS.set(round(frame_count / elapsed, 2) if elapsed > 0 else 0)
     
     video_recordings[session_id] = {
-        'path': output_path,
-        'duration': time.time() - start_time,
+        'path': output_path if stitched else None,
+        'playlist': os.path.join(segment_dir, PLAYLIST),
+        'segments': writer.kind,
+        'station': station.id,
+        'duration': elapsed,
         'frames': frame_count,
+        'packaged': packaged,
         'timestamp': datetime.now().isoformat()
     }
     
-    print(f"Recording complete: {session_id} ({frame_count} frames, {duration}s)")
+    log_event(recorder_logger, logging.INFO if stitched else logging.ERROR,
+              "Recording complete" if stitched else "Recording failed",
+              session_id=session_id, station=station.id, frames=frame_count, duration=duration)
+    if uploads and frame_count:
+        uploads.enqueue(os.path.join(segment_dir, PLAYLIST), key=f"{session_id}/{PLAYLIST}")
+        if stitched:
+            uploads.enqueue(output_path)
+    if packaged:
+        packager.submit(session_id, output_path, os.path.join(segment_dir, 'abr'),
+                        width, height, fps, frame_count / float(fps))
+    return stitched
+
+
+def publish_renditions(session_id, renditions):
+    """Packager callback: remember the ladder and publish it with a standalone player page
+    
+    The page is written even when packaging failed (no renditions): it then plays the original MP4,
+    and shares waiting for it are released.
+    """
+    recording = video_recordings.get(session_id)
+    if recording is not None:
+        recording['renditions'] = renditions
+    
+    directory = os.path.join('recordings', session_id)
+    files = [os.path.join('abr', MASTER)] if renditions else []
+    for rendition in renditions:
+        name = rendition['name']
+        files.append(os.path.join('abr', f'{name}.mp4'))
+        files.append(os.path.join('abr', name, 'index.m3u8'))
+        files += [os.path.join('abr', name, entry) for entry in playlist_entries(rendition['playlist'])]
+    keys = [f"{session_id}/{path.replace(os.sep, '/')}" for path in files]
+    if recording is not None:
+        recording['player_keys'] = keys
+    
+    # In the store the page sits at <session_id>/watch.html, next to abr/ and below <session_id>.mp4
+    with app.app_context():
+        html = render_template('watch.html', **watch_page(renditions, '', f"../{session_id}.mp4",
+                                                          VENDOR_FILES['vendor/hls.min.js']))
+    page_path = os.path.join(directory, 'watch.html')
+    with open(page_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    
+    if uploads:
+        for path, key in zip(files, keys):
+            uploads.enqueue(os.path.join(directory, path), key=key)
+        uploads.enqueue(page_path, key=f"{session_id}/watch.html")
+
+
+# Adaptive-bitrate renditions for playback, built one recording at a time (needs ffmpeg)
+packager = RenditionPackager(publish_renditions)
+
+
+def upload_segments(session_id, paths):
+    """Queue finished segments as soon as they are listed, keyed under the session"""
+    if uploads:
+        for path in paths:
+            uploads.enqueue(path, key=f"{session_id}/{os.path.basename(path)}")
 
 
 # WebSocket events for real-time control
-@socketio.on('connect')
+def publish_state(station, **changes):
+    """Apply changes to a station's state and broadcast the diff once to every client in its room"""
+    diff = station.state.update(**changes)
+    if diff:
+        socketio.emit('state', diff, to=station.room)
+        status.update_item('stations', station.id, station.summary())
+        if station is stations.default:
+            status.update(**{key: value for key, value in diff['changes'].items()
+                             if key in ('arduino_connected', 'auto_rotation')})
+    return diff
+
+
+def requires_control(handler):
+    """Only the client holding the station's control lease may drive its motors"""
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        sid = request.sid
+        station = current_station()
+        station.watchdog.client_seen(sid)
+        if not station.lease.acquire(sid):
+            emit('control_denied', {'controller': station.lease.current()})
+            return
+        # Watched for silence even after the lease lapses, while its motion may still be running
+        station.watchdog.motion_sent(sid)
+        publish_state(station, controller=sid)
+        return handler(*args, **kwargs)
+    return wrapper
+
+
+@socket_event('connect')
 def handle_connect():
-    """Handle client connection"""
-    print('Client connected')
-    emit('status', {
-        'arduino_connected': arduino.is_connected(),
-        'auto_rotation': auto_rotation_active
-    })
+    """Handle client connection (?station=<id> picks the station, default 'main')"""
+    station = stations.get(request.args.get('station'))
+    if station is None:
+        log_event(logger, logging.WARNING, "Client asked for unknown station",
+                  sid=request.sid, station=request.args.get('station'))
+        return False
+    log_event(logger, logging.DEBUG, "Client connected", sid=request.sid, station=station.id)
+    client_stations[request.sid] = station
+    join_room(CONTROL_ROOM)
+    join_room(station.room)
+    station.watchdog.client_seen(request.sid)
+    status.update(connected_clients=connected_clients())
+    emit('state_snapshot', station.state.snapshot())
+    emit('status', status.as_dict())
 
 
-@socketio.on('disconnect')
+@socket_event('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
-    print('Client disconnected')
+    log_event(logger, logging.DEBUG, "Client disconnected", sid=request.sid)
+    station = client_stations.pop(request.sid, None)
+    if station is None:
+        return
+    station.watchdog.client_gone(request.sid)
+    status.update(connected_clients=connected_clients())
+    
+    # A controller that vanished mid-press never sends touchend, so stop held axes
+    if station.lease.release(request.sid):
+        arduino, state = station.arduino, station.state
+        if arduino.is_connected():
+            if state.get('x_motion'):
+                arduino.stop_axis('X')
+            if state.get('y_motion'):
+                arduino.stop_axis('Y')
+            if state.get('rotation') and not state.get('auto_rotation'):
+                arduino.stop_rotation()
+        publish_state(station, controller=None, x_motion=0, y_motion=0, rotation=0)
+
+
+@socket_event('get_state')
+def handle_get_state():
+    """Resend the full state (clients ask after missing a version)"""
+    emit('state_snapshot', current_station().state.snapshot())
+
+
+@socket_event('request_control')
+def handle_request_control():
+    """Take control if it is free, otherwise ask the current holder to hand off"""
+    sid = request.sid
+    station = current_station()
+    if station.lease.acquire(sid):
+        publish_state(station, controller=sid)
+        emit('control_granted', {'controller': sid})
+        return
+    
+    holder = station.lease.current()
+    if holder:
+        socketio.emit('control_requested', {'requester': sid}, to=holder)
+    emit('control_denied', {'controller': holder})
+
 
+@socket_event('handoff_control')
+def handle_handoff_control(data):
+    """Current holder passes control to another client of the same station"""
+    to_sid = data.get('to')
+    station = current_station()
+    if to_sid and client_stations.get(to_sid) is station and station.lease.hand_off(request.sid, to_sid):
+        publish_state(station, controller=to_sid)
+        socketio.emit('control_granted', {'controller': to_sid}, to=to_sid)
 
-@socketio.on('arduino_connect')
+
+@socket_event('release_control')
+def handle_release_control():
+    """Give up control voluntarily"""
+    station = current_station()
+    if station.lease.release(request.sid):
+        publish_state(station, controller=None)
+
+
+@socket_event('arduino_connect')
 def handle_arduino_connect():
-    """Connect to Arduino"""
-    port = ArduinoController.find_arduino_port()
-    if not port:
-        ports = ArduinoController.list_available_ports()
-        port = ports[0] if ports else None
-    
-    if port and arduino.connect(port):
-        emit('arduino_status', {'connected': True, 'port': port})
-    else:
-        emit('arduino_status', {'connected': False, 'error': 'Connection failed'})
+    """Connect to the station's Arduino"""
+    station = current_station()
+    arduino = station.arduino
+    with station.connect_lock:
+        # Every phone asks on connect; reuse the open port instead of resetting the board
+        if arduino.is_connected():
+            emit('arduino_status', {'connected': True, 'port': arduino.serial_connection.port})
+            return
+        
+        # The station's arduino_port (ARDUINO_PORT for the default station) pins the port,
+        # e.g. a simulator pty from src.arduino_simulator; never auto-pick another station's board
+        port = station.arduino_port
+        if not port:
+            in_use = stations.ports_in_use(exclude=station)
+            port = ArduinoController.find_arduino_port(exclude=in_use)
+            if not port:
+                ports = [each for each in ArduinoController.list_available_ports() if each not in in_use]
+                port = ports[0] if ports else None
+        
+        if port and arduino.connect(port):
+            publish_state(station, arduino_connected=True)
+            emit('arduino_status', {'connected': True, 'port': port})
+        else:
+            publish_state(station, arduino_connected=False)
+            emit('arduino_status', {'connected': False, 'error': 'Connection failed'})
 
 
-@socketio.on('move_axis')
+@socket_event('move_axis')
+@requires_control
 def handle_move_axis(data):
     """Handle axis movement command"""
     axis = data.get('axis')  # 'X' or 'Y'
     direction = data.get('direction')  # 1 or -1
+    if direction not in (1, -1):
+        emit('error', {'error': 'direction must be 1 or -1'})
+        return
+    station = current_station()
     
-    if arduino.is_connected():
-        arduino.move_axis(axis, direction)
+    if station.arduino.is_connected() and axis in ('X', 'Y'):
+        station.cancel_vision_job()
+        station.arduino.move_axis(axis, direction)
+        publish_state(station, **{f'{axis.lower()}_motion': 1 if direction > 0 else -1})
         emit('command_sent', {'axis': axis, 'direction': direction})
 
 
-@socketio.on('stop_axis')
+@socket_event('stop_axis')
+@requires_control
 def handle_stop_axis(data):
     """Handle stop axis command"""
     axis = data.get('axis')
+    station = current_station()
     
-    if arduino.is_connected():
-        arduino.stop_axis(axis)
+    if station.arduino.is_connected() and axis in ('X', 'Y'):
+        station.arduino.stop_axis(axis)
+        publish_state(station, **{f'{axis.lower()}_motion': 0})
         emit('command_sent', {'axis': axis, 'action': 'stop'})
 
 
-@socketio.on('rotate')
+@socket_event('rotate')
+@requires_control
 def handle_rotate(data):
     """Handle rotation command"""
     direction = data.get('direction')  # 1 (CW) or -1 (CCW)
+    if direction not in (1, -1):
+        emit('error', {'error': 'direction must be 1 or -1'})
+        return
+    station = current_station()
     
-    if arduino.is_connected():
-        arduino.rotate(direction)
+    if station.arduino.is_connected():
+        station.arduino.rotate(direction)
+        publish_state(station, rotation=1 if direction > 0 else -1, auto_rotation=False, auto_rotation_direction=0)
         emit('command_sent', {'action': 'rotate', 'direction': direction})
 
 
-@socketio.on('stop_rotation')
+@socket_event('stop_rotation')
+@requires_control
 def handle_stop_rotation():
     """Handle stop rotation command"""
-    global auto_rotation_active
-    auto_rotation_active = False
-    
-    if arduino.is_connected():
-        arduino.stop_rotation()
+    station = current_station()
+    if station.arduino.is_connected():
+        station.arduino.stop_rotation()
         emit('command_sent', {'action': 'stop_rotation'})
-        emit('auto_rotation_status', {'active': False})
+    publish_state(station, rotation=0, auto_rotation=False, auto_rotation_direction=0)
 
 
-@socketio.on('auto_rotate')
+@socket_event('auto_rotate')
+@requires_control
 def handle_auto_rotate(data):
     """Handle auto-rotation (continuous rotation triggered by double-tap)"""
-    global auto_rotation_active, auto_rotation_direction
-    
     direction = data.get('direction', 1)
-    auto_rotation_active = True
-    auto_rotation_direction = direction
+    if direction not in (1, -1):
+        emit('error', {'error': 'direction must be 1 or -1'})
+        return
+    station = current_station()
+    
+    if station.arduino.is_connected():
+        station.arduino.auto_rotate(direction)  # Use new auto_rotate command
+        publish_state(station, rotation=direction, auto_rotation=True, auto_rotation_direction=direction)
+        emit('command_sent', {'action': 'auto_rotate', 'direction': direction})
+
+
+@socket_event('goto_preset')
+@requires_control
+def handle_goto_preset(data):
+    """Move to a saved preset in a single on-device GOTO"""
+    name = data.get('name')
+    station = current_station()
+    preset = station.presets.get(name)
+    if preset is None:
+        emit('preset_error', {'error': f'Unknown preset: {name}'})
+        return
     
-    if arduino.is_connected():
-        arduino.auto_rotate(direction)  # Use new auto_rotate command
-        emit('auto_rotation_status', {'active': True, 'direction': direction})
+    if station.arduino.is_connected():
+        station.arduino.goto(preset['x'], preset['y'], preset['theta'])
+        publish_state(station, rotation=0, auto_rotation=False, auto_rotation_direction=0)
+        emit('command_sent', {'action': 'goto', 'preset': name})
+
+
+@socket_event('save_preset')
+@requires_control
+def handle_save_preset(data):
+    """Save the current stage position under a name"""
+    name = (data.get('name') or '').strip()
+    station = current_station()
+    position = station.arduino.query_position() if name and station.arduino.is_connected() else None
+    if position is None:
+        emit('preset_error', {'error': 'Could not save preset'})
+        return
+    
+    station.presets.save(name, position['x'], position['y'], position['theta'])
+    socketio.emit('presets', station.presets.list(), to=station.room)
+
+
+@socket_event('list_presets')
+def handle_list_presets():
+    """Send the preset list to the client"""
+    emit('presets', current_station().presets.list())
+
+
+@socket_event('sweep')
+@requires_control
+def handle_sweep(data):
+    """Run an on-device rotation sweep"""
+    degrees = data.get('degrees', 90)
+    station = current_station()
+    
+    if station.arduino.is_connected():
+        station.arduino.sweep(degrees)
+        publish_state(station, rotation=0, auto_rotation=False, auto_rotation_direction=0)
+        emit('command_sent', {'action': 'sweep', 'degrees': degrees})
+
+
+@socket_event('autofocus')
+@requires_control
+def handle_autofocus():
+    """Hill-climb the zoom rail to the sharpest top-camera image"""
+    station = current_station()
+    start_vision_job(station, 'autofocus', lambda: Autofocus(
+        station.arduino, hub, camera_index=station.top_camera, axis='X'))
+
+
+@socket_event('center_stone')
+@requires_control
+def handle_center_stone():
+    """Centre the stone on Y and size it with the zoom rail"""
+    station = current_station()
+    start_vision_job(station, 'center_stone', lambda: StoneCentering(
+        station.arduino, hub,
+        top_camera=station.top_camera,
+        side_camera=station.side_camera,
+        tolerance=float(os.getenv('HARBOR_CENTER_TOLERANCE', '0.05')),
+        timeout=float(os.getenv('HARBOR_CENTER_TIMEOUT', '8')),
+    ))
+
+
+def start_vision_job(station, action, make_job):
+    """Run a camera-guided motion job on a worker thread; the result goes to `<action>_result`"""
+    if not station.arduino.is_connected():
+        emit(f'{action}_result', {'result': 'not_connected'})
+        return
+    with station.vision_lock:
+        if station.vision_job is not None:
+            emit(f'{action}_result', {'result': 'busy'})
+            return
+        job = station.vision_job = make_job()
+    threading.Thread(target=run_vision_job, args=(station, job, action, request.sid), daemon=True).start()
+    emit('command_sent', {'action': action})
 
 
-@socketio.on('heartbeat')
+def run_vision_job(station, job, action, sid):
+    """Worker thread: serial waits and frame waits must not block the server"""
+    try:
+        result = job.run()
+    finally:
+        with station.vision_lock:
+            station.vision_job = None
+    emitter.emit(f'{action}_result', {key: value for key, value in result.items() if key != 'trace'}, to=sid)
+
+
+@socket_event('set_home')
+@requires_control
+def handle_set_home():
+    """Zero the tracked position at the current stage position"""
+    station = current_station()
+    if station.arduino.is_connected():
+        station.arduino.set_home()
+        emit('command_sent', {'action': 'set_home'})
+
+
+@socket_event('heartbeat')
 def handle_heartbeat():
-    """Handle heartbeat from client"""
-    if arduino.is_connected():
-        arduino.send_command("PING")
+    """Handle heartbeat from client (liveness only; the watchdog PINGs the firmware)"""
+    current_station().watchdog.client_seen(request.sid)
     emit('heartbeat_ack', {'timestamp': datetime.now().isoformat()})
 
 
@@ -248,46 +1020,95 @@ def share_video():
     # TODO: GIA number detection (will be implemented in next task)
     gia_number = "GIA-PENDING"  # Placeholder
     
-    # Build video URL (will be accessible via LattePanda's IP)
-    video_url = f"http://{request.host}/api/video/{session_id}"
+    # Build video URL (will be accessible via LattePanda's IP); the player page once renditions are built
+    if packager.enabled:
+        video_url = f"http://{request.host}/watch/{session_id}"
+    else:
+        video_url = f"http://{request.host}/api/video/{session_id}"
+    photos = [(os.path.basename(path), f"http://{request.host}/api/snapshot/{session_id}/{camera}")
+              for camera, path in sorted(snapshots.get(session_id, {}).items())]
+    
+    if uploads:
+        # Customers open the links at home: deliver once the files are in the central store
+        threading.Thread(target=deliver_when_uploaded, daemon=True,
+                         args=(method, email, phone, session_id, gia_number, video_url, photos)).start()
+        return jsonify({
+            'status': 'queued',
+            'session_id': session_id,
+            'gia_number': gia_number,
+            'video_url': uploads.store.url(shared_video_key(session_id)),
+            'photo_urls': [uploads.store.url(key) for key, _ in photos]
+        })
     
+    photo_urls = [url for _, url in photos]
     try:
-        # Send based on method
-        if method == 'email' or method == 'both':
-            if email:
-                send_email(email, video_url, gia_number, session_id)
-        
-        if method == 'sms' or method == 'both':
-            if phone:
-                send_sms(phone, video_url, gia_number)
-        
+        deliver_share(method, email, phone, session_id, gia_number, video_url, photo_urls)
         return jsonify({
             'status': 'success',
             'session_id': session_id,
             'gia_number': gia_number,
-            'video_url': video_url
+            'video_url': video_url,
+            'photo_urls': photo_urls
         })
     
     except Exception as e:
-        print(f"Error sharing video: {e}")
+        log_event(share_logger, logging.ERROR, "Error sharing video", session_id=session_id, error=e)
         return jsonify({'error': str(e)}), 500
 
 
-def send_email(to_email, video_url, gia_number, session_id):
+def deliver_share(method, email, phone, session_id, gia_number, video_url, photo_urls):
+    """Send the links by email and/or SMS"""
+    if method == 'email' or method == 'both':
+        if email:
+            send_email(email, video_url, gia_number, session_id, photo_urls)
+    
+    if method == 'sms' or method == 'both':
+        if phone:
+            send_sms(phone, video_url, gia_number, photo_urls)
+
+
+def deliver_when_uploaded(method, email, phone, session_id, gia_number, local_video_url, photos):
+    """Worker thread: wait for the uploads, then send central links (local ones if the upload is late)"""
+    wait = float(os.getenv('HARBOR_UPLOAD_SHARE_WAIT', '600'))
+    deadline = time.monotonic() + wait
+    video_url = uploads.wait(shared_video_key(session_id), wait) or local_video_url
+    # The player page is uploaded last-queued, but the parallel workers may still be sending renditions
+    for key in video_recordings.get(session_id, {}).get('player_keys', []):
+        uploads.wait(key, max(0.0, deadline - time.monotonic()))
+    photo_urls = [uploads.wait(key, max(0.0, deadline - time.monotonic())) or local_url for key, local_url in photos]
+    if video_url == local_video_url:
+        log_event(share_logger, logging.WARNING, "Upload not finished - sharing local links",
+                  session_id=session_id, waited=wait)
+    try:
+        deliver_share(method, email, phone, session_id, gia_number, video_url, photo_urls)
+    except Exception as e:
+        log_event(share_logger, logging.ERROR, "Error sharing video", session_id=session_id, error=e)
+
+
+def shared_video_key(session_id):
+    """What a share link points to in the central store: the player page only if the recording was packaged"""
+    if video_recordings.get(session_id, {}).get('packaged'):
+        return f"{session_id}/watch.html"
+    return f"{session_id}.mp4"
+
+
+def send_email(to_email, video_url, gia_number, session_id, photo_urls=()):
     """Send email with video link and GIA number using Resend"""
     try:
         resend_api_key = os.getenv('RESEND_API_KEY')
         email_from = os.getenv('EMAIL_FROM', 'noreply@harbordiamonds.com')
         
         if not resend_api_key:
-            print(f"⚠️  EMAIL to {to_email}: Video={video_url}, GIA={gia_number}")
-            print("⚠️  RESEND_API_KEY not configured - email not sent")
+            log_event(share_logger, logging.WARNING, "RESEND_API_KEY not configured - email not sent",
+                      to=to_email, video_url=video_url, gia=gia_number)
+            metrics.SHARE_DELIVERIES.labels(channel='email', outcome='not_configured').inc()
             return
         
         # Configure Resend
         resend.api_key = resend_api_key
         
         # Create email HTML
+        photo_links = ''.join(f'<p><a href="{url}">📷 Photo {i + 1}</a></p>' for i, url in enumerate(photo_urls))
         html_content = f"""
         <!DOCTYPE html>
         <html>
@@ -309,6 +1130,7 @@ def send_email(to_email, video_url, gia_number, session_id):
                 <p class="gia-number">GIA Number: {gia_number}</p>
                 <p>Thank you for viewing your diamond at HARBOR. Your video is now available:</p>
                 <a href="{video_url}" class="video-link">📹 Watch Your Diamond Video</a>
+                {photo_links}
                 <p><small>Video ID: {session_id}</small></p>
                 <p><small>This link will remain active for 30 days.</small></p>
             </div>
@@ -325,15 +1147,16 @@ def send_email(to_email, video_url, gia_number, session_id):
         }
         
         email_response = resend.Emails.send(params)
-        print(f"✅ EMAIL sent to {to_email}: Video={video_url}, GIA={gia_number}")
-        print(f"   Email ID: {email_response['id']}")
+        log_event(share_logger, logging.INFO, "Email sent", to=to_email, video_url=video_url,
+                  gia=gia_number, email_id=email_response['id'])
+        metrics.SHARE_DELIVERIES.labels(channel='email', outcome='sent').inc()
         
     except Exception as e:
-        print(f"❌ EMAIL ERROR: {e}")
-        print(f"   Failed to send to {to_email}")
+        log_event(share_logger, logging.ERROR, "Email failed", to=to_email, error=e)
+        metrics.SHARE_DELIVERIES.labels(channel='email', outcome='failed').inc()
 
 
-def send_sms(to_phone, video_url, gia_number):
+def send_sms(to_phone, video_url, gia_number, photo_urls=()):
     """Send SMS with video link and GIA number using Twilio"""
     try:
         account_sid = os.getenv('TWILIO_ACCOUNT_SID')
@@ -341,20 +1164,22 @@ def send_sms(to_phone, video_url, gia_number):
         from_phone = os.getenv('TWILIO_PHONE_NUMBER')
         
         if not all([account_sid, auth_token, from_phone]):
-            print(f"⚠️  SMS to {to_phone}: Video={video_url}, GIA={gia_number}")
-            print("⚠️  Twilio credentials not configured - SMS not sent")
+            log_event(share_logger, logging.WARNING, "Twilio credentials not configured - SMS not sent",
+                      to=to_phone, video_url=video_url, gia=gia_number)
+            metrics.SHARE_DELIVERIES.labels(channel='sms', outcome='not_configured').inc()
             return
         
         # Initialize Twilio client
         client = Client(account_sid, auth_token)
         
         # Create SMS message
+        photo_lines = ''.join(f"\nPhoto: {url}" for url in photo_urls)
         message_body = f"""HARBOR Diamond Viewer
 
 GIA: {gia_number}
 
 Watch your diamond video:
-{video_url}
+{video_url}{photo_lines}
 
 Thank you for visiting HARBOR"""
         
@@ -365,28 +1190,50 @@ Thank you for visiting HARBOR"""
             to=to_phone
         )
         
-        print(f"✅ SMS sent to {to_phone}: Video={video_url}, GIA={gia_number}")
-        print(f"   Message SID: {message.sid}")
+        log_event(share_logger, logging.INFO, "SMS sent", to=to_phone, video_url=video_url,
+                  gia=gia_number, message_sid=message.sid)
+        metrics.SHARE_DELIVERIES.labels(channel='sms', outcome='sent').inc()
         
     except Exception as e:
-        print(f"❌ SMS ERROR: {e}")
-        print(f"   Failed to send to {to_phone}")
+        log_event(share_logger, logging.ERROR, "SMS failed", to=to_phone, error=e)
+        metrics.SHARE_DELIVERIES.labels(channel='sms', outcome='failed').inc()
 
 
-def start_web_server():
-    """Start the web server (can be called from display viewer or standalone)"""
+def start_web_server(own_cameras=True):
+    """Start the web server (standalone, or from the display viewer with own_cameras=False)"""
     # Create recordings directory
     os.makedirs('recordings', exist_ok=True)
+    with profile.phase('asset_build'):
+        assets.build()
+    
+    # Async mode comes from HARBOR_ASYNC_MODE (see src/server_mode.py)
+    log_event(logger, logging.INFO, "Starting HARBOR Diamond Viewer Web Server...", async_mode=ASYNC_MODE)
+    if ASYNC_MODE == 'threading':
+        log_event(logger, logging.WARNING, "Serving on Werkzeug's development server, not a production server",
+                  async_mode=ASYNC_MODE)
+    port = int(os.getenv('HARBOR_WEB_PORT', '5000'))
+    for station in stations:
+        logger.info(f"{station.name} control interface: http://<your-ip>:{port}{page_path(station.id, 'control')}")
+        logger.info(f"{station.name} share interface: http://<your-ip>:{port}{page_path(station.id, 'share')}")
+    logger.warning("SECURITY: This server should only be accessible on your local WiFi network")
+    logger.warning("Ensure proper network isolation (firewall, WiFi password protection)")
     
-    # Run server in production mode with eventlet for better Socket.IO performance
-    print("Starting HARBOR Diamond Viewer Web Server...")
-    print("Control interface: http://<your-ip>:5000/control")
-    print("Share interface: http://<your-ip>:5000/share")
-    print("\nSECURITY: This server should only be accessible on your local WiFi network")
-    print("Ensure proper network isolation (firewall, WiFi password protection)")
+    # One watchdog per station, so a stalled serial port only delays its own station
+    for station in stations:
+        socketio.start_background_task(station.watchdog.run)
+    socketio.start_background_task(sample_status)
+    # Warm each recording camera now, so a recording starts on a settled frame
+    for station in stations:
+        follow = None if own_cameras or camera_processes_enabled() else hub
+        camera_owner(station.top_camera).start(follow)
+    if uploads:
+        uploads.start()
+    if ASYNC_MODE != 'threading':
+        socketio.start_background_task(emitter.run)
     
-    # Production mode: debug=False, use eventlet async mode
-    socketio.run(app, host='0.0.0.0', port=5000, debug=False, allow_unsafe_werkzeug=False)
+    profile.mark('web_server_ready')
+    # Production mode: debug=False, no reloader
+    socketio.run(app, host='0.0.0.0', port=port, debug=False, use_reloader=False, **run_options(ASYNC_MODE))
 
 
 if __name__ == '__main__':